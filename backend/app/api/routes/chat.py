@@ -1,14 +1,39 @@
 """
 AI Chat API routes
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+import time
+import traceback
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from app.config import settings
 from app.models.schemas import ChatRequest, ChatResponse
-from app.core.langchain_agent import langchain_agent
-from app.core.chart_generator import format_for_chart, should_generate_chart
-from app.core.database import db
+from app.core.agent_loader import get_agent
+from app.core.analysis_report import analysis_reports, is_overall_question
+from app.core.chart_generator import format_for_chart, row_count, should_generate_chart, to_columns
+from app.core.cancellation import CANCELLED_ELAPSED, CANCELLED_WORK, CancelScope, cancel_scope, current_scope
+from app.core.cache import cached_query, result_cache
+from app.core.queries import (
+    COMPARE_STATES_QUERY, TOP_CRISIS_DISTRICTS_QUERY, STATE_CRISIS_COUNTS_QUERY,
+    STATE_CRISIS_DISTRICTS_QUERY, BEST_STATES_QUERY, ALL_STATES_RANKING_QUERY
+)
+from app.core.language import detect_language
+from app.core.places import ALL_STATES, place_catalog
+from app.core.query_log import note, query_log
+from app.core.refinements import apply_refinement, describe_result, parse_refinement
+from app.core.sessions import session_store
+from app.core import telemetry
+from app.core.telemetry import debug, registry, span
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+CHAT_PATHS = registry.counter(
+    "uidai_chat_answers_total", "Chat answers by path (agent run, cached answer, precomputed report or in-memory refinement)",
+    ("path",)
+)
+
+# Seconds between client-disconnect checks while a question is answered
+DISCONNECT_POLL_SECONDS = 0.5
 
 
 def _get_chart_data_for_question(question: str) -> list:
@@ -26,66 +51,50 @@ def _get_chart_data_for_question(question: str) -> list:
     
     question_lower = question.lower()
     
-    print(f"🔍 DEBUG: Analyzing question: '{question}'")
-    print(f"🔍 DEBUG: Question lower: '{question_lower}'")
+    debug("🔍 DEBUG: Analyzing question: '%s'", question)
+    debug("🔍 DEBUG: Question lower: '%s'", question_lower)
     
     try:
         # PATTERN 1: Compare specific states
         if 'compare' in question_lower:
-            print("✓ DEBUG: 'compare' keyword found!")
+            debug("✓ DEBUG: 'compare' keyword found!")
             
             states_to_compare = []
             
             # Extract state names from question
-            all_states = [
-                'Maharashtra', 'Punjab', 'Andhra Pradesh', 'Chhattisgarh',
-                'Tamil Nadu', 'Kerala', 'Karnataka', 'Gujarat', 'Rajasthan',
-                'Uttar Pradesh', 'Bihar', 'West Bengal', 'Madhya Pradesh',
-                'Odisha', 'Telangana', 'Haryana', 'Delhi', 'Jharkhand',
-                'Assam', 'Jammu and Kashmir', 'Uttarakhand', 'Himachal Pradesh',
-                'Tripura', 'Meghalaya', 'Manipur', 'Nagaland', 'Goa', 'Arunachal Pradesh',
-                'Mizoram', 'Sikkim', 'Chandigarh', 'Puducherry'
-            ]
-            
-            for state in all_states:
+            for state in ALL_STATES:
                 if state.lower() in question_lower:
                     states_to_compare.append(state)
-                    print(f"✓ DEBUG: Found state: {state}")
+                    debug("✓ DEBUG: Found state: %s", state)
             
-            print(f"🔍 DEBUG: States to compare: {states_to_compare}")
+            debug("🔍 DEBUG: States to compare: %s", states_to_compare)
             
             if len(states_to_compare) >= 2:
-                print("✓ DEBUG: Executing comparison query...")
+                debug("✓ DEBUG: Executing comparison query...")
+                note(intent="compare_states")
                 # Compare multiple states
-                states_list = "', '".join(states_to_compare)
-                query = f"""
-                SELECT state, ROUND(AVG(bio_ratio), 2) as avg_bio_ratio
-                FROM district_summary
-                WHERE state IN ('{states_list}')
-                  AND total_enrollments > 1000
-                GROUP BY state
-                ORDER BY avg_bio_ratio DESC
-                """
-                print(f"🔍 DEBUG: Query:\n{query}")
+                query = COMPARE_STATES_QUERY
+                params = {"states": states_to_compare}
+                debug("🔍 DEBUG: Query:\n%s", query)
                 
-                results = db.execute_query(query)
-                print(f"✓ DEBUG: Query returned {len(results) if results else 0} rows")
-                print(f"🔍 DEBUG: Raw results: {results}")
+                results = cached_query(query, params, name="chart_compare_states")
+                debug("✓ DEBUG: Query returned %s rows", len(results) if results else 0)
+                debug("🔍 DEBUG: Raw results: %s", results)
                 
                 if results and len(results) > 0:
                     # Access by dict keys, not indices
                     chart_data = [{'state': r['state'], 'avg_bio_ratio': float(r['avg_bio_ratio'])} for r in results]
-                    print(f"✓ DEBUG: Chart data prepared: {chart_data}")
+                    debug("✓ DEBUG: Chart data prepared: %s", chart_data)
                     return chart_data
                 else:
-                    print("⚠ DEBUG: Query returned no results!")
+                    debug("⚠ DEBUG: Query returned no results!")
                     return None
             else:
-                print(f"⚠ DEBUG: Not enough states found (need ≥2, got {len(states_to_compare)})")
+                debug("⚠ DEBUG: Not enough states found (need ≥2, got %s)", len(states_to_compare))
         
         # PATTERN 2: Top/Bottom N crisis districts
         if any(word in question_lower for word in ['top', 'worst', 'crisis']):
-            print("✓ DEBUG: 'top/worst/crisis' keyword found!")
+            debug("✓ DEBUG: 'top/worst/crisis' keyword found!")
             
             # Extract number
             limit = 10  # default
@@ -96,72 +105,42 @@ def _get_chart_data_for_question(question: str) -> list:
             elif 'top 20' in question_lower or 'top twenty' in question_lower:
                 limit = 20
             
-            print(f"🔍 DEBUG: Limit set to {limit}")
+            debug("🔍 DEBUG: Limit set to %s", limit)
+            note(intent="top_crisis_districts")
             
-            query = f"""
-            WITH stats AS (
-              SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
-              FROM district_summary WHERE total_enrollments > 1000
-            )
-            SELECT 
-              d.district || ', ' || d.state as location,
-              d.bio_ratio,
-              ROUND((d.bio_ratio - s.mean_ratio) / s.stddev_ratio, 2) as z_score
-            FROM district_summary d
-            CROSS JOIN stats s
-            WHERE d.total_enrollments > 1000
-              AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
-            ORDER BY z_score DESC
-            LIMIT {limit}
-            """
-            print(f"🔍 DEBUG: Query:\n{query}")
+            query = TOP_CRISIS_DISTRICTS_QUERY
+            debug("🔍 DEBUG: Query:\n%s", query)
             
-            results = db.execute_query(query)
-            print(f"✓ DEBUG: Query returned {len(results) if results else 0} rows")
+            results = cached_query(query, {"limit": limit}, name="chart_top_crisis")
+            debug("✓ DEBUG: Query returned %s rows", len(results) if results else 0)
             
             if results and len(results) > 0:
                 # Access by dict keys
                 chart_data = [{'location': r['location'], 'bio_ratio': float(r['bio_ratio']), 'z_score': float(r['z_score'])} for r in results]
-                print(f"✓ DEBUG: Chart data prepared with {len(chart_data)} items")
+                debug("✓ DEBUG: Chart data prepared with %s items", len(chart_data))
                 return chart_data
             else:
-                print("⚠ DEBUG: Query returned no results!")
+                debug("⚠ DEBUG: Query returned no results!")
                 return None
         
         # PATTERN 3: States with most crisis districts
         if 'state' in question_lower and any(word in question_lower for word in ['most', 'crisis', 'many']):
-            print("✓ DEBUG: 'state + most/crisis/many' keyword found!")
+            debug("✓ DEBUG: 'state + most/crisis/many' keyword found!")
+            note(intent="state_crisis_counts")
             
-            query = """
-            WITH stats AS (
-              SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
-              FROM district_summary WHERE total_enrollments > 1000
-            )
-            SELECT 
-              d.state,
-              COUNT(*) as crisis_count,
-              ROUND(AVG(d.bio_ratio), 2) as avg_ratio
-            FROM district_summary d
-            CROSS JOIN stats s
-            WHERE d.total_enrollments > 1000
-              AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
-            GROUP BY d.state
-            HAVING COUNT(*) > 0
-            ORDER BY crisis_count DESC
-            LIMIT 10
-            """
-            print(f"🔍 DEBUG: Query:\n{query}")
+            query = STATE_CRISIS_COUNTS_QUERY
+            debug("🔍 DEBUG: Query:\n%s", query)
             
-            results = db.execute_query(query)
-            print(f"✓ DEBUG: Query returned {len(results) if results else 0} rows")
+            results = cached_query(query, name="chart_state_crisis_counts")
+            debug("✓ DEBUG: Query returned %s rows", len(results) if results else 0)
             
             if results and len(results) > 0:
                 # Access by dict keys
                 chart_data = [{'state': r['state'], 'crisis_count': int(r['crisis_count']), 'avg_ratio': float(r['avg_ratio'])} for r in results]
-                print(f"✓ DEBUG: Chart data prepared with {len(chart_data)} items")
+                debug("✓ DEBUG: Chart data prepared with %s items", len(chart_data))
                 return chart_data
             else:
-                print("⚠ DEBUG: Query returned no results!")
+                debug("⚠ DEBUG: Query returned no results!")
                 return None
         
         # PATTERN 4: Specific state's districts
@@ -169,185 +148,387 @@ def _get_chart_data_for_question(question: str) -> list:
                       'Tamil Nadu', 'Kerala', 'Karnataka', 'Gujarat', 'Rajasthan',
                       'Uttar Pradesh', 'Bihar', 'West Bengal']:
             if state.lower() in question_lower and 'district' in question_lower:
-                print(f"✓ DEBUG: Found state '{state}' + 'district' keyword!")
+                debug("✓ DEBUG: Found state '%s' + 'district' keyword!", state)
+                note(intent="state_districts")
                 
-                query = f"""
-                WITH stats AS (
-                  SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
-                  FROM district_summary WHERE total_enrollments > 1000
-                )
-                SELECT 
-                  d.district,
-                  d.bio_ratio,
-                  ROUND((d.bio_ratio - s.mean_ratio) / s.stddev_ratio, 2) as z_score
-                FROM district_summary d
-                CROSS JOIN stats s
-                WHERE d.state = '{state}'
-                  AND d.total_enrollments > 1000
-                  AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
-                ORDER BY z_score DESC
-                LIMIT 10
-                """
-                print(f"🔍 DEBUG: Query:\n{query}")
+                query = STATE_CRISIS_DISTRICTS_QUERY
+                debug("🔍 DEBUG: Query:\n%s", query)
                 
-                results = db.execute_query(query)
-                print(f"✓ DEBUG: Query returned {len(results) if results else 0} rows")
+                results = cached_query(query, {"state": state}, name="chart_state_districts")
+                debug("✓ DEBUG: Query returned %s rows", len(results) if results else 0)
                 
                 if results and len(results) > 0:
                     # Access by dict keys
                     chart_data = [{'district': r['district'], 'bio_ratio': float(r['bio_ratio']), 'z_score': float(r['z_score'])} for r in results]
-                    print(f"✓ DEBUG: Chart data prepared with {len(chart_data)} items")
+                    debug("✓ DEBUG: Chart data prepared with %s items", len(chart_data))
                     return chart_data
         
         # PATTERN 5: Best/lowest performing states or districts
         if any(word in question_lower for word in ['best', 'lowest', 'good', 'performing well']):
-            print("✓ DEBUG: 'best/lowest/good' keyword found!")
+            debug("✓ DEBUG: 'best/lowest/good' keyword found!")
+            note(intent="best_states")
             
-            query = """
-            SELECT state, ROUND(AVG(bio_ratio), 2) as avg_bio_ratio
-            FROM district_summary
-            WHERE total_enrollments > 1000
-            GROUP BY state
-            HAVING AVG(bio_ratio) < 15
-            ORDER BY avg_bio_ratio ASC
-            LIMIT 10
-            """
-            print(f"🔍 DEBUG: Query:\n{query}")
+            query = BEST_STATES_QUERY
+            debug("🔍 DEBUG: Query:\n%s", query)
             
-            results = db.execute_query(query)
-            print(f"✓ DEBUG: Query returned {len(results) if results else 0} rows")
+            results = cached_query(query, name="chart_best_states")
+            debug("✓ DEBUG: Query returned %s rows", len(results) if results else 0)
             
             if results and len(results) > 0:
                 # Access by dict keys
                 chart_data = [{'state': r['state'], 'avg_bio_ratio': float(r['avg_bio_ratio'])} for r in results]
-                print(f"✓ DEBUG: Chart data prepared with {len(chart_data)} items")
+                debug("✓ DEBUG: Chart data prepared with %s items", len(chart_data))
                 return chart_data
             else:
-                print("⚠ DEBUG: Query returned no results!")
+                debug("⚠ DEBUG: Query returned no results!")
                 return None
         
         # PATTERN 6: Show all states ranking
         if 'all states' in question_lower or 'state ranking' in question_lower:
-            print("✓ DEBUG: 'all states' or 'state ranking' keyword found!")
+            debug("✓ DEBUG: 'all states' or 'state ranking' keyword found!")
+            note(intent="all_states_ranking")
             
-            query = """
-            SELECT state, ROUND(AVG(bio_ratio), 2) as avg_bio_ratio
-            FROM district_summary
-            WHERE total_enrollments > 1000
-            GROUP BY state
-            ORDER BY avg_bio_ratio DESC
-            LIMIT 20
-            """
-            print(f"🔍 DEBUG: Query:\n{query}")
+            query = ALL_STATES_RANKING_QUERY
+            debug("🔍 DEBUG: Query:\n%s", query)
             
-            results = db.execute_query(query)
-            print(f"✓ DEBUG: Query returned {len(results) if results else 0} rows")
+            results = cached_query(query, name="chart_all_states")
+            debug("✓ DEBUG: Query returned %s rows", len(results) if results else 0)
             
             if results and len(results) > 0:
                 # Access by dict keys
                 chart_data = [{'state': r['state'], 'avg_bio_ratio': float(r['avg_bio_ratio'])} for r in results]
-                print(f"✓ DEBUG: Chart data prepared with {len(chart_data)} items")
+                debug("✓ DEBUG: Chart data prepared with %s items", len(chart_data))
                 return chart_data
             else:
-                print("⚠ DEBUG: Query returned no results!")
+                debug("⚠ DEBUG: Query returned no results!")
                 return None
         
         # No pattern matched
-        print(f"⚠ DEBUG: No chart pattern matched for: '{question[:50]}...'")
+        debug("⚠ DEBUG: No chart pattern matched for: '%s...'", question[:50])
         return None
         
     except Exception as e:
         print(f"✗ ERROR in _get_chart_data_for_question: {e}")
-        import traceback
-        traceback.print_exc()
+        if telemetry.DEBUG:
+            traceback.print_exc()
         return None
 
-@router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """AI chat endpoint with dynamic chart generation"""
+def _refine_previous(session_id: str, question: str) -> ChatResponse:
+    """
+    Answer a follow-up from the session's previous result set
+    
+    Args:
+        session_id: Conversation id
+        question: Follow-up question
+        
+    Returns:
+        ChatResponse, or None when the agent has to run
+    """
+    previous = session_store.latest(session_id)
+    if previous is None:
+        return None
+    
+    # Try the latest (possibly already refined) result, then the result it came from
+    # so "now only Punjab" works after "now only Maharashtra"
+    places = place_catalog.mentioned(question)
+    base, refinement = previous, parse_refinement(question, previous.columns, places)
+    if refinement is None and previous.source is not None:
+        base, refinement = previous.source, parse_refinement(question, previous.source.columns, places)
+    if refinement is None:
+        return None
+    
+    debug("♻ Refining previous result in memory: %s", refinement.describe())
+    with span("chat.refine", rows=row_count(base.columns)):
+        columns = apply_refinement(base.columns, refinement)
+        chart_type = refinement.chart_type or previous.chart_type
+        chart_data = None
+        if chart_type != 'table' and row_count(columns) >= 2:
+            chart_data = format_for_chart(question, columns, chart_type=chart_type)
+        answer = describe_result((base.source or base).question, refinement, columns,
+                                 detect_language(question))
+    
+    session_store.remember(
+        session_id, question, columns,
+        chart_type=chart_data['type'] if chart_data else chart_type,
+        source=base.source or base
+    )
+    CHAT_PATHS.inc(path="refined")
+    note(path="refined", intent="refine", rows=row_count(columns))
+    
+    return ChatResponse(
+        success=True,
+        answer=answer,
+        question=question,
+        chart_data=chart_data,
+        session_id=session_id,
+        refined=True
+    )
+
+
+def _answer_from_report(session_id: str, question: str) -> ChatResponse:
+    """
+    Answer a country-wide "overall problems" question from the precomputed report
+    
+    Args:
+        session_id: Conversation id
+        question: User's question
+        
+    Returns:
+        ChatResponse, or None when no report is ready or the question is specific
+    """
+    report = analysis_reports.get()
+    if report is None or not is_overall_question(question, place_catalog.mentioned(question)):
+        return None
+    
+    debug("📋 Serving precomputed analysis report (version %s)", report.version)
+    with span("chat.report", version=report.version):
+        language = detect_language(question)
+        chart_data = None
+        if len(report.states) >= 2:
+            chart_data = format_for_chart(question, report.states, chart_type='bar')
+    
+    session_store.remember(
+        session_id, question, to_columns(report.crisis_districts or report.states),
+        chart_type=chart_data['type'] if chart_data else None
+    )
+    CHAT_PATHS.inc(path="report")
+    note(path="report", intent="overall", language=language, rows=len(report.crisis_districts))
+    
+    return ChatResponse(
+        success=True,
+        answer=report.narratives[language],
+        question=question,
+        chart_data=chart_data,
+        session_id=session_id
+    )
+
+
+def _cache_key(question: str) -> str:
+    """Cache key for a chat answer (case and whitespace insensitive)"""
+    return " ".join(question.lower().split())
+
+
+def _answer_from_cache(session_id: str, question: str) -> ChatResponse:
+    """Answer from the shared cache (None on a miss)"""
+    cached = result_cache.get("chat", _cache_key(question))
+    if cached is None:
+        return None
+    
+    debug("♻ Serving cached chat answer")
+    if cached["rows"]:
+        session_store.remember(
+            session_id, question, to_columns(cached["rows"]), chart_type=cached["chart_type"]
+        )
+    CHAT_PATHS.inc(path="cached")
+    note(path="cached", rows=len(cached["rows"] or []))
+    
+    return ChatResponse(
+        success=True,
+        answer=cached["answer"],
+        question=question,
+        chart_data=cached["chart_data"],
+        session_id=session_id
+    )
+
+
+def answer_question(question: str, session_id: str = None, source: str = "chat") -> ChatResponse:
+    """
+    Answer one chat question (refinement, precomputed report or agent run)
+    
+    Blocking; shared by the chat endpoint and background jobs. Every
+    question is appended to the query log.
+    
+    Args:
+        question: User's question
+        session_id: Conversation id (a new one is assigned if None)
+        source: Who asked ("chat", "job", "replay" or "prewarm"), for the
+            query log; prewarm answers are cached but not kept as sessions
+        
+    Returns:
+        ChatResponse with the answer and optional chart data
+    """
+    with query_log.record(question, session_id, source):
+        response = _answer_question(question, session_id, keep_session=source != "prewarm")
+        scope = current_scope()
+        note(
+            session=response.session_id,
+            success=response.success,
+            error=response.error,
+            cancelled=scope.reason if scope is not None and scope.cancelled else None
+        )
+        return response
+
+
+def _answer_question(question: str, session_id: str = None, keep_session: bool = True) -> ChatResponse:
+    """answer_question() without the query log (keep_session=False: no session is recorded)"""
     try:
-        # Get question
-        question = request.question
+        debug("=" * 60)
+        debug("📥 CHAT REQUEST RECEIVED")
+        debug("Question: %s", question)
+        debug("=" * 60)
+        
+        # Follow-ups on the previous result are answered without the agent
+        if keep_session:
+            session_id = session_id or session_store.new_id()
+        refined = _refine_previous(session_id, question)
+        if refined is not None:
+            return refined
+        
+        # Country-wide analysis is precomputed once per data version
+        reported = _answer_from_report(session_id, question)
+        if reported is not None:
+            return reported
         
-        print("=" * 60)
-        print(f"📥 CHAT REQUEST RECEIVED")
-        print(f"Question: {question}")
-        print("=" * 60)
+        # Same question on the same data version: reuse any worker's answer
+        cached = _answer_from_cache(session_id, question)
+        if cached is not None:
+            return cached
         
-        # Query LangChain
-        result = langchain_agent.query(question)
+        # Query LangChain (with the precomputed analysis as context when available)
+        report = analysis_reports.get()
+        with span("chat.agent"):
+            result = get_agent().query(question, context=report.context_text() if report else None)
+        note(path="agent", tier=result.get("tier"), language=result.get("language"),
+             escalated=bool(result.get("escalated")), usage=result.get("usage"))
         
         if not result["success"]:
-            print(f"✗ LangChain query failed: {result.get('answer', 'Unknown error')}")
+            print(f"✗ LangChain query failed: {result.get('error') or result.get('answer', 'Unknown error')}")
             return ChatResponse(
                 success=False,
                 answer="",
                 question=question,
-                error=result.get("answer", "Unknown error")
+                error=result.get("error") or result.get("answer") or "Unknown error",
+                session_id=session_id
             )
         
-        print(f"✓ LangChain query successful")
+        debug("✓ LangChain query successful")
         
         answer = result["answer"]
         chart_data = None
+        chart_query_result = None
         
         # ALWAYS try to generate chart
-        print(f"\n🎨 ATTEMPTING CHART GENERATION...")
-        print(f"Calling _get_chart_data_for_question('{question}')")
+        debug("\n🎨 ATTEMPTING CHART GENERATION...")
+        debug("Calling _get_chart_data_for_question('%s')", question)
         
         try:
-            chart_query_result = _get_chart_data_for_question(question)
+            with span("chat.chart_data"):
+                chart_query_result = _get_chart_data_for_question(question)
             
-            print(f"\n📊 Chart query result type: {type(chart_query_result)}")
-            print(f"📊 Chart query result: {chart_query_result}")
+            debug("\n📊 Chart query result type: %s", type(chart_query_result))
+            debug("📊 Chart query result: %s", chart_query_result)
             
             if chart_query_result and len(chart_query_result) > 0:
-                print(f"✓ Got chart data with {len(chart_query_result)} items")
-                print(f"Calling format_for_chart()...")
+                debug("✓ Got chart data with %s items", len(chart_query_result))
+                debug("Calling format_for_chart()...")
                 
-                chart_data = format_for_chart(question, chart_query_result)
+                with span("chart.format", rows=len(chart_query_result)):
+                    chart_data = format_for_chart(question, chart_query_result)
                 
-                print(f"✓ Chart formatted successfully!")
-                print(f"Chart data type: {type(chart_data)}")
-                print(f"Chart data keys: {chart_data.keys() if chart_data else 'None'}")
+                debug("✓ Chart formatted successfully!")
+                debug("Chart data type: %s", type(chart_data))
+                debug("Chart data keys: %s", chart_data.keys() if chart_data else 'None')
             else:
-                print(f"⚠ No chart data returned (result was None or empty)")
+                debug("⚠ No chart data returned (result was None or empty)")
                 
         except Exception as e:
             print(f"✗ Chart generation EXCEPTION: {e}")
-            import traceback
-            print("Stack trace:")
-            traceback.print_exc()
+            if telemetry.DEBUG:
+                traceback.print_exc()
+        
+        # Keep the result set for follow-ups (chart data, else the agent's last SQL result)
+        session_rows = chart_query_result if chart_data else (result.get("rows") or chart_query_result)
+        if session_rows:
+            session_store.remember(
+                session_id, question, to_columns(session_rows),
+                chart_type=chart_data['type'] if chart_data else None
+            )
+        CHAT_PATHS.inc(path="agent")
+        note(rows=len(session_rows) if session_rows else 0, chart=chart_data['type'] if chart_data else None)
+        # Answers cut short by the LLM budget are not reused
+        if not result.get("budget_exceeded"):
+            result_cache.set("chat", _cache_key(question), {
+                "answer": answer,
+                "chart_data": chart_data,
+                "chart_type": chart_data['type'] if chart_data else None,
+                "rows": session_rows,
+            }, ttl=settings.CHAT_CACHE_TTL_SECONDS)
         
-        print(f"\n📤 PREPARING RESPONSE:")
-        print(f"   Answer length: {len(answer)} chars")
-        print(f"   Chart data: {'YES' if chart_data else 'NO'}")
-        print("=" * 60)
+        debug("\n📤 PREPARING RESPONSE:")
+        debug("   Answer length: %s chars", len(answer))
+        debug("   Chart data: %s", 'YES' if chart_data else 'NO')
+        debug("=" * 60)
         
         return ChatResponse(
             success=True,
             answer=answer,
             question=question,
-            chart_data=chart_data
+            chart_data=chart_data,
+            session_id=session_id
         )
         
     except Exception as e:
         print(f"\n✗ CHAT ENDPOINT ERROR: {e}")
-        import traceback
-        traceback.print_exc()
+        if telemetry.DEBUG:
+            traceback.print_exc()
         return ChatResponse(
             success=False,
             answer="",
-            question=request.question,
-            error=str(e)
+            question=question,
+            error=str(e),
+            session_id=session_id
         )
 
 
+def answer_in_scope(scope: CancelScope, question: str, session_id: str = None,
+                    source: str = "chat") -> ChatResponse:
+    """answer_question() with `scope` as the current cancel scope (stops the agent and its SQL)"""
+    with cancel_scope(scope):
+        return answer_question(question, session_id, source)
+
+
+def record_cancelled(scope: CancelScope):
+    """Count a request whose work was cut short"""
+    CANCELLED_WORK.inc(stage="request", reason=scope.reason)
+    CANCELLED_ELAPSED.observe(time.monotonic() - scope.started, reason=scope.reason)
+
+
+@router.post("/", response_model=ChatResponse)
+async def chat(request: ChatRequest, http_request: Request):
+    """
+    AI chat endpoint with dynamic chart generation
+    
+    The answer is computed in a worker thread. If the client disconnects
+    or CHAT_TIMEOUT_SECONDS passes, pending LLM steps are skipped and
+    running SQL is cancelled on the server.
+    """
+    scope = CancelScope(settings.CHAT_TIMEOUT_SECONDS)
+    task = asyncio.ensure_future(
+        run_in_threadpool(answer_in_scope, scope, request.question, request.session_id)
+    )
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if not task.done() and not scope.cancelled and await http_request.is_disconnected():
+                print(f"⚠ Client disconnected, cancelling: {request.question[:50]}")
+                await run_in_threadpool(scope.cancel, "disconnect")
+        response = task.result()
+    finally:
+        scope.close()
+    
+    if scope.cancelled and not response.success:
+        record_cancelled(scope)
+        if scope.reason == "deadline":
+            response.error = f"Request timed out after {settings.CHAT_TIMEOUT_SECONDS:g}s"
+    
+    return response
+
+
 
 @router.get("/test")
 async def test_chat():
     """Test chat endpoint"""
     return {
         "status": "Chat endpoint working",
-        "agent_ready": langchain_agent.agent is not None
+        "agent_ready": get_agent().agent is not None
     }
\ No newline at end of file
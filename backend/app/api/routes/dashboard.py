@@ -1,182 +1,184 @@
 """
 Dashboard API routes
 """
+import asyncio
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import List
-from app.models.schemas import MetricsResponse, StateData, DistrictData
-from app.core.database import db
+from app.models.schemas import MetricsResponse, StateData, DistrictData, BootstrapResponse
+from app.core.queries import (
+    METRICS_QUERY, STATE_RANKINGS_QUERY, CRISIS_DISTRICTS_QUERY, FILTER_STATES_QUERY
+)
+from app.core.cache import cached_query
+from app.core.database import PoolTimeoutError
+from app.core.serialization import FastJSONResponse
+from app.core.analysis_report import analysis_reports
+from app.core.data_version import data_version
+from app.core.language import SUPPORTED_LANGUAGES
+from app.core.agent_loader import agent_ready
+from app.core.prewarm import prewarmer
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
+# Responses the client must not cache or revalidate (partial or pending results)
+NO_STORE = {"Cache-Control": "no-store"}
+
+
+def _http_error(error: Exception) -> HTTPException:
+    """503 (retry shortly) when the connection pool is saturated, else 500"""
+    if isinstance(error, PoolTimeoutError):
+        return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "5"})
+    return HTTPException(status_code=500, detail=str(error))
+
+
+def _fetch_metrics() -> MetricsResponse:
+    """Run the metrics query and build the response model"""
+    result = cached_query(METRICS_QUERY, name="metrics")
+    
+    if not result:
+        raise HTTPException(status_code=500, detail="Failed to fetch metrics")
+    
+    data = result[0]
+    
+    return MetricsResponse(
+        total_enrollments=int(data['total_enrollments'] or 0),
+        total_bio_updates=int(data['total_bio_updates'] or 0),
+        total_demo_updates=int(data['total_demo_updates'] or 0),
+        national_bio_ratio=round(float(data['total_bio_updates'] or 0) / float(data['total_enrollments'] or 1), 2),
+        national_demo_ratio=round(float(data['total_demo_updates'] or 0) / float(data['total_enrollments'] or 1), 2),
+        crisis_districts_count=int(data['crisis_districts_count'] or 0)
+    )
+
+
+def _fetch_states(limit: int) -> list:
+    """
+    Run the state rankings query
+    
+    Rows are returned as-is (shaped like StateData) and serialized by
+    orjson, skipping per-row model construction.
+    """
+    return cached_query(STATE_RANKINGS_QUERY, {"limit": limit}, name="state_rankings")
+
+
+def _fetch_crisis_districts(limit: int) -> list:
+    """Run the crisis districts query (rows shaped like DistrictData)"""
+    return cached_query(CRISIS_DISTRICTS_QUERY, {"limit": limit}, name="crisis_districts")
+
+
+def _fetch_filters() -> dict:
+    """Run the filter options query"""
+    states = cached_query(FILTER_STATES_QUERY, name="filter_states")
+    return {"states": [row['state'] for row in states]}
+
+
+def _warm_first_paint():
+    """Fill the default bootstrap payload for a new data version"""
+    _fetch_metrics()
+    _fetch_states(20)
+    _fetch_crisis_districts(30)
+    _fetch_filters()
+
+
+prewarmer.register("dashboard", _warm_first_paint)
+
 
 @router.get("/metrics", response_model=MetricsResponse)
 async def get_metrics():
     """Get overall system metrics"""
     try:
-        query = """
-        WITH enrollment_total AS (
-            SELECT SUM(age_0_5 + age_5_17 + age_18_greater) as total
-            FROM enrollment
-        ),
-        bio_total AS (
-            SELECT SUM(bio_age_5_17 + bio_age_17_) as total
-            FROM biometric_updates
-        ),
-        demo_total AS (
-            SELECT SUM(demo_age_5_17 + demo_age_17_) as total
-            FROM demographic_updates
-        ),
-        crisis_count AS (
-            SELECT COUNT(DISTINCT district) as count
-            FROM (
-                SELECT 
-                    e.state,
-                    e.district,
-                    SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) as enrollments,
-                    COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
-                              FROM biometric_updates b 
-                              WHERE b.state = e.state AND b.district = e.district), 0) as bio_updates,
-                    ROUND(COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
-                                    FROM biometric_updates b 
-                                    WHERE b.state = e.state AND b.district = e.district)::numeric / 
-                          NULLIF(SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater), 0), 0), 2) as bio_ratio
-                FROM enrollment e
-                GROUP BY e.state, e.district
-                HAVING SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) > 1000
-            ) districts
-            WHERE bio_ratio > 36.9  -- Simplified: >2 sigma threshold
-        )
-        SELECT 
-            (SELECT total FROM enrollment_total) as total_enrollments,
-            (SELECT total FROM bio_total) as total_bio_updates,
-            (SELECT total FROM demo_total) as total_demo_updates,
-            (SELECT count FROM crisis_count) as crisis_districts_count;
-        """
-        
-        result = db.execute_query(query)
-        
-        if not result:
-            raise HTTPException(status_code=500, detail="Failed to fetch metrics")
-        
-        data = result[0]
-        
-        return MetricsResponse(
-            total_enrollments=int(data['total_enrollments'] or 0),
-            total_bio_updates=int(data['total_bio_updates'] or 0),
-            total_demo_updates=int(data['total_demo_updates'] or 0),
-            national_bio_ratio=round(float(data['total_bio_updates'] or 0) / float(data['total_enrollments'] or 1), 2),
-            national_demo_ratio=round(float(data['total_demo_updates'] or 0) / float(data['total_enrollments'] or 1), 2),
-            crisis_districts_count=int(data['crisis_districts_count'] or 0)
-        )
+        return _fetch_metrics()
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.get("/states", response_model=List[StateData])
 async def get_state_rankings(limit: int = 20):
     """Get state rankings by biometric ratio"""
     try:
-        query = f"""
-        WITH enrollment_by_state AS (
-            SELECT 
-                state,
-                SUM(age_0_5 + age_5_17 + age_18_greater) as total_enrollments
-            FROM enrollment
-            GROUP BY state
-        ),
-        biometric_by_state AS (
-            SELECT 
-                state,
-                SUM(bio_age_5_17 + bio_age_17_) as total_biometric_updates
-            FROM biometric_updates
-            GROUP BY state
-        )
-        SELECT 
-            e.state,
-            e.total_enrollments as enrollments,
-            COALESCE(b.total_biometric_updates, 0) as bio_updates,
-            ROUND(COALESCE(b.total_biometric_updates::numeric / 
-                  NULLIF(e.total_enrollments, 0), 0), 2) as bio_ratio
-        FROM enrollment_by_state e
-        LEFT JOIN biometric_by_state b ON e.state = b.state
-        WHERE e.total_enrollments > 50000
-        ORDER BY bio_ratio DESC
-        LIMIT {limit};
-        """
-        
-        results = db.execute_query(query)
-        
-        return [StateData(**row) for row in results]
+        return FastJSONResponse(_fetch_states(limit))
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
 
 
 @router.get("/crisis-districts", response_model=List[DistrictData])
 async def get_crisis_districts(limit: int = 30):
     """Get crisis districts (statistical outliers)"""
     try:
-        query = f"""
-        WITH district_ratios AS (
-            SELECT 
-                e.state,
-                e.district,
-                SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) as enrollments,
-                COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
-                          FROM biometric_updates b 
-                          WHERE b.state = e.state AND b.district = e.district), 0) as bio_updates,
-                ROUND(COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
-                                FROM biometric_updates b 
-                                WHERE b.state = e.state AND b.district = e.district)::numeric / 
-                      NULLIF(SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater), 0), 0), 2) as bio_ratio
-            FROM enrollment e
-            GROUP BY e.state, e.district
-            HAVING SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) > 1000
-        ),
-        stats AS (
-            SELECT 
-                AVG(bio_ratio) as mean_ratio,
-                STDDEV(bio_ratio) as stddev_ratio
-            FROM district_ratios
-        )
-        SELECT 
-            d.state,
-            d.district,
-            d.enrollments,
-            d.bio_updates,
-            d.bio_ratio,
-            ROUND((d.bio_ratio - s.mean_ratio) / NULLIF(s.stddev_ratio, 0), 2) as z_score
-        FROM district_ratios d
-        CROSS JOIN stats s
-        WHERE ABS((d.bio_ratio - s.mean_ratio) / NULLIF(s.stddev_ratio, 0)) > 2
-        ORDER BY z_score DESC
-        LIMIT {limit};
-        """
-        
-        results = db.execute_query(query)
-        
-        return [DistrictData(**row) for row in results]
+        return FastJSONResponse(_fetch_crisis_districts(limit))
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _http_error(e)
+
+
+@router.get("/analysis")
+async def get_analysis(language: str = "en"):
+    """
+    Get the precomputed "overall problems" analysis for the current data version
+    
+    Served from memory; `status` is 'pending' until the first report is ready.
+    """
+    if language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language '{language}'")
+    
+    report = analysis_reports.get()
+    if report is None:
+        return FastJSONResponse({"status": "pending", "report": None}, headers=NO_STORE)
+    if report.version != data_version.current():
+        # Previous version's report while the new one is computed: not worth validating
+        return FastJSONResponse({"status": "ready", "report": report.to_dict(language)}, headers=NO_STORE)
+    
+    return FastJSONResponse({"status": "ready", "report": report.to_dict(language)})
 
 
 @router.get("/filters")
 async def get_filter_options():
     """Get available filter options (states, districts)"""
     try:
-        states_query = """
-        SELECT DISTINCT state 
-        FROM enrollment 
-        ORDER BY state;
-        """
-        
-        states = db.execute_query(states_query)
-        
-        return {
-            "states": [row['state'] for row in states]
-        }
+        return _fetch_filters()
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise _http_error(e)
+
+
+@router.get("/bootstrap", response_model=BootstrapResponse)
+async def get_bootstrap(states_limit: int = 20, crisis_limit: int = 30):
+    """
+    Get everything the dashboard needs for first paint in one round-trip
+    
+    Metrics, state rankings, crisis districts and filters run concurrently
+    on pooled connections. A failing section is reported in `errors`
+    instead of failing the whole payload.
+    """
+    sections = {
+        "metrics": run_in_threadpool(_fetch_metrics),
+        "states": run_in_threadpool(_fetch_states, states_limit),
+        "crisis_districts": run_in_threadpool(_fetch_crisis_districts, crisis_limit),
+        "filters": run_in_threadpool(_fetch_filters),
+    }
+    results = await asyncio.gather(*sections.values(), return_exceptions=True)
+    
+    payload = {}
+    errors = {}
+    for name, result in zip(sections, results):
+        if isinstance(result, Exception):
+            errors[name] = getattr(result, "detail", None) or str(result)
+            payload[name] = None
+        else:
+            payload[name] = result
+    
+    return FastJSONResponse({
+        "health": {
+            "status": "healthy",
+            "database": len(errors) < len(sections),
+            "langchain": agent_ready()
+        },
+        "metrics": payload["metrics"],
+        "states": payload["states"] or [],
+        "crisis_districts": payload["crisis_districts"] or [],
+        "filters": payload["filters"],
+        "errors": errors
+    }, headers=NO_STORE if errors else None)
@@ -0,0 +1,218 @@
+"""
+Streaming data export routes
+"""
+import csv
+import io
+import threading
+import time
+from decimal import Decimal
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.core.database import db
+from app.core.serialization import dumps
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# Downloads in progress (each holds a pooled READ connection throughout)
+_export_slots = threading.BoundedSemaphore(max(1, settings.EXPORT_MAX_CONCURRENT))
+
+
+EXPORT_QUERIES = {
+    "districts": """
+        SELECT state, district, total_enrollments, total_bio_updates, bio_ratio
+        FROM district_summary
+        {where}
+        ORDER BY state, district
+    """,
+    "states": """
+        WITH enrollment_by_state AS (
+            SELECT state, SUM(age_0_5 + age_5_17 + age_18_greater) as enrollments
+            FROM enrollment
+            {where}
+            GROUP BY state
+        ),
+        biometric_by_state AS (
+            SELECT state, SUM(bio_age_5_17 + bio_age_17_) as bio_updates
+            FROM biometric_updates
+            {where}
+            GROUP BY state
+        )
+        SELECT
+            e.state,
+            e.enrollments,
+            COALESCE(b.bio_updates, 0) as bio_updates,
+            ROUND(COALESCE(b.bio_updates::numeric / NULLIF(e.enrollments, 0), 0), 2) as bio_ratio
+        FROM enrollment_by_state e
+        LEFT JOIN biometric_by_state b ON e.state = b.state
+        ORDER BY e.state
+    """,
+    "pincodes": """
+        WITH enrollment_by_pincode AS (
+            SELECT state, district, pincode,
+                   SUM(age_0_5 + age_5_17 + age_18_greater) as enrollments
+            FROM enrollment
+            {where}
+            GROUP BY state, district, pincode
+        ),
+        biometric_by_pincode AS (
+            SELECT state, district, pincode,
+                   SUM(bio_age_5_17 + bio_age_17_) as bio_updates
+            FROM biometric_updates
+            {where}
+            GROUP BY state, district, pincode
+        ),
+        demographic_by_pincode AS (
+            SELECT state, district, pincode,
+                   SUM(demo_age_5_17 + demo_age_17_) as demo_updates
+            FROM demographic_updates
+            {where}
+            GROUP BY state, district, pincode
+        )
+        SELECT
+            e.state,
+            e.district,
+            e.pincode,
+            e.enrollments,
+            COALESCE(b.bio_updates, 0) as bio_updates,
+            COALESCE(d.demo_updates, 0) as demo_updates
+        FROM enrollment_by_pincode e
+        LEFT JOIN biometric_by_pincode b USING (state, district, pincode)
+        LEFT JOIN demographic_by_pincode d USING (state, district, pincode)
+        ORDER BY e.state, e.district, e.pincode
+    """,
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _build_query(dataset: str, state: Optional[str]):
+    """Build the export query and parameters for a dataset"""
+    template = EXPORT_QUERIES[dataset]
+    if not state:
+        return template.format(where=""), None
+
+    # Same filter is repeated in every CTE of the template
+    placeholders = template.count("{where}")
+    return template.format(where="WHERE state = %s"), [state] * placeholders
+
+
+def _encode_csv(batches):
+    """Encode row batches as CSV chunks (header taken from the first batch)"""
+    header_written = False
+    for rows in batches:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not header_written:
+            writer.writerow(rows[0].keys())
+            header_written = True
+        writer.writerows(row.values() for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(batches):
+    """Encode row batches as newline-delimited JSON chunks"""
+    for rows in batches:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def _encode_parquet(batches):
+    """Encode row batches as Parquet, one row group per batch"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = io.BytesIO()
+    writer = None
+    for rows in batches:
+        table = pa.table({
+            key: [float(row[key]) if isinstance(row[key], Decimal) else row[key] for row in rows]
+            for key in rows[0].keys()
+        })
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+
+        # Hand off whatever the writer flushed and reset the buffer
+        chunk = sink.getvalue()
+        if chunk:
+            yield chunk
+            sink.seek(0)
+            sink.truncate()
+
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+ENCODERS = {
+    "csv": _encode_csv,
+    "ndjson": _encode_ndjson,
+    "parquet": _encode_parquet,
+}
+
+
+def _stream_export(dataset: str, fmt: str, query: str, params):
+    """Stream an export and report throughput when it finishes (releases its export slot)"""
+    stats = {"rows": 0}
+    start = time.perf_counter()
+
+    def counted(batches):
+        for rows in batches:
+            stats["rows"] += len(rows)
+            yield rows
+
+    try:
+        yield from ENCODERS[fmt](counted(db.stream_query(query, params)))
+    finally:
+        _export_slots.release()
+        elapsed = time.perf_counter() - start
+        rate = stats["rows"] / elapsed if elapsed > 0 else 0.0
+        print(f"✓ Export {dataset} ({fmt}): {stats['rows']} rows in {elapsed:.2f}s "
+              f"({rate:,.0f} rows/sec)")
+
+
+@router.get("/{dataset}")
+async def export_dataset(dataset: str, format: str = "csv", state: Optional[str] = None):
+    """
+    Stream a full dataset export (districts, states or pincodes)
+
+    Uses a server-side cursor, so memory stays flat regardless of size.
+    At most EXPORT_MAX_CONCURRENT downloads run at once (503 otherwise),
+    leaving the rest of the pool to dashboard queries.
+    """
+    if dataset not in EXPORT_QUERIES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown dataset '{dataset}'. Available: {', '.join(EXPORT_QUERIES)}"
+        )
+    if format not in ENCODERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format '{format}'. Available: {', '.join(ENCODERS)}"
+        )
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+
+    if not _export_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Too many exports in progress. Try again shortly.",
+            headers={"Retry-After": "30"}
+        )
+
+    query, params = _build_query(dataset, state)
+    filename = f"{dataset}_{state.replace(' ', '_').lower()}" if state else dataset
+
+    return StreamingResponse(
+        _stream_export(dataset, format, query, params),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
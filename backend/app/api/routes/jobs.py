@@ -0,0 +1,107 @@
+"""
+Background job API routes
+Submit a chat question, get a job id immediately, then poll or
+subscribe to Server-Sent Events for the result
+"""
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.models.schemas import JobRequest, JobResponse
+from app.core.jobs import Job, QueueFullError, job_queue
+from app.core.serialization import dumps
+from app.config import settings
+from app.api.routes.chat import answer_in_scope, record_cancelled
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Seconds between SSE keep-alive comments while a job is unchanged
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def run_chat_job(job: Job) -> dict:
+    """Job handler: answer the question like POST /api/chat/ (within JOB_TIMEOUT_SECONDS)"""
+    scope = job.cancel_scope
+    scope.set_deadline(settings.JOB_TIMEOUT_SECONDS)
+    try:
+        response = answer_in_scope(scope, job.payload["question"], job.payload.get("session_id"), source="job")
+    finally:
+        scope.close()
+    if scope.cancelled and not response.success:
+        record_cancelled(scope)
+        if scope.reason == "deadline":
+            raise RuntimeError(f"Job timed out after {settings.JOB_TIMEOUT_SECONDS:g}s")
+    if not response.success:
+        raise RuntimeError(response.error or "Chat question failed")
+    return response.model_dump()
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.post("/", response_model=JobResponse, status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue a chat question and return its job id right away"""
+    try:
+        job = job_queue.submit(
+            {"question": request.question, "session_id": request.session_id},
+            priority=request.priority
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return job.to_dict()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Poll a job's status (and result once finished)"""
+    return _get_job(job_id).to_dict()
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    _get_job(job_id)
+    return job_queue.cancel(job_id).to_dict()
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Stream job status changes as Server-Sent Events
+
+    Sends a `status` event on every change and ends after the final one
+    (status succeeded, failed or cancelled), or when the queue stops.
+    Waiting is an asyncio event set by the job queue, so watchers hold
+    no threadpool thread.
+    """
+    job = _get_job(job_id)
+
+    async def stream():
+        changed = job_queue.watch(job)
+        revision = -1
+        try:
+            while True:
+                changed.clear()
+                if job.revision != revision:
+                    revision = job.revision
+                    yield b"event: status\ndata: " + dumps(job.to_dict()) + b"\n\n"
+                    if job.finished:
+                        return
+                if job_queue.stopping or await request.is_disconnected():
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            job_queue.unwatch(job, changed)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -13,17 +13,160 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WORKERS: int = 1
+    # "full" (dashboard + chat) or "dashboard" (never imports the LangChain stack)
+    APP_MODE: str = "full"
     
     # Database
     DATABASE_URL: str
+    DB_POOL_MIN: int = 1
+    DB_POOL_MAX: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0  # wait for a free connection, then 503
+    
+    # Read replicas (comma-separated URLs; dashboard/chart reads go to a replica
+    # whose lag is within REPLICA_MAX_LAG_SECONDS, else to the primary)
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 30.0
+    REPLICA_LAG_CHECK_SECONDS: float = 10.0
+    
+    # Agent SQL connection (defaults to the first replica, else the primary).
+    # Every agent connection gets an explicit work_mem (AGENT_DB_WORK_MEM) and
+    # statement_timeout (AGENT_SQL_TIMEOUT_MS); AGENT_DB_ROLE is only a SET ROLE
+    # for privileges, since a role's ALTER ROLE ... SET defaults and CONNECTION
+    # LIMIT apply at login. To have the server enforce those, put the
+    # restricted user in AGENT_DATABASE_URL.
+    AGENT_DATABASE_URL: str = ""
+    AGENT_DB_ROLE: str = ""
+    AGENT_DB_WORK_MEM: str = "16MB"
+    AGENT_DB_POOL_MAX: int = 4
+    
+    # Streaming export (each download holds a pooled connection until it
+    # finishes, so only EXPORT_MAX_CONCURRENT run at once; the rest get a 503)
+    EXPORT_BATCH_SIZE: int = 5000
+    EXPORT_MAX_CONCURRENT: int = 2
+    
+    # Response compression
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # Conditional GETs (dashboard ETag = data version; matching If-None-Match -> 304)
+    ETAG_ENABLED: bool = True
+    
+    # LLM backend ("groq" or "fake" for the local scripted stand-in)
+    LLM_BACKEND: str = "groq"
+    FAKE_LLM_LATENCY_MS: float = 300.0
+    FAKE_LLM_FAST_LATENCY_MS: float = 80.0
+    FAKE_LLM_TOKENS_PER_SEC: float = 200.0
+    FAKE_LLM_SCRIPT: str = ""
     
     # Groq API
-    GROQ_API_KEY: str
+    GROQ_API_KEY: str = ""
     GROQ_MODEL: str = "meta-llama/llama-4-maverick-17b-128e-instruct"
+    GROQ_MAX_TOKENS: int = 2000
+    
+    # Model routing (simple lookups -> fast tier, analyses -> GROQ_MODEL)
+    MODEL_ROUTING: bool = True
+    GROQ_FAST_MODEL: str = "llama-3.1-8b-instant"
+    FAST_MAX_TOKENS: int = 600
+    FAST_MAX_ITERATIONS: int = 6
+    
+    # Per-question LLM budgets (checked before every LLM/tool step; the agent
+    # then stops with a partial answer, before CHAT_TIMEOUT_SECONDS hits)
+    AGENT_MAX_TURNS: int = 12
+    AGENT_MAX_TOKENS: int = 40000
+    AGENT_MAX_SECONDS: float = 90.0
+    
+    # Token prices for cost accounting (USD per million tokens)
+    GROQ_INPUT_PRICE_PER_MTOK: float = 0.20
+    GROQ_OUTPUT_PRICE_PER_MTOK: float = 0.60
+    GROQ_FAST_INPUT_PRICE_PER_MTOK: float = 0.05
+    GROQ_FAST_OUTPUT_PRICE_PER_MTOK: float = 0.08
+    
+    # Agent SQL guard
+    AGENT_SQL_MAX_COST: float = 500000.0
+    AGENT_SQL_TIMEOUT_MS: int = 15000
+    AGENT_SQL_MAX_ROWS: int = 200
+    
+    # Chat sessions (follow-up refinements)
+    SESSION_MAX_SESSIONS: int = 1000
+    SESSION_TTL_SECONDS: int = 1800
+    SESSION_MAX_RESULTS: int = 3
+    SESSION_MAX_ROWS: int = 5000
+    
+    # Request deadlines (agent runs and their SQL are cancelled when exceeded)
+    CHAT_TIMEOUT_SECONDS: float = 120.0
+    
+    # Background jobs (long-running chat questions)
+    JOB_WORKERS: int = 4
+    JOB_MAX_QUEUED: int = 100
+    JOB_RESULT_TTL_SECONDS: int = 3600
+    JOB_TIMEOUT_SECONDS: float = 600.0
+    
+    # Chat query log (one NDJSON line per question; rotated to <path>.1 at
+    # QUERY_LOG_MAX_BYTES; replay with python -m benchmarks.replay_queries)
+    QUERY_LOG_ENABLED: bool = True
+    QUERY_LOG_PATH: str = "/tmp/uidai_query_log.ndjson"
+    QUERY_LOG_MAX_BYTES: int = 50_000_000
+    
+    # Shared result cache ("memory", "sqlite" or "redis" for any RESP server)
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_SQLITE_PATH: str = "/tmp/uidai_cache.db"
+    CACHE_MAX_ENTRIES: int = 2048
+    CACHE_TTL_SECONDS: int = 3600
+    CHAT_CACHE_TTL_SECONDS: int = 86400
+    
+    # Cache prewarming (on a data-version change the hottest cached queries are
+    # recomputed before traffic switches over, at most PREWARM_TIMEOUT_SECONDS
+    # after the load). PREWARM_CHAT_QUESTIONS > 0 also re-answers the most asked
+    # chat questions; that re-runs the agent and costs LLM tokens, so it is off
+    # unless set
+    PREWARM_ENABLED: bool = True
+    PREWARM_MAX_QUERIES: int = 64
+    PREWARM_CHAT_QUESTIONS: int = 0
+    PREWARM_TIMEOUT_SECONDS: float = 300.0
+    
+    # Background health checks (probes read the last result; the database is
+    # checked on its own connection, so a saturated pool does not fail readiness)
+    HEALTH_CHECK_SECONDS: float = 10.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 3.0
+    
+    # Data version / precomputed analysis report
+    DATA_VERSION_CHECK_SECONDS: int = 30
+    ANALYSIS_REPORT_ENABLED: bool = True
+    
+    # Rate limiting (per-client token buckets; "memory" or "sqlite" shared by workers)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "/tmp/uidai_rate_limit.db"
+    RATE_LIMIT_TRUST_PROXY: bool = False
+    RATE_LIMIT_PROXY_HOPS: int = 1  # trusted proxies appending to X-Forwarded-For
+    RATE_LIMIT_CHAT_PER_MINUTE: float = 20.0
+    RATE_LIMIT_CHAT_BURST: int = 5
+    RATE_LIMIT_DASHBOARD_PER_MINUTE: float = 600.0
+    RATE_LIMIT_DASHBOARD_BURST: int = 60
     
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000"
     
+    @property
+    def chat_enabled(self) -> bool:
+        """Whether this worker serves chat (and loads the agent)"""
+        return self.APP_MODE.lower() != "dashboard"
+    
+    @property
+    def replica_urls_list(self) -> List[str]:
+        """Convert comma-separated replica URLs to list"""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    
+    @property
+    def agent_database_url(self) -> str:
+        """Server the agent's SQL runs on"""
+        replicas = self.replica_urls_list
+        return self.AGENT_DATABASE_URL or (replicas[0] if replicas else self.DATABASE_URL)
+    
     @property
     def allowed_origins_list(self) -> List[str]:
         """Convert comma-separated origins to list"""
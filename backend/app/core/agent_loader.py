@@ -0,0 +1,37 @@
+"""
+Lazy access to the LangChain SQL agent
+Importing app.core.langchain_agent pulls in langchain, langgraph, the LLM
+client and SQLAlchemy; dashboard-only workers (APP_MODE=dashboard) never
+load it, full workers load it on first use (or at startup)
+"""
+import sys
+import threading
+from app.config import settings
+
+_lock = threading.Lock()
+
+
+def get_agent():
+    """
+    The shared LangChainAgent, importing the chat stack on first call
+
+    Raises:
+        RuntimeError: if chat is disabled in this worker (APP_MODE=dashboard)
+    """
+    if not settings.chat_enabled:
+        raise RuntimeError("Chat is disabled in this worker (APP_MODE=dashboard)")
+    with _lock:
+        from app.core.langchain_agent import langchain_agent
+    return langchain_agent
+
+
+def agent_loaded() -> bool:
+    """Whether the chat stack has been imported in this process"""
+    return "app.core.langchain_agent" in sys.modules
+
+
+def agent_ready() -> bool:
+    """Agent is loaded and initialized (never triggers the import)"""
+    if not agent_loaded():
+        return False
+    return getattr(sys.modules["app.core.langchain_agent"].langchain_agent, "agent", None) is not None
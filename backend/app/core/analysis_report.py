@@ -0,0 +1,243 @@
+"""
+Precomputed "overall problems" analysis
+Runs the three-step framework (national stats, 2σ outlier districts,
+state clustering) once per data version in a background thread and keeps
+the structured result plus a narrative per supported language
+"""
+import re
+import threading
+import time
+from typing import Dict, Optional
+from app.config import settings
+from app.core.database import db
+from app.core.data_version import data_version
+from app.core.language import SUPPORTED_LANGUAGES
+from app.core.queries import CRISIS_OUTLIERS_QUERY, NATIONAL_STATS_QUERY, STATE_CRISIS_COUNTS_QUERY
+from app.core.telemetry import span
+
+# Districts listed in narratives / agent context
+TOP_DISTRICTS = 5
+
+# Questions the report answers directly (country-wide problems, no specific place)
+_OVERALL = re.compile(
+    r'\b(problems?|issues?|concerns?|what is wrong|what\'s wrong)\b|समस्या|సమస్య',
+    re.IGNORECASE
+)
+# Anything narrower than the whole country (a district, an age group, a
+# period, demographic updates, ...) goes to the agent instead
+_SPECIFIC = re.compile(
+    r'\b(districts?|pin ?codes?|age|aged|age groups?|child|children|kids?|adults?|'
+    r'gender|male|female|men|women|demographic|months?|years?|(?:19|20)\d{2})\b|जिल|జిల్లా',
+    re.IGNORECASE
+)
+
+NARRATIVES = {
+    "en": (
+        "Based on statistical analysis:\n"
+        "- National average: {mean:.2f}x ratio\n"
+        "- Standard deviation: {stddev:.2f}\n"
+        "- Crisis threshold (2σ): {threshold:.2f}x\n"
+        "- Found {crisis} crisis districts (Z-score > 2), {extreme} extreme (Z-score > 3)\n"
+        "- Top crisis: {top}\n"
+        "- State patterns: {states}\n\n"
+        "Problems identified:\n"
+        "1. {crisis} of {districts} districts have biometric update ratios more than 2σ above the national mean.\n"
+        "2. {top_states_share:.0f}% of crisis districts are concentrated in {top_states}.\n"
+        "3. The most severe case, {worst}, is at {worst_ratio:.2f}x, {worst_multiple:.1f} times the national average."
+    ),
+    "hi": (
+        "सांख्यिकीय विश्लेषण के आधार पर:\n"
+        "- राष्ट्रीय औसत: {mean:.2f}x अनुपात\n"
+        "- मानक विचलन: {stddev:.2f}\n"
+        "- संकट सीमा (2σ): {threshold:.2f}x\n"
+        "- {crisis} संकट जिले पाए गए (Z-स्कोर > 2), {extreme} अत्यधिक संकट (Z-स्कोर > 3)\n"
+        "- शीर्ष संकट: {top}\n"
+        "- राज्य पैटर्न: {states}\n\n"
+        "समस्याएं पहचानी गईं:\n"
+        "1. {districts} में से {crisis} जिलों का बायोमेट्रिक अपडेट अनुपात राष्ट्रीय औसत से 2σ से अधिक है।\n"
+        "2. {top_states_share:.0f}% संकट जिले {top_states} में केंद्रित हैं।\n"
+        "3. सबसे गंभीर मामला {worst} है, अनुपात {worst_ratio:.2f}x, जो राष्ट्रीय औसत का {worst_multiple:.1f} गुना है।"
+    ),
+    "te": (
+        "గణాంక విశ్లేషణ ఆధారంగా:\n"
+        "- జాతీయ సగటు: {mean:.2f}x నిష్పత్తి\n"
+        "- ప్రామాణిక విచలనం: {stddev:.2f}\n"
+        "- సంక్షోభ పరిమితి (2σ): {threshold:.2f}x\n"
+        "- {crisis} సంక్షోభ జిల్లాలు కనుగొనబడ్డాయి (Z-స్కోర్ > 2), {extreme} తీవ్ర సంక్షోభం (Z-స్కోర్ > 3)\n"
+        "- అగ్ర సంక్షోభ: {top}\n"
+        "- రాష్ట్ర నమూనాలు: {states}\n\n"
+        "గుర్తించబడిన సమస్యలు:\n"
+        "1. {districts} జిల్లాల్లో {crisis} జిల్లాల బయోమెట్రిక్ అప్‌డేట్ నిష్పత్తి జాతీయ సగటు కంటే 2σ పైగా ఉంది.\n"
+        "2. {top_states_share:.0f}% సంక్షోభ జిల్లాలు {top_states}లో కేంద్రీకృతమై ఉన్నాయి.\n"
+        "3. అత్యంత తీవ్రమైన కేసు {worst}, నిష్పత్తి {worst_ratio:.2f}x, జాతీయ సగటుకు {worst_multiple:.1f} రెట్లు."
+    ),
+}
+
+
+def _float(value) -> float:
+    return float(value) if value is not None else 0.0
+
+
+class AnalysisReport:
+    """Structured result of the framework for one data version"""
+
+    def __init__(self, version: str, national: dict, crisis_districts: list, states: list):
+        self.version = version
+        self.generated_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.national = national
+        self.crisis_districts = crisis_districts
+        self.states = states
+        self.extreme_count = sum(1 for row in crisis_districts if row["z_score"] > 3)
+        self.narratives: Dict[str, str] = {
+            language: self._render(language) for language in SUPPORTED_LANGUAGES
+        }
+
+    def _render(self, language: str) -> str:
+        national = self.national
+        top = self.crisis_districts[:TOP_DISTRICTS]
+        top_states = self.states[:3]
+        crisis = len(self.crisis_districts)
+        worst = top[0] if top else {"district": "-", "state": "-", "bio_ratio": 0.0}
+        return NARRATIVES[language].format(
+            mean=national["mean_ratio"],
+            stddev=national["stddev_ratio"],
+            threshold=national["threshold_2sigma"],
+            districts=national["districts"],
+            crisis=crisis,
+            extreme=self.extreme_count,
+            top=", ".join(f"{row['district']}, {row['state']} (Z {row['z_score']:.2f})" for row in top) or "-",
+            states=", ".join(f"{row['state']} ({row['crisis_count']})" for row in top_states) or "-",
+            top_states=", ".join(row["state"] for row in top_states) or "-",
+            top_states_share=100.0 * sum(row["crisis_count"] for row in top_states) / crisis if crisis else 0.0,
+            worst=f"{worst['district']}, {worst['state']}",
+            worst_ratio=worst["bio_ratio"],
+            worst_multiple=worst["bio_ratio"] / national["mean_ratio"] if national["mean_ratio"] else 0.0,
+        )
+
+    def context_text(self) -> str:
+        """Compact summary handed to the agent instead of re-running the framework"""
+        national = self.national
+        top = "; ".join(
+            f"{row['district']}, {row['state']} ratio {row['bio_ratio']:.2f} Z {row['z_score']:.2f}"
+            for row in self.crisis_districts[:TOP_DISTRICTS]
+        )
+        states = ", ".join(f"{row['state']} {row['crisis_count']}" for row in self.states)
+        return (
+            f"PRECOMPUTED ANALYSIS (data version {self.version}; use it, do not recompute steps 1-3):\n"
+            f"National: mean {national['mean_ratio']:.2f}x, stddev {national['stddev_ratio']:.2f}, "
+            f"2σ {national['threshold_2sigma']:.2f}x, 3σ {national['threshold_3sigma']:.2f}x, "
+            f"{national['districts']} districts with > 1000 enrollments\n"
+            f"Crisis districts (Z > 2): {len(self.crisis_districts)}, extreme (Z > 3): {self.extreme_count}\n"
+            f"Top: {top}\n"
+            f"Crisis districts per state: {states}"
+        )
+
+    def to_dict(self, language: str = None) -> dict:
+        result = {
+            "version": self.version,
+            "generated_at": self.generated_at,
+            "national": self.national,
+            "crisis_count": len(self.crisis_districts),
+            "extreme_count": self.extreme_count,
+            "crisis_districts": self.crisis_districts,
+            "states": self.states,
+        }
+        if language:
+            result["narrative"] = self.narratives.get(language, self.narratives["en"])
+        return result
+
+
+def compute_report(version: str) -> AnalysisReport:
+    """Run the three framework steps against district_summary"""
+    # Read from a replica only once it has replayed this version's load
+    min_lsn = data_version.read_lsn(version)
+    with span("analysis.compute", version=version):
+        stats = db.execute_query(NATIONAL_STATS_QUERY, name="analysis_national", min_lsn=min_lsn)[0]
+        outliers = db.execute_query(CRISIS_OUTLIERS_QUERY, name="analysis_outliers", min_lsn=min_lsn)
+        states = db.execute_query(STATE_CRISIS_COUNTS_QUERY, name="analysis_states", min_lsn=min_lsn)
+
+    national = {
+        "districts": int(stats["districts"] or 0),
+        "mean_ratio": _float(stats["mean_ratio"]),
+        "stddev_ratio": _float(stats["stddev_ratio"]),
+        "threshold_2sigma": _float(stats["threshold_2sigma"]),
+        "threshold_3sigma": _float(stats["threshold_3sigma"]),
+    }
+    crisis_districts = [
+        {"state": row["state"], "district": row["district"],
+         "bio_ratio": _float(row["bio_ratio"]), "z_score": _float(row["z_score"])}
+        for row in outliers
+    ]
+    state_rows = [
+        {"state": row["state"], "crisis_count": int(row["crisis_count"]), "avg_ratio": _float(row["avg_ratio"])}
+        for row in states
+    ]
+    return AnalysisReport(version, national, crisis_districts, state_rows)
+
+
+class AnalysisReportService:
+    """Keeps the report for the current data version, recomputed in the background"""
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or settings.DATA_VERSION_CHECK_SECONDS
+        self._report: Optional[AnalysisReport] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self) -> Optional[AnalysisReport]:
+        """Latest report (None until the first run finishes)"""
+        return self._report
+
+    def refresh(self, force: bool = False) -> Optional[AnalysisReport]:
+        """Recompute if the data version moved past the stored report"""
+        version = data_version.current()
+        if version is None:
+            return self._report
+        with self._refresh_lock:
+            report = self._report
+            if force or report is None or report.version != version:
+                try:
+                    started = time.perf_counter()
+                    report = compute_report(version)
+                    self._report = report
+                    print(f"✓ Analysis report ready for data version {version} "
+                          f"({(time.perf_counter() - started) * 1000:.0f}ms, "
+                          f"{len(report.crisis_districts)} crisis districts)")
+                except Exception as e:
+                    print(f"✗ Analysis report failed: {e}")
+        return self._report
+
+    def start(self):
+        """Compute the first report and keep it current in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="analysis-report", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        self.refresh()
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+
+def is_overall_question(question: str, places) -> bool:
+    """
+    Country-wide problems question with no other entity or filter
+
+    Args:
+        question: User's question
+        places: Known states/districts named in the question
+    """
+    if not _OVERALL.search(question) or places:
+        return False
+    return _SPECIFIC.search(question) is None
+
+
+# Create report service instance
+analysis_reports = AnalysisReportService()
@@ -0,0 +1,489 @@
+"""
+Shared result cache
+Dashboard responses, chart query results and chat answers behind one
+pluggable backend (in-process LRU, SQLite file, or any Redis-protocol
+server). Keys carry the data version, so a data load invalidates every
+worker's entries at once (after the prewarmer has filled the new ones).
+"""
+import hashlib
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
+from urllib.parse import urlparse
+import orjson
+from app.config import settings
+from app.core.data_version import data_version
+from app.core.database import db
+from app.core.query_log import note_cache
+from app.core.serialization import dumps
+from app.core.telemetry import registry
+
+CACHE_REQUESTS = registry.counter(
+    "uidai_cache_requests_total", "Result cache lookups by namespace and outcome",
+    ("namespace", "result")
+)
+
+# Shared key holding the data version every worker serves from
+VERSION_KEY = "uidai:data_version"
+
+# Version that reads and writes in this context use instead (prewarming)
+_pinned_version: ContextVar[Optional[str]] = ContextVar("uidai_pinned_version", default=None)
+
+
+class MemoryCache:
+    """In-process LRU with per-entry TTL (one worker)"""
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set only if the key is absent or expired; True if it was set"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.time():
+                return False
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """
+    Cache in a SQLite file shared by every worker process on a host
+
+    WAL mode lets readers run alongside the single writer; expired rows
+    are purged on a fraction of writes.
+    """
+
+    # Purge expired rows on roughly one write in this many
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.CACHE_SQLITE_PATH
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set only if the key is absent or expired (atomic across processes); True if it was set"""
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+            "WHERE cache.expires < ?",
+            (key, value, now + ttl, now)
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache")
+
+
+class RESPError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RedisCache:
+    """
+    Minimal Redis-protocol (RESP2) client: GET, SET EX [NX], DEL, SCAN
+
+    The database may be shared with other applications, so clear() only
+    deletes this app's "uidai:" keys.
+
+    Talks to Redis, Valkey, KeyDB or the local stand-in
+    (python -m app.core.resp_server). One socket per thread.
+    """
+
+    def __init__(self, url: str = None, timeout: float = 2.0):
+        parsed = urlparse(url or settings.CACHE_URL)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.password:
+                self._command("AUTH", self.password)
+            if self.db:
+                self._command("SELECT", str(self.db))
+        return conn
+
+    def _command(self, *args):
+        sock, reader = self._connection()
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        try:
+            sock.sendall(b"".join(parts))
+            return self._read(reader)
+        except (OSError, EOFError):
+            # Drop the broken socket; the next call reconnects
+            self._local.conn = None
+            sock.close()
+            raise
+
+    def _read(self, reader):
+        line = reader.readline()
+        if not line:
+            raise EOFError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RESPError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [self._read(reader) for _ in range(count)]
+        raise RESPError(f"Unexpected reply: {line!r}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._command("SET", key, value, "EX", max(1, int(ttl)))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """SET NX: True if the key was absent and is now set"""
+        return self._command("SET", key, value, "EX", max(1, int(ttl)), "NX") is not None
+
+    def delete(self, key: str):
+        self._command("DEL", key)
+
+    def clear(self):
+        """Delete every "uidai:" key (SCAN + DEL; never FLUSHDB)"""
+        cursor = b"0"
+        while True:
+            cursor, keys = self._command("SCAN", cursor, "MATCH", "uidai:*", "COUNT", 500)
+            if keys:
+                self._command("DEL", *keys)
+            if cursor == b"0":
+                break
+
+
+def create_backend(name: str = None):
+    """Build the cache backend selected by settings.CACHE_BACKEND"""
+    name = (name or settings.CACHE_BACKEND).lower()
+    if name == "memory":
+        return MemoryCache()
+    if name == "sqlite":
+        return SQLiteCache()
+    if name == "redis":
+        return RedisCache()
+    raise ValueError(f"Unknown CACHE_BACKEND '{name}' (expected 'memory', 'sqlite' or 'redis')")
+
+
+class ResultCache:
+    """
+    JSON-serialized results keyed by namespace, data version and key
+
+    Workers compute the same data version from the same table counters.
+    The version requests are served from is switched by publishing it
+    under VERSION_KEY; the other workers adopt it (re-checking the
+    database) as soon as they read the new value, so every worker moves
+    to fresh keys within VERSION_SYNC_SECONDS. With defer_switch set (the
+    prewarmer is running) a data load only switches once the prewarmer
+    has filled the new version's entries; until then requests keep being
+    served from the previous version's entries, but misses are not stored
+    (they already read the new load). Entries of old versions are never
+    read again and expire by TTL or eviction.
+    """
+
+    # How often a worker reads the shared version key
+    VERSION_SYNC_SECONDS = 1.0
+
+    def __init__(self, backend=None, ttl: float = None):
+        self._backend = backend
+        self.ttl = ttl or settings.CACHE_TTL_SECONDS
+        self._version: Optional[str] = None
+        self._synced = 0.0
+        self._lock = threading.Lock()
+        self.defer_switch = False
+        # Newer version waiting for the prewarmer (None when serving the latest)
+        self._pending_version: Optional[str] = None
+        data_version.subscribe(self._on_version)
+
+    @property
+    def backend(self):
+        """Backend, created on first use"""
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_backend()
+        return self._backend
+
+    def _on_version(self, version: str, previous: Optional[str]):
+        # The first version is served right away; later ones wait for the prewarmer
+        if previous is None or not self.defer_switch:
+            self.switch(version)
+        else:
+            self._pending_version = version
+
+    def switch(self, version: str):
+        """Serve `version` from now on, in this worker and (via VERSION_KEY) all others"""
+        try:
+            self.backend.set(VERSION_KEY, version.encode(), 7 * 86400)
+        except Exception as e:
+            print(f"✗ Cache version publish failed: {e}")
+        self._version, self._synced = version, time.monotonic()
+        if version == self._pending_version:
+            self._pending_version = None
+
+    def claim(self, name: str, version: str, ttl: float) -> bool:
+        """
+        Claim a once-per-version task for this worker (SET NX on a shared key)
+
+        Returns:
+            bool: True if no other worker claimed `name` for `version` within
+                ttl seconds (also True when the backend is unavailable)
+        """
+        try:
+            return self.backend.add(f"uidai:claim:{name}:{version}", b"1", ttl)
+        except Exception as e:
+            print(f"✗ Cache claim failed: {e}")
+            return True
+
+    @contextmanager
+    def pinned(self, version: str):
+        """Read and write `version`'s entries in this context (prewarming a version not served yet)"""
+        token = _pinned_version.set(version)
+        try:
+            yield
+        finally:
+            _pinned_version.reset(token)
+
+    def version(self) -> Optional[str]:
+        """Data version requests are served from, converging with other workers via the shared key"""
+        pinned = _pinned_version.get()
+        if pinned is not None:
+            return pinned
+        # Also keeps change detection ticking (listeners fire from here)
+        local = data_version.current()
+        if self._version is not None and time.monotonic() - self._synced < self.VERSION_SYNC_SECONDS:
+            return self._version
+        try:
+            shared = self.backend.get(VERSION_KEY)
+        except Exception:
+            shared = None
+        serving = self._version or local
+        if shared is not None:
+            serving = shared.decode()
+            if serving != local and serving != self._version:
+                # Another worker switched to a load we have not seen; re-check the counters now
+                data_version.refresh()
+        self._version, self._synced = serving, time.monotonic()
+        return serving
+
+    def _key(self, namespace: str, key: str, version: str) -> str:
+        if len(key) > 120:
+            key = hashlib.sha1(key.encode()).hexdigest()
+        return f"uidai:{namespace}:{version}:{key}"
+
+    def get(self, namespace: str, key: str, version: str = None) -> Any:
+        """Cached value for `version` (default: the serving data version), or None"""
+        if not settings.CACHE_ENABLED:
+            return None
+        version = version or self.version()
+        if version is None:
+            return None
+        try:
+            cached = self.backend.get(self._key(namespace, key, version))
+        except Exception as e:
+            print(f"✗ Cache read failed: {e}")
+            cached = None
+        CACHE_REQUESTS.inc(namespace=namespace, result="miss" if cached is None else "hit")
+        note_cache(namespace, cached is not None)
+        return None if cached is None else orjson.loads(cached)
+
+    def has(self, namespace: str, key: str, version: str = None) -> bool:
+        """Whether an entry exists for `version` (not counted as a lookup)"""
+        version = version or self.version()
+        if not settings.CACHE_ENABLED or version is None:
+            return False
+        try:
+            return self.backend.get(self._key(namespace, key, version)) is not None
+        except Exception:
+            return False
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float = None, version: str = None):
+        """Store a JSON-serializable value under `version` (default: the serving data version)"""
+        if not settings.CACHE_ENABLED:
+            return
+        version = version or self.version()
+        if version is None:
+            return
+        pending = self._pending_version
+        if self.defer_switch and pending is not None and version != pending:
+            # A newer load is being warmed: this result may already include
+            # its rows, so it must not be stored under an older version
+            return
+        try:
+            self.backend.set(self._key(namespace, key, version), dumps(value), ttl or self.ttl)
+        except Exception as e:
+            print(f"✗ Cache write failed: {e}")
+
+    def get_or_compute(self, namespace: str, key: str, compute: Callable[[], Any],
+                       ttl: float = None, version: str = None) -> Any:
+        """
+        Cached result of compute() for the current data version
+
+        Results pass through JSON (Decimals become numbers). Backend errors
+        fall back to computing directly; empty results are not cached.
+        The version is read once, so the lookup and the write use the same
+        key; if a data load switches versions while compute() runs, the
+        result may mix both loads and is not cached.
+        """
+        version = version or self.version()
+        cached = self.get(namespace, key, version)
+        if cached is not None:
+            return cached
+        value = compute()
+        if value and self.version() == version:
+            self.set(namespace, key, value, ttl, version)
+        return value
+
+    def clear(self):
+        """Drop every cached result (the published serving version is kept)"""
+        serving = self.backend.get(VERSION_KEY)
+        self.backend.clear()
+        if serving is not None:
+            self.backend.set(VERSION_KEY, serving, 7 * 86400)
+
+
+class QueryRecipes:
+    """Most requested cached_query() calls, so the prewarmer can replay them on new data"""
+
+    def __init__(self, max_recipes: int = 512):
+        self.max_recipes = max_recipes
+        self._recipes: "OrderedDict[str, list]" = OrderedDict()  # key -> [count, query, params, name, ttl]
+        self._lock = threading.Lock()
+
+    def record(self, key: str, query: str, params, name: str, ttl: Optional[float]):
+        with self._lock:
+            recipe = self._recipes.pop(key, None) or [0, query, params, name, ttl]
+            recipe[0] += 1
+            self._recipes[key] = recipe
+            if len(self._recipes) > self.max_recipes:
+                self._recipes.popitem(last=False)
+
+    def hottest(self, limit: int) -> List[tuple]:
+        """(key, query, params, name, ttl) of the most requested calls"""
+        with self._lock:
+            items = sorted(self._recipes.items(), key=lambda item: -item[1][0])[:limit]
+        return [(key, *recipe[1:]) for key, recipe in items]
+
+
+# Create cache instances
+result_cache = ResultCache()
+query_recipes = QueryRecipes()
+
+
+def _query_key(params, name: str) -> str:
+    return f"{name}:{dumps(params).decode()}" if params else name
+
+
+def cached_query(query: str, params=None, name: str = "query", ttl: float = None) -> list:
+    """db.execute_query() through the shared cache (keyed by query name and params)"""
+    key = _query_key(params, name)
+    query_recipes.record(key, query, params, name, ttl)
+    # Rows stored under a version must come from a server that has replayed it
+    version = result_cache.version()
+    return result_cache.get_or_compute(
+        "query", key,
+        lambda: db.execute_query(query, params, name=name, min_lsn=data_version.read_lsn(version)),
+        ttl, version
+    )
+
+
+def rewarm_query(key: str, query: str, params, name: str, ttl: float = None) -> bool:
+    """Compute a recorded query for the current (pinned) version; False if it was already cached"""
+    version = result_cache.version()
+    if result_cache.has("query", key, version):
+        return False
+    value = db.execute_query(query, params, name=name, min_lsn=data_version.read_lsn(version))
+    if value:
+        result_cache.set("query", key, value, ttl, version)
+    return True
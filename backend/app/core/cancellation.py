@@ -0,0 +1,187 @@
+"""
+Deadlines and cancellation for chat requests
+A CancelScope travels with the request (context variable) into the agent
+thread; LLM steps check it and running SQL registers a cancel hook on it
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+from app.core.telemetry import registry
+
+CANCELLED_WORK = registry.counter(
+    "uidai_cancelled_work_total",
+    "Work stopped early by a client disconnect or deadline (request, llm, tool, sql)",
+    ("stage", "reason")
+)
+CANCELLED_ELAPSED = registry.histogram(
+    "uidai_cancelled_request_seconds", "How long cancelled requests had been running",
+    ("reason",)
+)
+
+
+class RunCancelled(Exception):
+    """Raised inside the agent thread once its scope is cancelled"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Request cancelled ({reason})")
+        self.reason = reason
+
+
+class CancelScope:
+    """
+    Cancellation state of one request
+
+    Cancelled explicitly (client disconnect, job cancel) or by a timer when
+    the deadline passes. Hooks registered with on_cancel() run once, in the
+    cancelling thread.
+    """
+
+    def __init__(self, timeout: float = None):
+        self.started = time.monotonic()
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._hooks: List[Callable[[], None]] = []
+        self._timer = None
+        if timeout:
+            self.set_deadline(timeout)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def set_deadline(self, timeout: float):
+        """Cancel with reason 'deadline' after `timeout` seconds"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(timeout, self.cancel, ("deadline",))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def cancel(self, reason: str = "cancelled"):
+        """Cancel the scope and run the registered hooks"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            hooks, self._hooks = self._hooks, []
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"✗ Cancel hook failed: {e}")
+
+    def close(self):
+        """Stop the deadline timer (the request finished)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def check(self, stage: str = None):
+        """Raise RunCancelled if cancelled (counting the skipped stage)"""
+        if self._event.is_set():
+            if stage:
+                CANCELLED_WORK.inc(stage=stage, reason=self.reason)
+            raise RunCancelled(self.reason)
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep up to `seconds`; returns True if cancelled meanwhile"""
+        return self._event.wait(seconds)
+
+    @contextmanager
+    def on_cancel(self, hook: Callable[[], None]):
+        """Run `hook` if the scope is cancelled while the block runs"""
+        with self._lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._hooks.append(hook)
+        if cancelled:
+            hook()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if hook in self._hooks:
+                    self._hooks.remove(hook)
+
+
+_current_scope: ContextVar[Optional[CancelScope]] = ContextVar("uidai_cancel_scope", default=None)
+
+
+def current_scope() -> Optional[CancelScope]:
+    return _current_scope.get()
+
+
+@contextmanager
+def cancel_scope(scope: CancelScope):
+    """Make `scope` current for the block (and threads started with its context)"""
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def check_cancelled(stage: str = None):
+    """Raise RunCancelled if the current request was cancelled"""
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.check(stage)
+
+
+def sleep(seconds: float):
+    """time.sleep that wakes up (and raises) when the current request is cancelled"""
+    scope = _current_scope.get()
+    if scope is None:
+        time.sleep(seconds)
+    elif scope.wait(seconds):
+        scope.check("llm")
+
+
+@contextmanager
+def cancel_statement(connection, stage: str = "sql"):
+    """
+    Send a PostgreSQL cancel request for `connection` if the current
+    request is cancelled while the block runs
+
+    Uses the libpq cancel request (psycopg2 connection.cancel()), which has
+    the same effect as pg_cancel_backend(pid) without needing a second
+    pooled connection. The driver's "canceling statement" error is turned
+    into RunCancelled.
+
+    The hook only cancels while the statement is running: leaving the
+    block clears that flag under the hook's lock, waiting for a cancel
+    already in progress, so a late hook can never hit the connection after
+    it has gone back to the pool and serves another request.
+    """
+    scope = _current_scope.get()
+    cancel = getattr(connection, "cancel", None)
+    if scope is None or cancel is None:
+        yield
+        return
+
+    statement_lock = threading.Lock()
+    running = True
+
+    def hook():
+        with statement_lock:
+            if not running:
+                return
+            CANCELLED_WORK.inc(stage=stage, reason=scope.reason)
+            cancel()
+
+    scope.check(stage)
+    try:
+        with scope.on_cancel(hook):
+            yield
+    except Exception:
+        if scope.cancelled:
+            raise RunCancelled(scope.reason)
+        raise
+    finally:
+        with statement_lock:
+            running = False
+    scope.check()
@@ -1,158 +1,485 @@
 """
 Enhanced Chart Data Generator
 Generates chart configurations for frontend rendering
+
+Accepts either rows (list of dicts, as returned by RealDictCursor) or
+columnar input (dict of column name -> sequence, e.g. from
+Database.execute_columns) and builds every dataset in one vectorized pass.
+
+Large inputs are reduced server-side so the payload stays bounded:
+top-K + "Others" for categories, LTTB/min-max for series and histogram
+bins for distributions.
 """
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+import numpy as np
+
+
+def _keyword_matcher(keywords: list):
+    """Compile a keyword list into one substring search"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords)).search
+
+
+# Keywords for different chart types (precompiled once)
+_COMPARISON = _keyword_matcher(['compare', 'vs', 'versus', 'difference', 'contrast'])
+_RANKING = _keyword_matcher(['top', 'bottom', 'best', 'worst', 'highest', 'lowest', 'ranking'])
+_DISTRIBUTION = _keyword_matcher(['distribution', 'breakdown', 'share', 'percentage', 'proportion'])
+_TREND = _keyword_matcher(['trend', 'over time', 'timeline', 'history', 'change'])
+_HISTOGRAM = _keyword_matcher(['distribution', 'histogram', 'spread'])
+# Ranking words that ask for the smallest values (a low ratio is good here)
+_ASCENDING = _keyword_matcher(['lowest', 'bottom', 'least', 'fewest', 'smallest', 'best', 'good', 'performing well'])
+
+# Column names aggregated with mean (not sum) in the "Others" bucket
+_AVERAGE_COLUMN = re.compile(r'ratio|avg|average|mean|score|rate|pct|percent').search
+
+# Keywords that always / never ask for a chart
+_CHART = _keyword_matcher([
+    'compare', 'show', 'top', 'bottom', 'ranking', 'list',
+    'distribution', 'breakdown', 'vs', 'versus', 'trend'
+])
+_NO_CHART = _keyword_matcher([
+    'how many', 'count', 'total', 'sum', 'average',
+    'explain', 'why', 'what is', 'define'
+])
+
+_LABEL_COLUMNS = {'state', 'district', 'name', 'label', 'category'}
+_MEASURE_COLUMNS = {'z_score', 'bio_ratio', 'count', 'total', 'avg', 'enrollments', 'updates', 'ratio'}
+_NUMERIC_TYPES = (int, float, Decimal, np.number)
+
+# Payload bounds for large results
+MAX_CATEGORIES = 20
+MAX_SERIES_POINTS = 200
+HISTOGRAM_BINS = 20
+
+_TITLE_REMOVE_WORDS = ['what', 'show', 'me', 'the', 'please', 'can you', 'could you', '?']
 
-def determine_chart_type(question: str, data: list, column_count: int) -> str:
+COLORS = [
+    'rgba(59, 130, 246, 0.8)',   # Blue
+    'rgba(239, 68, 68, 0.8)',     # Red
+    'rgba(16, 185, 129, 0.8)',    # Green
+    'rgba(251, 191, 36, 0.8)',    # Yellow
+    'rgba(139, 92, 246, 0.8)',    # Purple
+    'rgba(236, 72, 153, 0.8)',    # Pink
+]
+
+
+@lru_cache(maxsize=512)
+def _question_intent(question: str) -> str:
+    """Classify a question by chart keywords (cached per question)"""
+    question_lower = question.lower()
+    if _COMPARISON(question_lower):
+        return 'comparison'
+    if _RANKING(question_lower):
+        return 'ranking'
+    if _DISTRIBUTION(question_lower):
+        return 'distribution'
+    if _TREND(question_lower):
+        return 'trend'
+    return ''
+
+
+def row_count(data) -> int:
+    """Number of rows in row-oriented or columnar input"""
+    if isinstance(data, dict):
+        return len(next(iter(data.values()))) if data else 0
+    return len(data) if data else 0
+
+
+def to_columns(query_result) -> dict:
+    """
+    Convert query results to columnar form
+
+    Args:
+        query_result: List of dicts, or a dict of column name -> sequence
+
+    Returns:
+        dict: Column name -> sequence (insertion order = column order),
+              or None if the input has no named columns
+    """
+    if isinstance(query_result, dict):
+        return query_result
+
+    first_row = query_result[0]
+    if not isinstance(first_row, dict):
+        # Can't easily determine column names from tuples
+        return None
+
+    columns = list(first_row.keys())
+    if len(columns) == 1:
+        return {columns[0]: [row[columns[0]] for row in query_result]}
+
+    # One pass over the rows, transposed in C by zip
+    values = zip(*map(itemgetter(*columns), query_result))
+    return dict(zip(columns, values))
+
+
+def determine_chart_type(question: str, data, column_count: int,
+                         max_categories: int = MAX_CATEGORIES) -> str:
     """
     Intelligently determine the best chart type based on question and data
+
+    Results above max_categories rows still get a chart (reduced later in
+    format_for_chart); 'histogram' is returned for large distributions.
     """
-    question_lower = question.lower()
-    
-    # Keywords for different chart types
-    comparison_keywords = ['compare', 'vs', 'versus', 'difference', 'contrast']
-    ranking_keywords = ['top', 'bottom', 'best', 'worst', 'highest', 'lowest', 'ranking']
-    distribution_keywords = ['distribution', 'breakdown', 'share', 'percentage', 'proportion']
-    trend_keywords = ['trend', 'over time', 'timeline', 'history', 'change']
-    
+    count = row_count(data)
+
     # Determine based on keywords
-    if any(keyword in question_lower for keyword in comparison_keywords):
+    intent = _question_intent(question)
+    if intent == 'comparison':
         return 'bar'  # Comparison chart
-    elif any(keyword in question_lower for keyword in ranking_keywords):
+    elif intent == 'ranking':
         return 'horizontalBar'  # Ranking chart
-    elif any(keyword in question_lower for keyword in distribution_keywords):
-        return 'pie' if len(data) <= 10 else 'doughnut'
-    elif any(keyword in question_lower for keyword in trend_keywords):
+    elif intent == 'distribution':
+        if count > max_categories and _HISTOGRAM(question.lower()):
+            return 'histogram'
+        return 'pie' if count <= 10 else 'doughnut'
+    elif intent == 'trend':
         return 'line'
-    
+
     # Determine based on data structure
     if column_count == 2:
         # Two columns: likely label + value
-        if len(data) <= 5:
+        if count <= 5:
             return 'bar'
-        elif len(data) <= 10:
-            return 'horizontalBar'
         else:
-            return 'table'  # Too many for chart
+            return 'horizontalBar'  # Top-K ranking when large
     elif column_count >= 3:
         # Multiple values per item
-        if len(data) <= 10:
+        if count <= 10:
             return 'bar'  # Grouped bar chart
         else:
-            return 'table'
-    
+            return 'horizontalBar'
+
     # Default
     return 'table'
 
 
-def format_for_chart(question: str, query_result: list) -> dict:
+def pick_columns(columns: dict) -> tuple:
+    """Identify the label column and the numeric value columns"""
+    label_column = None
+    value_columns = []
+
+    for col, values in columns.items():
+        first = values[0]
+        col_lower = col.lower()
+        if col_lower in _LABEL_COLUMNS:
+            label_column = col
+        elif col_lower not in _MEASURE_COLUMNS:
+            # If no explicit label column found, use first text column
+            if label_column is None and isinstance(first, str):
+                label_column = col
+
+        # Value columns (numeric)
+        if isinstance(first, _NUMERIC_TYPES) and col != label_column:
+            value_columns.append(col)
+
+    # If no label column identified, use first column
+    if label_column is None:
+        label_column = next(iter(columns))
+
+    # If no value columns, use all non-label columns
+    if not value_columns:
+        value_columns = [col for col in columns if col != label_column]
+
+    return label_column, value_columns
+
+
+def _format_labels(values) -> list:
+    """Stringify labels, truncating long ones"""
+    return [label if len(label) <= 30 else label[:27] + '...' for label in map(str, values)]
+
+
+def _format_values(values) -> list:
+    """
+    Vectorized dataset values: None -> 0, floats rounded to 2 places,
+    columns holding only integers (and None) kept as ints
+    """
+    raw = np.asarray(values)
+    if np.issubdtype(raw.dtype, np.integer):
+        return raw.tolist()
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Non-numeric column: pass values through (None -> 0)
+        return [0 if value is None else value for value in values]
+
+    missing = np.isnan(array)
+    if missing.any():
+        array[missing] = 0.0
+    if raw.dtype == object and all(
+        value is None or (isinstance(value, (int, np.integer)) and not isinstance(value, bool))
+        for value in values
+    ):
+        # Integers mixed with None (NULLs) only
+        return array.astype(np.int64).tolist()
+    return array.round(2).tolist()
+
+
+# ============================================
+# DOWNSAMPLING
+# ============================================
+
+def numeric_column(values):
+    """Column as a float array (None -> 0), or None if not numeric"""
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    missing = np.isnan(array)
+    if missing.any():
+        array[missing] = 0.0
+    return array
+
+
+def _is_temporal(value) -> bool:
+    return isinstance(value, (date, datetime))
+
+
+def _series_x(values) -> np.ndarray:
+    """X coordinates for a series: numbers, dates as ordinals, else positions"""
+    first = values[0]
+    if _is_temporal(first):
+        return np.fromiter((value.toordinal() for value in values), np.float64, len(values))
+    if isinstance(first, _NUMERIC_TYPES) and not isinstance(first, bool):
+        array = numeric_column(values)
+        if array is not None:
+            return array
+    return np.arange(len(values), dtype=np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Args:
+        x: X coordinates (ascending)
+        y: Y values
+        threshold: Number of points to keep (first and last always kept)
+
+    Returns:
+        np.ndarray: Indices of the selected points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        areas = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(areas.argmax())
+        indices[i + 1] = selected
+
+    return indices
+
+
+def min_max_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Min/max-per-bucket downsampling (keeps every spike)
+
+    Args:
+        y: Y values
+        threshold: Maximum number of points to keep
+
+    Returns:
+        np.ndarray: Sorted indices of the selected points
+    """
+    n = len(y)
+    buckets = (threshold - 2) // 2  # Endpoints are always kept
+    if threshold >= n or buckets < 1:
+        return np.arange(n)
+
+    # Pad to a whole number of buckets so argmin/argmax run in one shot
+    width = -(-n // buckets)
+    buckets = -(-n // width)
+    padded = np.full(buckets * width, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(buckets, width)
+    offsets = np.arange(buckets) * width
+    lows = offsets + np.nanargmin(grid, axis=1)
+    highs = offsets + np.nanargmax(grid, axis=1)
+    return np.unique(np.concatenate([lows, highs, [0, n - 1]]))
+
+
+def _take(values, indices) -> list:
+    return [values[i] for i in indices]
+
+
+def _downsample_series(columns: dict, label_column: str, value_columns: list,
+                       max_points: int, method: str) -> tuple:
+    """Reduce a long series to at most max_points points"""
+    labels = columns[label_column]
+    y = numeric_column(columns[value_columns[0]])
+    if y is None:
+        indices = np.linspace(0, len(labels) - 1, max_points).astype(np.int64)
+    elif method == 'minmax':
+        indices = min_max_indices(y, max_points)
+    else:
+        indices = lttb_indices(_series_x(labels), y, max_points)
+
+    reduced = {label_column: _take(labels, indices)}
+    for col in value_columns:
+        reduced[col] = _take(columns[col], indices)
+    note = f"{len(labels):,} points downsampled to {len(indices)} ({method})"
+    return reduced, note
+
+
+def rank_ascending(question: str, key) -> bool:
+    """
+    Whether a ranking asks for the smallest values
+
+    A result already sorted on its first value column keeps the query's
+    ORDER BY; otherwise the question decides ("lowest", "best", ...).
+    """
+    if key is not None and len(key) > 1:
+        steps = np.diff(key)
+        if (steps >= 0).all() and (steps > 0).any():
+            return True
+        if (steps <= 0).all():
+            return False
+    return _ASCENDING(question.lower()) is not None
+
+
+def _top_k_with_others(columns: dict, label_column: str, value_columns: list,
+                       max_categories: int, ascending: bool = False) -> tuple:
+    """
+    Keep the largest categories (smallest if ascending) and fold the rest
+    into one "Others" bucket
+    """
+    labels = columns[label_column]
+    arrays = {col: numeric_column(columns[col]) for col in value_columns}
+    key = arrays[value_columns[0]]
+    count = len(labels)
+
+    if key is None:
+        keep, rest = np.arange(max_categories - 1), np.arange(max_categories - 1, count)
+    else:
+        order = np.argsort(key if ascending else -key, kind='stable')
+        # Kept categories stay in their original (query) order
+        keep, rest = np.sort(order[:max_categories - 1]), order[max_categories - 1:]
+
+    reduced = {label_column: _take(labels, keep) + [f"Others ({len(rest)})"]}
+    for col in value_columns:
+        values, array = columns[col], arrays[col]
+        if array is None:
+            reduced[col] = _take(values, keep) + [None]
+            continue
+        average = _AVERAGE_COLUMN(col.lower()) is not None
+        other = array[rest].mean() if average else array[rest].sum()
+        if isinstance(values[0], (int, np.integer)) and not average:
+            other = int(other)
+        reduced[col] = _take(values, keep) + [other if isinstance(other, int) else float(other)]
+
+    note = f"{'Bottom' if ascending else 'Top'} {len(keep)} of {count:,} + others"
+    return reduced, note
+
+
+def _histogram(question: str, columns: dict, value_columns: list, bins: int) -> tuple:
+    """Bin one value column (the one the question names, else the first)"""
+    question_lower = question.lower()
+    col = next(
+        (col for col in value_columns if col.replace('_', ' ').lower() in question_lower),
+        value_columns[0]
+    )
+    values = numeric_column(columns[col])
+    if values is None:
+        return None, None
+
+    counts, edges = np.histogram(values, bins=bins)
+    labels = [f"{low:.4g}–{high:.4g}" for low, high in zip(edges[:-1], edges[1:])]
+    title = col.replace('_', ' ')
+    note = f"{len(values):,} values of {title} in {bins} bins"
+    return {'range': labels, 'count': counts.tolist()}, note
+
+
+def format_for_chart(question: str, query_result, max_categories: int = MAX_CATEGORIES,
+                     max_points: int = MAX_SERIES_POINTS, series_method: str = 'lttb',
+                     chart_type: str = None) -> dict:
     """
     Format SQL query results into Chart.js compatible format
-    
+
     Args:
         question: User's original question
-        query_result: List of tuples/dicts from SQL query
-        
+        query_result: List of dicts from SQL query, or columnar dict
+            (column name -> list/tuple/numpy array)
+        max_categories: Category limit before top-K + "Others" folding
+        max_points: Point limit for line series
+        series_method: 'lttb' (shape-preserving) or 'minmax' (keeps spikes)
+        chart_type: Force a chart type instead of inferring it from the question
+
     Returns:
         dict: Chart.js configuration or None if not suitable for charting
     """
-    if not query_result or len(query_result) == 0:
-        return None
-    
-    # Convert to list of dicts if needed
-    if isinstance(query_result[0], tuple):
-        # Can't easily determine column names from tuples
-        # Skip chart generation for now
+    if not row_count(query_result):
         return None
-    
-    # Get column names
-    first_row = query_result[0]
-    if not isinstance(first_row, dict):
+
+    columns = to_columns(query_result)
+    if columns is None:
         return None
-    
-    columns = list(first_row.keys())
-    column_count = len(columns)
-    
+
     # Need at least 2 columns (label + value)
+    column_count = len(columns)
     if column_count < 2:
         return None
-    
+
     # Determine chart type
-    chart_type = determine_chart_type(question, query_result, column_count)
-    
+    chart_type = chart_type or determine_chart_type(question, columns, column_count, max_categories)
+
     if chart_type == 'table':
         return None  # Too complex for chart, return None
-    
-    # Extract data
-    labels = []
+
+    label_column, value_columns = pick_columns(columns)
+
+    # Bound the payload for large inputs
+    count = row_count(columns)
+    note = None
+    if chart_type == 'histogram':
+        binned, note = _histogram(question, columns, value_columns, HISTOGRAM_BINS)
+        if binned is None:
+            chart_type = 'doughnut'
+        else:
+            columns, label_column, value_columns, chart_type = binned, 'range', ['count'], 'bar'
+    elif count > max_categories:
+        if _is_temporal(columns[label_column][0]):
+            chart_type = 'line'  # Long date-indexed results are series
+        if chart_type != 'line':
+            ascending = rank_ascending(question, numeric_column(columns[value_columns[0]]))
+            columns, note = _top_k_with_others(columns, label_column, value_columns,
+                                               max_categories, ascending)
+        elif count > max_points:
+            columns, note = _downsample_series(columns, label_column, value_columns,
+                                               max_points, series_method)
+
+    labels = _format_labels(columns[label_column])
+
     datasets = []
-    
-    # Identify label column (usually first text column or column named 'state', 'district', etc.)
-    label_column = None
-    value_columns = []
-    
-    for col in columns:
-        col_lower = col.lower()
-        if col_lower in ['state', 'district', 'name', 'label', 'category']:
-            label_column = col
-        elif col_lower not in ['z_score', 'bio_ratio', 'count', 'total', 'avg', 'enrollments', 'updates', 'ratio']:
-            # If no explicit label column found, use first column
-            if label_column is None and isinstance(first_row[col], str):
-                label_column = col
-        
-        # Value columns (numeric)
-        if isinstance(first_row[col], (int, float)) and col != label_column:
-            value_columns.append(col)
-    
-    # If no label column identified, use first column
-    if label_column is None:
-        label_column = columns[0]
-    
-    # If no value columns, use all non-label columns
-    if not value_columns:
-        value_columns = [col for col in columns if col != label_column]
-    
-    # Build labels
-    for row in query_result:
-        label = str(row[label_column])
-        # Truncate long labels
-        if len(label) > 30:
-            label = label[:27] + '...'
-        labels.append(label)
-    
-    # Build datasets
-    colors = [
-        'rgba(59, 130, 246, 0.8)',   # Blue
-        'rgba(239, 68, 68, 0.8)',     # Red
-        'rgba(16, 185, 129, 0.8)',    # Green
-        'rgba(251, 191, 36, 0.8)',    # Yellow
-        'rgba(139, 92, 246, 0.8)',    # Purple
-        'rgba(236, 72, 153, 0.8)',    # Pink
-    ]
-    
     for idx, col in enumerate(value_columns):
-        dataset_data = []
-        for row in query_result:
-            value = row[col]
-            # Handle None values
-            if value is None:
-                value = 0
-            # Round floats
-            if isinstance(value, float):
-                value = round(value, 2)
-            dataset_data.append(value)
-        
-        # Format label nicely
-        dataset_label = col.replace('_', ' ').title()
-        
+        color = COLORS[idx % len(COLORS)]
         datasets.append({
-            'label': dataset_label,
-            'data': dataset_data,
-            'backgroundColor': colors[idx % len(colors)],
-            'borderColor': colors[idx % len(colors)].replace('0.8', '1'),
+            'label': col.replace('_', ' ').title(),
+            'data': _format_values(columns[col]),
+            'backgroundColor': color,
+            'borderColor': color.replace('0.8', '1'),
             'borderWidth': 2
         })
-    
+
     # Build chart config
     chart_config = {
         'type': chart_type,
@@ -176,7 +503,10 @@ def format_for_chart(question: str, query_result: list) -> dict:
             'scales': {}
         }
     }
-    
+
+    if note:
+        chart_config['options']['plugins']['subtitle'] = {'display': True, 'text': note}
+
     # Add scales based on chart type
     if chart_type in ['bar', 'horizontalBar', 'line']:
         if chart_type == 'horizontalBar':
@@ -192,59 +522,50 @@ def format_for_chart(question: str, query_result: list) -> dict:
                     'beginAtZero': True
                 }
             }
-    
+
     return chart_config
 
 
+@lru_cache(maxsize=512)
 def _generate_chart_title(question: str) -> str:
     """Generate a nice chart title from the question"""
     # Remove question words
     title = question
-    remove_words = ['what', 'show', 'me', 'the', 'please', 'can you', 'could you', '?']
-    
-    for word in remove_words:
+    for word in _TITLE_REMOVE_WORDS:
         title = title.replace(word, '')
-    
+
     # Capitalize and clean
     title = ' '.join(title.split())
     if len(title) > 60:
         title = title[:57] + '...'
-    
+
     return title.strip().title()
 
 
 def should_generate_chart(question: str, result_count: int) -> bool:
     """
     Determine if a chart should be generated for this query
-    
+
     Args:
         question: User's question
         result_count: Number of rows in result
-        
+
     Returns:
         bool: True if chart should be generated
     """
     question_lower = question.lower()
-    
+
+    # Large results are downsampled by format_for_chart, so only the
+    # lower bound matters
+    if result_count < 2:
+        return False
+
     # Always generate charts for these keywords
-    chart_keywords = [
-        'compare', 'show', 'top', 'bottom', 'ranking', 'list',
-        'distribution', 'breakdown', 'vs', 'versus', 'trend'
-    ]
-    
-    if any(keyword in question_lower for keyword in chart_keywords):
-        # But only if reasonable number of results
-        if 2 <= result_count <= 50:
-            return True
-    
+    if _CHART(question_lower):
+        return True
+
     # Don't generate charts for these
-    no_chart_keywords = [
-        'how many', 'count', 'total', 'sum', 'average',
-        'explain', 'why', 'what is', 'define'
-    ]
-    
-    if any(keyword in question_lower for keyword in no_chart_keywords):
+    if _NO_CHART(question_lower):
         return False
-    
-    # Default: generate if between 2-20 results
-    return 2 <= result_count <= 20
\ No newline at end of file
+
+    return True
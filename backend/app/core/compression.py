@@ -0,0 +1,159 @@
+"""
+Response compression middleware
+Negotiates zstd or gzip from Accept-Encoding and compresses responses
+above a size threshold (streaming responses are compressed incrementally)
+"""
+import gzip
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip always works
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+)
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Parse an Accept-Encoding header into {encoding: q-value}"""
+    encodings = {}
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(header: str):
+    """Pick the best supported encoding for a request (zstd preferred)"""
+    accepted = parse_accept_encoding(header)
+    candidates = ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+    best = None
+    best_quality = 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, zstd_level: int = 3) -> bytes:
+    """Compress a complete body"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor for chunked responses"""
+
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            # wbits=31 -> gzip container
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flush per chunk so clients see data as it streams
+        return self._compressor.compress(data) + self._compressor.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware for negotiated zstd/gzip response compression"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        stream = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is not None:
+                data = stream.chunk(body) if body else b""
+                if not more_body:
+                    data += stream.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            response_headers = dict(start_message["headers"])
+            content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+            compressible = (
+                b"content-encoding" not in response_headers
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+
+            if not compressible or (not more_body and len(body) < self.minimum_size):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            new_headers = [
+                (key, value) for key, value in start_message["headers"]
+                if key not in (b"content-length", b"content-encoding")
+            ]
+            new_headers.append((b"content-encoding", encoding.encode()))
+            new_headers.append((b"vary", b"Accept-Encoding"))
+
+            if not more_body:
+                # Whole body in one message: compress in a single shot
+                data = compress(body, encoding, self.gzip_level, self.zstd_level)
+                new_headers.append((b"content-length", str(len(data)).encode()))
+                await send({**start_message, "headers": new_headers})
+                await send({"type": "http.response.body", "body": data})
+                return
+
+            stream = _StreamCompressor(encoding, self.gzip_level, self.zstd_level)
+            await send({**start_message, "headers": new_headers})
+            await send({"type": "http.response.body", "body": stream.chunk(body), "more_body": True})
+
+        await self.app(scope, receive, send_wrapper)
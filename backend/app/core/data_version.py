@@ -0,0 +1,101 @@
+"""
+Data version tracking
+A cheap fingerprint of the tables the API reads, used to tell when
+precomputed results (analysis report, caches) are stale
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+from app.config import settings
+from app.core.database import PRIMARY, db, parse_lsn
+from app.core.queries import DATA_VERSION_QUERY
+
+
+class DataVersion:
+    """
+    Current data version, re-checked at most every check_interval seconds
+
+    The version is a short hash of pg_stat_user_tables write counters, so
+    checking it never scans data. Listeners are called with
+    (new_version, old_version) whenever it changes. The primary's WAL
+    position when a version is first seen is kept with it (read_lsn), so
+    reads keyed by that version can wait for a replica to catch up.
+    """
+
+    # Versions whose WAL position is remembered
+    MAX_LSNS = 16
+
+    def __init__(self, check_interval: float = None):
+        self.check_interval = check_interval if check_interval is not None else settings.DATA_VERSION_CHECK_SECONDS
+        self._version: Optional[str] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, Optional[str]], None]] = []
+        self._lsns: "OrderedDict[str, int]" = OrderedDict()
+        self._latest_lsn: Optional[int] = None
+
+    def subscribe(self, listener: Callable[[str, Optional[str]], None]):
+        """Call listener(new_version, old_version) on every change"""
+        self._listeners.append(listener)
+
+    def current(self) -> Optional[str]:
+        """Data version, refreshed if the last check is older than check_interval"""
+        if self._version is None or time.monotonic() - self._checked >= self.check_interval:
+            return self.refresh()
+        return self._version
+
+    def last(self) -> Optional[str]:
+        """Last version read, without checking the database"""
+        return self._version
+
+    def refresh(self) -> Optional[str]:
+        """Re-read the table counters now (keeps the last version on failure)"""
+        try:
+            # Table counters are per server (a replica's do not move on replay)
+            rows = db.execute_query(DATA_VERSION_QUERY, name="data_version", workload=PRIMARY)
+            fingerprint = "|".join(
+                f"{row['relname']}:{row['relid']}:{row['n_tup_ins']}:{row['n_tup_upd']}:{row['n_tup_del']}"
+                for row in rows
+            )
+            lsn = parse_lsn(rows[0]["lsn"]) if rows and rows[0].get("lsn") else None
+        except Exception as e:
+            print(f"✗ Data version check failed: {e}")
+            return self._version
+
+        version = hashlib.sha1(fingerprint.encode()).hexdigest()[:12]
+
+        with self._lock:
+            previous, self._version = self._version, version
+            self._checked = time.monotonic()
+            if lsn is not None and version not in self._lsns:
+                self._lsns[version] = lsn
+                if len(self._lsns) > self.MAX_LSNS:
+                    self._lsns.popitem(last=False)
+            if lsn is not None:
+                self._latest_lsn = lsn
+
+        if version != previous:
+            if previous is not None:
+                print(f"✓ Data version changed: {previous} -> {version}")
+            for listener in list(self._listeners):
+                try:
+                    listener(version, previous)
+                except Exception as e:
+                    print(f"✗ Data version listener failed: {e}")
+
+        return version
+
+    def read_lsn(self, version: Optional[str]) -> Optional[int]:
+        """
+        Primary WAL position a replica must have replayed to serve `version`
+
+        Unknown versions (e.g. published by another worker) use the latest
+        position seen, which is at least as far along.
+        """
+        return self._lsns.get(version, self._latest_lsn)
+
+
+# Create data version instance
+data_version = DataVersion()
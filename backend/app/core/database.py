@@ -1,44 +1,274 @@
 """
 Database connection and utilities
 """
+import threading
+import time
+import uuid
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from contextlib import contextmanager
 from app.config import settings
+from app.core.cancellation import cancel_statement
+from app.core.queries import REPLICA_LAG_QUERY, REPLICA_REPLAY_LSN_QUERY
+from app.core.telemetry import registry, span
 
 
-class Database:
-    """PostgreSQL database manager"""
+# Workload classes
+READ = "read"        # dashboard / chart reads: a replica within the lag budget, else the primary
+PRIMARY = "primary"  # writes, refreshes and anything that must see the latest data
+AGENT = "agent"      # agent SQL (separate SQLAlchemy pool, see GuardedSQLDatabase.for_agent)
+
+# Minimum seconds between replay-position checks of a replica that is behind
+REPLAY_RECHECK_SECONDS = 0.5
+
+REPLICA_LAG = registry.gauge(
+    "uidai_db_replica_lag_seconds", "Replication lag per read replica (-1 = unreachable)",
+    ("target",)
+)
+
+
+class PoolTimeoutError(Exception):
+    """No pooled connection freed up within DB_POOL_TIMEOUT_SECONDS"""
+
+
+def parse_lsn(lsn: str) -> int:
+    """PostgreSQL LSN text ("16/B374D848") as a comparable integer"""
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+class ConnectionTarget:
+    """One PostgreSQL server with its own bounded connection pool"""
     
-    def __init__(self):
-        self.connection_string = settings.DATABASE_URL
+    def __init__(self, name: str, url: str, pool_min: int, pool_max: int, pool_timeout: float = None):
+        self.name = name
+        self.url = url
+        self.pool_min = pool_min
+        self.pool_max = pool_max
+        self.pool_timeout = settings.DB_POOL_TIMEOUT_SECONDS if pool_timeout is None else pool_timeout
+        self.lag = 0.0
+        self.healthy = True
+        self.replay_lsn = 0
+        self._replay_checked = 0.0
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Blocks callers (up to pool_timeout) when every pooled connection is
+        # checked out (ThreadedConnectionPool raises instead of waiting)
+        self._pool_slots = threading.BoundedSemaphore(pool_max)
+    
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """Create the connection pool on first use"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        self.pool_min,
+                        self.pool_max,
+                        self.url,
+                        cursor_factory=RealDictCursor
+                    )
+        return self._pool
     
     @contextmanager
-    def get_connection(self):
-        """Context manager for database connections"""
+    def connection(self):
+        """Context manager for a pooled connection to this server (PoolTimeoutError when none frees up)"""
         conn = None
-        try:
-            conn = psycopg2.connect(
-                self.connection_string,
-                cursor_factory=RealDictCursor
+        if not self._pool_slots.acquire(timeout=self.pool_timeout):
+            raise PoolTimeoutError(
+                f"All {self.pool_max} {self.name} connections busy for {self.pool_timeout:g}s"
             )
+        try:
+            conn = self._get_pool().getconn()
             yield conn
             conn.commit()
         except Exception as e:
-            if conn:
+            if conn and not conn.closed:
                 conn.rollback()
             raise e
         finally:
             if conn:
-                conn.close()
+                self._pool.putconn(conn, close=bool(conn.closed))
+            self._pool_slots.release()
     
-    def execute_query(self, query: str):
-        """Execute a SELECT query and return results"""
-        with self.get_connection() as conn:
+    @property
+    def in_use(self) -> int:
+        """Pool slots currently checked out"""
+        return self.pool_max - self._pool_slots._value
+    
+    def probe(self, timeout: float) -> bool:
+        """SELECT 1 on a fresh connection outside the pool (never waits for a pool slot)"""
+        conn = psycopg2.connect(
+            self.url,
+            connect_timeout=max(1, int(timeout)),
+            options=f"-c statement_timeout={int(timeout * 1000)}"
+        )
+        try:
             cursor = conn.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
-            return results
+            cursor.execute("SELECT 1")
+            return cursor.fetchone() is not None
+        finally:
+            conn.close()
+    
+    def close(self):
+        """Close all pooled connections"""
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+
+class Database:
+    """
+    PostgreSQL database manager
+    
+    Routes each query by workload class: READ goes to the next replica
+    whose replication lag is within REPLICA_MAX_LAG_SECONDS (falling back
+    to the primary), PRIMARY always goes to the primary. A READ with
+    min_lsn (results keyed by a data version) only uses replicas that have
+    replayed that primary WAL position.
+    """
+    
+    def __init__(self):
+        self.primary = ConnectionTarget(
+            "primary", settings.DATABASE_URL, settings.DB_POOL_MIN, settings.DB_POOL_MAX
+        )
+        self.replicas = [
+            ConnectionTarget(f"replica{i}", url, settings.DB_POOL_MIN, settings.DB_POOL_MAX)
+            for i, url in enumerate(settings.replica_urls_list)
+        ]
+        self.max_lag = settings.REPLICA_MAX_LAG_SECONDS
+        self.lag_check_interval = settings.REPLICA_LAG_CHECK_SECONDS
+        self._lag_checked = 0.0
+        self._lag_lock = threading.Lock()
+        self._next_replica = 0
+    
+    def _check_lag(self):
+        """Re-measure replica lag if the last check is stale (one thread at a time)"""
+        if time.monotonic() - self._lag_checked < self.lag_check_interval:
+            return
+        if not self._lag_lock.acquire(blocking=False):
+            return
+        try:
+            for replica in self.replicas:
+                try:
+                    with replica.connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute(REPLICA_LAG_QUERY)
+                        replica.lag = float(cursor.fetchone()["lag_seconds"] or 0.0)
+                        replica.healthy = True
+                except Exception as e:
+                    if replica.healthy:
+                        print(f"✗ Replica {replica.name} unavailable: {e}")
+                    replica.healthy = False
+                REPLICA_LAG.set(replica.lag if replica.healthy else -1, target=replica.name)
+            self._lag_checked = time.monotonic()
+        finally:
+            self._lag_lock.release()
+    
+    def _replayed(self, replica: ConnectionTarget, min_lsn: int) -> bool:
+        """Whether a replica has replayed up to min_lsn (re-checked at most every REPLAY_RECHECK_SECONDS)"""
+        if replica.replay_lsn >= min_lsn:
+            return True
+        now = time.monotonic()
+        if now - replica._replay_checked >= REPLAY_RECHECK_SECONDS:
+            replica._replay_checked = now
+            try:
+                with replica.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(REPLICA_REPLAY_LSN_QUERY)
+                    lsn = cursor.fetchone()["lsn"]
+                replica.replay_lsn = parse_lsn(lsn) if lsn else 0
+            except Exception:
+                return False
+        return replica.replay_lsn >= min_lsn
+    
+    def target(self, workload: str = READ, min_lsn: int = None) -> ConnectionTarget:
+        """Server a workload class should use (a replica only once it has replayed min_lsn)"""
+        if workload != READ or not self.replicas:
+            return self.primary
+        self._check_lag()
+        candidates = [r for r in self.replicas if r.healthy and r.lag <= self.max_lag]
+        if min_lsn:
+            candidates = [r for r in candidates if self._replayed(r, min_lsn)]
+        if not candidates:
+            return self.primary
+        self._next_replica = (self._next_replica + 1) % len(candidates)
+        return candidates[self._next_replica]
+    
+    @contextmanager
+    def get_connection(self, workload: str = PRIMARY):
+        """Context manager for pooled database connections"""
+        with self.target(workload).connection() as conn:
+            yield conn
+    
+    def close(self):
+        """Close all pooled connections"""
+        for target in [self.primary, *self.replicas]:
+            target.close()
+    
+    def execute_query(self, query: str, params=None, name: str = "query", workload: str = READ,
+                      min_lsn: int = None):
+        """Execute a SELECT query and return results (min_lsn: see target())"""
+        target = self.target(workload, min_lsn)
+        with span("db.query", query=name, target=target.name) as current:
+            with target.connection() as conn:
+                cursor = conn.cursor()
+                with cancel_statement(conn):
+                    cursor.execute(query, params)
+                results = cursor.fetchall()
+                current.attributes["rows"] = len(results)
+                return results
+    
+    def execute_columns(self, query: str, params=None, name: str = "query", workload: str = READ,
+                        min_lsn: int = None) -> dict:
+        """
+        Execute a SELECT query and return columnar results
+        
+        Returns:
+            dict: Column name -> tuple of values (chart_generator input)
+        """
+        target = self.target(workload, min_lsn)
+        with span("db.query", query=name, target=target.name) as current:
+            with target.connection() as conn:
+                cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+                with cancel_statement(conn):
+                    cursor.execute(query, params)
+                rows = cursor.fetchall()
+                current.attributes["rows"] = len(rows)
+                names = [column.name for column in cursor.description]
+                if not rows:
+                    return {name: () for name in names}
+                return dict(zip(names, zip(*rows)))
+    
+    def stream_query(self, query: str, params=None, batch_size: int = None):
+        """
+        Stream a SELECT query in batches through a named server-side cursor
+        
+        Rows stay on the server until fetched, so memory use is bounded by
+        batch_size regardless of the result size.
+        
+        Args:
+            query: SQL query (may contain %s placeholders)
+            params: Query parameters
+            batch_size: Rows per fetchmany() round-trip
+            
+        Yields:
+            list: Batches of RealDictRow
+        """
+        batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        
+        with self.get_connection(READ) as conn:
+            cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+            cursor.itersize = batch_size
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cursor.close()
     
     def get_table_info(self):
         """Get information about all tables in database"""
@@ -0,0 +1,87 @@
+"""
+Data-version validators for dashboard responses
+Dashboard payloads only change when the data does, so their ETag is the
+data version: a client revalidating with a matching If-None-Match gets a
+304 without the route (or its SQL) running
+"""
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import result_cache
+from app.core.telemetry import registry
+
+CONDITIONAL_REQUESTS = registry.counter(
+    "uidai_conditional_requests_total", "Validated GETs by outcome (not_modified or full response)",
+    ("result",)
+)
+
+# GET routes whose responses depend only on the URL and the data version
+VALIDATED_PREFIXES = ("/api/dashboard",)
+
+
+def etag_for(version: str) -> str:
+    return f'W/"{version}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, '*' matches anything)"""
+    opaque = etag[2:]
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class DataVersionETagMiddleware:
+    """
+    ASGI middleware adding ETag/X-Data-Version to validated GETs and
+    answering 304 Not Modified when the client already has this version
+
+    Routes opt a response out (partial failures, pending work) with
+    Cache-Control: no-store.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "GET"
+                or not scope["path"].startswith(VALIDATED_PREFIXES)):
+            await self.app(scope, receive, send)
+            return
+
+        # May re-check the table counters, so keep it off the event loop
+        version = await run_in_threadpool(result_cache.version)
+        if version is None:
+            await self.app(scope, receive, send)
+            return
+
+        etag = etag_for(version)
+        if_none_match = dict(scope.get("headers") or []).get(b"if-none-match")
+        if if_none_match and _matches(if_none_match.decode("latin-1"), etag):
+            CONDITIONAL_REQUESTS.inc(result="not_modified")
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [
+                    (b"etag", etag.encode()),
+                    (b"x-data-version", version.encode()),
+                    (b"cache-control", b"no-cache"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = list(message.get("headers", []))
+                if not any(name.lower() == b"cache-control" and b"no-store" in value for name, value in headers):
+                    headers += [
+                        (b"etag", etag.encode()),
+                        (b"x-data-version", version.encode()),
+                        (b"cache-control", b"no-cache"),
+                    ]
+                    CONDITIONAL_REQUESTS.inc(result="full")
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
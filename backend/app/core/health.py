@@ -0,0 +1,153 @@
+"""
+Background health monitor
+Checks the database, the agent and cache freshness on an interval so
+liveness/readiness probes only read the last result
+"""
+import threading
+import time
+from typing import Callable, Dict
+from app.config import settings
+from app.core.analysis_report import analysis_reports
+from app.core.cache import VERSION_KEY, result_cache
+from app.core.data_version import data_version
+from app.core.database import db
+from app.core.telemetry import registry
+
+CHECK_UP = registry.gauge(
+    "uidai_health_check_up", "Last health check result (1 = ok)",
+    ("check",)
+)
+CHECK_LATENCY = registry.gauge(
+    "uidai_health_check_latency_seconds", "Duration of the last health check",
+    ("check",)
+)
+LAST_CHECK = registry.gauge(
+    "uidai_health_last_check_timestamp_seconds", "Unix time of the last health check round"
+)
+
+# Checks that must pass for /health/ready
+REQUIRED_CHECKS = ("database",)
+
+
+def check_database() -> dict:
+    """
+    SELECT 1 on the primary, pool usage and the read replicas' state
+
+    The probe uses its own short-lived connection: a pool saturated by
+    real traffic is reported (`pool.saturated`) but does not fail the check.
+    """
+    ok = db.primary.probe(settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+    in_use = db.primary.in_use
+    detail = {"pool": {
+        "in_use": in_use,
+        "size": db.primary.pool_max,
+        "saturated": in_use >= db.primary.pool_max,
+    }}
+    if db.replicas:
+        detail["replicas"] = {
+            replica.name: {"healthy": replica.healthy, "lag_seconds": replica.lag, "in_use": replica.in_use}
+            for replica in db.replicas
+        }
+    return {"ok": ok, **detail}
+
+
+def check_cache() -> dict:
+    """Cache backend reachable, and whether precomputed results match the data version"""
+    # Last known version: a check must not wait for a pooled connection
+    version = data_version.last()
+    report = analysis_reports.get()
+    try:
+        result_cache.backend.get(VERSION_KEY)
+        reachable = True
+    except Exception:
+        reachable = False
+    return {
+        "ok": reachable,
+        "backend": settings.CACHE_BACKEND,
+        "data_version": version,
+        "analysis_report_version": report.version if report else None,
+        "fresh": report is not None and report.version == version,
+    }
+
+
+class HealthMonitor:
+    """
+    Runs registered checks every `interval` seconds in a daemon thread
+
+    Each check returns a dict with an 'ok' flag (exceptions count as
+    failures); the monitor adds its latency and timestamp.
+    """
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or settings.HEALTH_CHECK_SECONDS
+        self.checks: Dict[str, Callable[[], dict]] = {}
+        self.results: Dict[str, dict] = {}
+        self.checked_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name: str, check: Callable[[], dict]):
+        self.checks[name] = check
+
+    def run_checks(self) -> Dict[str, dict]:
+        """Run every check once and publish the results"""
+        results = {}
+        for name, check in list(self.checks.items()):
+            start = time.perf_counter()
+            try:
+                result = dict(check())
+            except Exception as e:
+                result = {"ok": False, "error": str(e).strip()}
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            results[name] = result
+            previous = self.results.get(name)
+            if previous is None or previous["ok"] != result["ok"]:
+                status = "✓" if result["ok"] else "✗"
+                print(f"{status} Health check {name}: {'ok' if result['ok'] else result.get('error', 'failed')}")
+            CHECK_UP.set(1 if result["ok"] else 0, check=name)
+            CHECK_LATENCY.set(result["latency_ms"] / 1000, check=name)
+        self.checked_at = time.time()
+        LAST_CHECK.set(self.checked_at)
+        # Swap the whole dict so readers never see a half-updated round
+        self.results = results
+        return results
+
+    def start(self):
+        """Run the first round now, then keep checking in the background"""
+        self.run_checks()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_checks()
+
+    def is_ok(self, name: str) -> bool:
+        return bool(self.results.get(name, {}).get("ok"))
+
+    def stale(self) -> bool:
+        """No completed round within three intervals"""
+        return time.time() - self.checked_at > 3 * self.interval
+
+    def ready(self) -> bool:
+        return not self.stale() and all(self.is_ok(name) for name in REQUIRED_CHECKS)
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ready" if self.ready() else "not_ready",
+            "checked_at": self.checked_at,
+            "age_seconds": round(time.time() - self.checked_at, 3) if self.checked_at else None,
+            "checks": self.results,
+        }
+
+
+# Create health monitor instance
+health_monitor = HealthMonitor()
+health_monitor.register("database", check_database)
+health_monitor.register("cache", check_cache)
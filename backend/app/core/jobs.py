@@ -0,0 +1,261 @@
+"""
+Background job queue for long-running chat questions
+A bounded in-process worker pool with priorities, cancellation and
+TTL-based result retention; no external broker needed
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from app.config import settings
+from app.core.cancellation import CancelScope
+from app.core.telemetry import registry
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Lower runs first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+JOBS_TOTAL = registry.counter(
+    "uidai_jobs_total", "Background jobs by final status",
+    ("status",)
+)
+JOBS_QUEUED = registry.gauge(
+    "uidai_jobs_queued", "Background jobs waiting for a worker"
+)
+JOBS_RUNNING = registry.gauge(
+    "uidai_jobs_running", "Background jobs currently running"
+)
+JOB_WAIT = registry.histogram(
+    "uidai_job_wait_seconds", "Time jobs spend queued before a worker picks them up"
+)
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds JOB_MAX_QUEUED jobs"""
+
+
+class Job:
+    """One submitted question and its lifecycle"""
+
+    def __init__(self, payload: Dict[str, Any], priority: str = "normal"):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.priority = priority
+        self.status = QUEUED
+        self.result: Optional[Any] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Cancelled by DELETE; handlers run inside it so the agent and its SQL stop
+        self.cancel_scope = CancelScope()
+        # Bumped on every status change so watchers can wait for the next one
+        self.revision = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "question": self.payload.get("question"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Priority queue served by a fixed pool of daemon worker threads
+
+    Jobs run `handler(job)`; its return value becomes the job result.
+    Finished jobs are kept for `ttl` seconds, then dropped.
+    """
+
+    def __init__(self, workers: int = None, max_queued: int = None, ttl: float = None):
+        self.workers = workers or settings.JOB_WORKERS
+        self.max_queued = max_queued or settings.JOB_MAX_QUEUED
+        self.ttl = ttl or settings.JOB_RESULT_TTL_SECONDS
+        self._jobs: Dict[str, Job] = {}
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._changed = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._handler: Optional[Callable[[Job], Any]] = None
+        self._stopping = False
+        self._running = 0
+        # job id -> [(event loop, asyncio.Event)] of SSE watchers
+        self._watchers: Dict[str, List[tuple]] = {}
+
+    def start(self, handler: Callable[[Job], Any]):
+        """Start the worker threads"""
+        if self._threads:
+            return
+        self._handler = handler
+        self._stopping = False
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"✓ Job queue started ({self.workers} workers, max {self.max_queued} queued)")
+
+    def stop(self):
+        """Stop taking jobs; running jobs finish in their (daemon) threads"""
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+            self._notify_watchers()
+        self._threads = []
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping
+
+    def submit(self, payload: Dict[str, Any], priority: str = "normal") -> Job:
+        """
+        Queue a job
+
+        Raises:
+            QueueFullError: if max_queued jobs are already waiting
+        """
+        job = Job(payload, priority)
+        with self._changed:
+            self._expire()
+            if len(self._heap) >= self.max_queued:
+                raise QueueFullError(f"Job queue is full ({self.max_queued} queued)")
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (PRIORITIES.get(priority, PRIORITIES["normal"]), next(self._sequence), job))
+            JOBS_QUEUED.set(len(self._heap))
+            self._changed.notify_all()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._changed:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job
+
+        Queued jobs are dropped before they start. Running jobs have their
+        cancel scope cancelled (stopping the agent and its SQL) and are
+        reported as cancelled right away.
+        """
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            if job.status == QUEUED:
+                self._heap = [entry for entry in self._heap if entry[2] is not job]
+                heapq.heapify(self._heap)
+                JOBS_QUEUED.set(len(self._heap))
+            self._finish(job, CANCELLED)
+        job.cancel_scope.cancel("cancelled")
+        return job
+
+    def watch(self, job: Job) -> asyncio.Event:
+        """
+        Event set whenever the job changes or the queue stops
+
+        Must be called from the event loop; worker threads set it through
+        call_soon_threadsafe, so watchers wait without holding a thread.
+        Pair with unwatch().
+        """
+        event = asyncio.Event()
+        with self._changed:
+            self._watchers.setdefault(job.id, []).append((asyncio.get_running_loop(), event))
+        return event
+
+    def unwatch(self, job: Job, event: asyncio.Event):
+        with self._changed:
+            watchers = [entry for entry in self._watchers.get(job.id, []) if entry[1] is not event]
+            if watchers:
+                self._watchers[job.id] = watchers
+            else:
+                self._watchers.pop(job.id, None)
+
+    def _notify_watchers(self, job: Job = None):
+        """Wake the watchers of one job, or all of them (caller holds the lock)"""
+        if job is None:
+            entries = [entry for watchers in self._watchers.values() for entry in watchers]
+        else:
+            entries = self._watchers.get(job.id, ())
+        for loop, event in entries:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    def stats(self) -> dict:
+        with self._changed:
+            return {"queued": len(self._heap), "running": self._running,
+                    "retained": len(self._jobs), "workers": self.workers}
+
+    def _work(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._heap or self._stopping)
+                if self._stopping:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                JOBS_QUEUED.set(len(self._heap))
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.revision += 1
+                self._running += 1
+                JOBS_RUNNING.set(self._running)
+                self._changed.notify_all()
+                self._notify_watchers(job)
+            JOB_WAIT.observe(job.started_at - job.created_at)
+
+            try:
+                result, error, status = self._handler(job), None, SUCCEEDED
+            except Exception as e:
+                if not job.cancel_scope.cancelled:
+                    print(f"✗ Job {job.id} failed: {e}")
+                result, error, status = None, str(e), FAILED
+
+            with self._changed:
+                self._running -= 1
+                JOBS_RUNNING.set(self._running)
+                if not job.finished:
+                    job.result, job.error = result, error
+                    self._finish(job, status)
+                else:
+                    self._changed.notify_all()
+
+    def _finish(self, job: Job, status: str):
+        """Record a final status (caller holds the lock)"""
+        job.status = status
+        job.finished_at = time.time()
+        job.revision += 1
+        JOBS_TOTAL.inc(status=status)
+        self._changed.notify_all()
+        self._notify_watchers(job)
+
+    def _expire(self):
+        """Drop finished jobs older than the TTL (caller holds the lock)"""
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+# Create job queue instance
+job_queue = JobQueue()
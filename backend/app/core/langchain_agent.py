@@ -1,10 +1,115 @@
 """
-LangChain SQL Agent with Groq
+LangChain SQL Agent with Groq (or the local fake backend)
 """
-from langchain_community.utilities import SQLDatabase
+import time
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_community.agent_toolkits import create_sql_agent
-from langchain_groq import ChatGroq
 from app.config import settings
+from app.core.cancellation import RunCancelled, check_cancelled
+from app.core.language import SUPPORTED_LANGUAGES, detect_language
+from app.core.llm_backends import create_llm
+from app.core.llm_budget import BudgetExceeded, RequestBudget, stopped_answer
+from app.core import model_router
+from app.core.model_router import FAST, LARGE, TIERS
+from app.core.prompts import PREFIXES
+from app.core.query_guard import GuardedSQLDatabase
+from app.core.telemetry import record_span, span
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Records each LLM call and tool call of an agent run as a span"""
+    
+    def __init__(self):
+        self._starts = {}
+    
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+    
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            record_span("agent.llm", time.perf_counter() - start)
+    
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            record_span("agent.llm", time.perf_counter() - start, error=type(error).__name__)
+    
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._starts[run_id] = (time.perf_counter(), (serialized or {}).get("name", "tool"))
+    
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        entry = self._starts.pop(run_id, None)
+        if entry is not None:
+            record_span("agent.tool", time.perf_counter() - entry[0], tool=entry[1])
+    
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        entry = self._starts.pop(run_id, None)
+        if entry is not None:
+            record_span("agent.tool", time.perf_counter() - entry[0],
+                        error=type(error).__name__, tool=entry[1])
+
+
+class CancellationCallbackHandler(BaseCallbackHandler):
+    """Stops an agent run before its next LLM or tool step once the request is cancelled"""
+    
+    # Let RunCancelled propagate instead of being logged and ignored
+    raise_error = True
+    
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        check_cancelled("llm")
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        check_cancelled("llm")
+    
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        check_cancelled("tool")
+
+
+def _token_usage(response) -> tuple:
+    """(prompt, completion) tokens reported for one LLM call ((0, 0) if unknown)"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+class BudgetCallbackHandler(BaseCallbackHandler):
+    """Accounts each LLM call against the question's budget and stops the run once it is spent"""
+    
+    # Let BudgetExceeded propagate instead of being logged and ignored
+    raise_error = True
+    
+    def __init__(self, budget: RequestBudget, tier: str):
+        self.budget = budget
+        self.tier = tier
+        self._starts = {}
+    
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self.budget.check()
+        self._starts[run_id] = time.perf_counter()
+    
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.budget.check()
+        self._starts[run_id] = time.perf_counter()
+    
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            prompt_tokens, completion_tokens = _token_usage(response)
+            self.budget.record_turn(self.tier, time.perf_counter() - start, prompt_tokens, completion_tokens)
+    
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+    
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.budget.check()
 
 
 class LangChainAgent:
@@ -13,183 +118,157 @@ class LangChainAgent:
     def __init__(self):
         self.db = None
         self.agent = None
+        self.agents = {}  # (tier, language) -> agent
         self._initialize()
     
     def _initialize(self):
         """Initialize LangChain SQL Agent"""
         try:
-            # Connect to database
-            self.db = SQLDatabase.from_uri(settings.DATABASE_URL)
+            # Connect to database (agent SQL goes through the query guard,
+            # on its own pool/role, to a replica when one is configured)
+            self.db = GuardedSQLDatabase.for_agent()
             
-            # Initialize Groq LLM
-            llm = ChatGroq(
-                api_key=settings.GROQ_API_KEY,
-                model_name=settings.GROQ_MODEL,
-                temperature=0,
-                max_tokens=2000
-            )
+            # Initialize LLMs (backend chosen by settings.LLM_BACKEND)
+            tiers = TIERS if settings.MODEL_ROUTING else (LARGE,)
+            llms = {tier: create_llm(tier) for tier in tiers}
             
-            # Create SQL Agent with OPTIMIZED prompt
-            self.agent = create_sql_agent(
-                llm=llm,
-                db=self.db,
-                agent_type="openai-tools",
-                verbose=settings.DEBUG,
-                handle_parsing_errors=True,
-          prefix="""
-You are an expert data analyst for UIDAI Aadhaar system.
-
-Database: district_summary (state, district, total_enrollments, total_bio_updates, bio_ratio)
-
-ANALYSIS FRAMEWORK for "overall problems":
-
-STEP 1: Calculate national statistics
-SELECT 
-  AVG(bio_ratio) as mean_ratio,
-  STDDEV(bio_ratio) as stddev_ratio,
-  AVG(bio_ratio) + 2 * STDDEV(bio_ratio) as threshold_2sigma,
-  AVG(bio_ratio) + 3 * STDDEV(bio_ratio) as threshold_3sigma
-FROM district_summary
-WHERE total_enrollments > 1000;
-
-STEP 2: Find crisis districts using STATISTICAL OUTLIERS (not arbitrary threshold!)
-WITH stats AS (
-  SELECT 
-    AVG(bio_ratio) as mean_ratio,
-    STDDEV(bio_ratio) as stddev_ratio
-  FROM district_summary
-  WHERE total_enrollments > 1000
-)
-SELECT 
-  d.state, 
-  d.district, 
-  d.bio_ratio,
-  ROUND((d.bio_ratio - s.mean_ratio) / s.stddev_ratio, 2) as z_score
-FROM district_summary d
-CROSS JOIN stats s
-WHERE d.total_enrollments > 1000
-  AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
-ORDER BY z_score DESC
-LIMIT 20;
-
-STEP 3: Group by state to find patterns
-WITH stats AS (
-  SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
-  FROM district_summary WHERE total_enrollments > 1000
-)
-SELECT 
-  d.state,
-  COUNT(*) as crisis_count,
-  AVG(d.bio_ratio) as avg_ratio
-FROM district_summary d
-CROSS JOIN stats s
-WHERE d.total_enrollments > 1000
-  AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
-GROUP BY d.state
-ORDER BY crisis_count DESC;
-
-CRITICAL: 
-- Use Z-score (statistical outliers), NOT arbitrary thresholds!
-- Filter out low-enrollment districts (< 1000) to avoid skewed data
-- Crisis = Z-score > 2 (2 standard deviations above mean)
-- Extreme crisis = Z-score > 3
-
-MULTILINGUAL SUPPORT:
-- Default response language: English
-- If user asks in Hindi, respond in Hindi
-- If user asks in Telugu, respond in Telugu
-- Detect language from question keywords:
-  * Hindi keywords: "क्या", "कौन", "कहाँ", "समस्या", "जिले", "राज्य"
-  * Telugu keywords: "ఏమిటి", "ఎక్కడ", "సమస్యలు", "జిల్లాలు", "రాష్ట్రాలు"
-- If user explicitly requests language: "in Hindi", "in Telugu", "తెలుగులో", "हिंदी में"
-
-RESPONSE STRUCTURE (adapt to language):
-
-English:
-"Based on statistical analysis:
-- National average: [X]x ratio
-- Standard deviation: [Y]
-- Crisis threshold (2σ): [Z]x
-- Found [N] crisis districts (Z-score > 2)
-- Top crisis: [list with Z-scores]
-- State patterns: [states with most crisis districts]
-
-Problems identified:
-1. [Based on data patterns]
-2. [Based on geographic clustering]
-3. [Based on severity levels]"
-
-Hindi:
-"सांख्यिकीय विश्लेषण के आधार पर:
-- राष्ट्रीय औसत: [X]x अनुपात
-- मानक विचलन: [Y]
-- संकट सीमा (2σ): [Z]x
-- [N] संकट जिले पाए गए (Z-स्कोर > 2)
-- शीर्ष संकट: [Z-स्कोर के साथ सूची]
-- राज्य पैटर्न: [सबसे अधिक संकट जिलों वाले राज्य]
-
-समस्याएं पहचानी गईं:
-1. [डेटा पैटर्न के आधार पर]
-2. [भौगोलिक समूहीकरण के आधार पर]
-3. [गंभीरता स्तरों के आधार पर]"
-
-Telugu:
-"గణాంక విశ్లేషణ ఆధారంగా:
-- జాతీయ సగటు: [X]x నిష్పత్తి
-- ప్రామాణిక విచలనం: [Y]
-- సంక్షోభ పరిమితి (2σ): [Z]x
-- [N] సంక్షోభ జిల్లాలు కనుగొనబడ్డాయి (Z-స్కోర్ > 2)
-- అగ్ర సంక్షోభ: [Z-స్కోర్లతో జాబితా]
-- రాష్ట్ర నమూనాలు: [అత్యధిక సంక్షోభ జిల్లాలు కలిగిన రాష్ట్రాలు]
-
-గుర్తించబడిన సమస్యలు:
-1. [డేటా నమూనాల ఆధారంగా]
-2. [భౌగోళిక సమూహీకరణ ఆధారంగా]
-3. [తీవ్రత స్థాయిల ఆధారంగా]"
-
-LANGUAGE DETECTION:
-- Analyze user's question for language indicators
-- Maintain conversation language consistency
-- Numbers and technical terms remain in English/numerals
-- State/district names remain in original form
-
-ALWAYS query data first, show your work, then respond in appropriate language!
-"""
-            )
+            # One agent per model tier and response language, each with a
+            # compact prompt (only its own response template is sent on
+            # every LLM turn); the fast tier gets fewer steps
+            for tier in tiers:
+                for language in SUPPORTED_LANGUAGES:
+                    self.agents[(tier, language)] = create_sql_agent(
+                        llm=llms[tier],
+                        db=self.db,
+                        agent_type="openai-tools",
+                        verbose=settings.DEBUG,
+                        handle_parsing_errors=True,
+                        prefix=PREFIXES[language],
+                        max_iterations=settings.FAST_MAX_ITERATIONS if tier == FAST else 15
+                    )
+            self.agent = self.agents[(LARGE, "en")]
             
-            print("✓ LangChain SQL Agent initialized successfully")
+            print(f"✓ LangChain SQL Agent initialized successfully ({settings.LLM_BACKEND} backend)")
             print("✓ Using optimized district_summary table")
+            if settings.MODEL_ROUTING:
+                print(f"✓ Model routing: fast={settings.GROQ_FAST_MODEL}, large={settings.GROQ_MODEL}")
+            print("✓ Prompt prefixes: " + ", ".join(
+                f"{language} {len(PREFIXES[language]):,} chars" for language in SUPPORTED_LANGUAGES
+            ))
+            print(f"✓ Agent SQL guard: cost ≤ {settings.AGENT_SQL_MAX_COST:,.0f}, "
+                  f"timeout {settings.AGENT_SQL_TIMEOUT_MS}ms, ≤ {settings.AGENT_SQL_MAX_ROWS} rows")
+            print(f"✓ Agent SQL target: {self.db._engine.url.render_as_string(hide_password=True)}"
+                  + (f" (role {settings.AGENT_DB_ROLE})" if settings.AGENT_DB_ROLE else ""))
             
         except Exception as e:
             print(f"✗ Failed to initialize LangChain Agent: {e}")
             raise e
         
-    def query(self, user_question: str) -> dict:
+    def query(self, user_question: str, language: str = None, tier: str = None,
+              context: str = None) -> dict:
         """
         Process natural language question and return results
         
         Args:
             user_question: User's question in natural language
+            language: Response language (detected from the question if None)
+            tier: Model tier (routed by question complexity if None)
+            context: Precomputed analysis for the large model (skips re-running
+                the framework); lookups on the fast tier do not need it
             
         Returns:
-            dict with 'answer' and 'sql' (if available)
+            dict with 'answer', 'rows' (last SQL result, if any), the
+            'tier' that produced the answer and LLM 'usage' (turns, tokens,
+            cost, and 'budget_exceeded' if the run was stopped early)
         """
+        language = language or detect_language(user_question)
+        if not settings.MODEL_ROUTING:
+            tier = LARGE
+        tier = tier or model_router.classify_question(user_question)
+        
+        # One budget for the whole question, escalation included
+        budget = RequestBudget()
+        result = self._run(user_question, language, tier, context, budget)
+        
+        # Simple lookups the fast model could not finish go to the large model
+        # (a cancelled or over-budget request is not retried)
+        if tier == FAST and not result.get("cancelled") and not result.get("budget_exceeded"):
+            reason = model_router.needs_escalation(result)
+            if reason:
+                model_router.TIER_ESCALATIONS.inc(reason=reason)
+                print(f"⚠ Fast tier {reason}, escalating to the large model")
+                result = self._run(user_question, language, LARGE, context, budget)
+                result["escalated"] = True
+        
+        result["usage"] = budget.finish()
+        return result
+    
+    def _run(self, user_question: str, language: str, tier: str, context: str = None,
+             budget: RequestBudget = None) -> dict:
+        """Run one agent (tier + language) within `budget` and report its latency"""
+        agent = self.agents.get((tier, language), self.agent)
+        agent_input = user_question
+        if context and tier == LARGE:
+            agent_input = f"{user_question}\n\n{context}"
+        model_router.TIER_REQUESTS.inc(tier=tier)
+        budget = budget or RequestBudget()
+        start = time.perf_counter()
+        
         try:
-            # Invoke agent
-            result = self.agent.invoke({"input": user_question})
+            self.db.reset_last_result()
+            
+            # Invoke agent (each LLM/tool step is traced and accounted, and
+            # skipped once the request is cancelled or its budget is spent)
+            with span("agent.run", language=language, tier=tier):
+                result = agent.invoke(
+                    {"input": agent_input},
+                    config={"callbacks": [
+                        TelemetryCallbackHandler(),
+                        CancellationCallbackHandler(),
+                        BudgetCallbackHandler(budget, tier),
+                    ]}
+                )
             
             return {
                 "success": True,
                 "answer": result.get("output", "No answer generated"),
-                "question": user_question
+                "question": user_question,
+                "language": language,
+                "tier": tier,
+                "rows": self.db.last_result()
+            }
+            
+        except BudgetExceeded as e:
+            print(f"⚠ {e}, answering with partial results")
+            rows = self.db.last_result()
+            return {
+                "success": True,
+                "answer": stopped_answer(e, language, rows),
+                "question": user_question,
+                "language": language,
+                "tier": tier,
+                "rows": rows,
+                "budget_exceeded": e.limit
+            }
+            
+        except RunCancelled as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "question": user_question,
+                "tier": tier,
+                "cancelled": True
             }
             
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e),
-                "question": user_question
+                "question": user_question,
+                "tier": tier
             }
+        finally:
+            model_router.TIER_DURATION.observe(time.perf_counter() - start, tier=tier)
     
     def get_schema_info(self):
         """Get database schema information"""
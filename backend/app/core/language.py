@@ -0,0 +1,50 @@
+"""
+Local language detection for chat questions
+Explicit markers ("in Hindi", "తెలుగులో", ...) win; otherwise the
+dominant Unicode script decides. Runs before the agent is called.
+"""
+import re
+
+SUPPORTED_LANGUAGES = ("en", "hi", "te")
+
+# Explicit requests for a response language (checked first, last one wins).
+# Only "in/into <language>" counts: "Hindi-speaking districts" or "Telugu
+# states" name the language without asking for it.
+_MARKERS = re.compile(
+    r'(?P<hi>\b(?:in|into)\s+hindi\b|\bhindi\s+(?:me|mein|mai)\b|हिंदी में|हिन्दी में)'
+    r'|(?P<te>\b(?:in|into)\s+telugu\b|\btelugu\s*lo\b|తెలుగులో|తెలుగు లో)'
+    r'|(?P<en>\b(?:in|into)\s+english\b)',
+    re.IGNORECASE
+)
+
+# Unicode blocks
+_DEVANAGARI = re.compile(r'[ऀ-ॿ]')
+_TELUGU = re.compile(r'[ఀ-౿]')
+_LATIN = re.compile(r'[A-Za-z]')
+
+
+def detect_language(question: str) -> str:
+    """
+    Detect the response language for a question
+
+    Args:
+        question: User's question
+
+    Returns:
+        str: 'en', 'hi' or 'te'
+    """
+    markers = [match.lastgroup for match in _MARKERS.finditer(question)]
+    if markers:
+        return markers[-1]
+
+    devanagari = len(_DEVANAGARI.findall(question))
+    telugu = len(_TELUGU.findall(question))
+    if not devanagari and not telugu:
+        return "en"
+
+    # Indic text mixed with English state names: the Indic script decides
+    # unless it is only a stray word in a mostly Latin question
+    latin = len(_LATIN.findall(question))
+    if max(devanagari, telugu) * 3 < latin:
+        return "en"
+    return "hi" if devanagari >= telugu else "te"
@@ -0,0 +1,169 @@
+"""
+LLM backends for the SQL agent
+"groq" talks to the Groq API; "fake" is a deterministic local stand-in
+that replays scripted tool calls so chat can be load-tested offline
+"""
+import json
+import re
+import uuid
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from app.config import settings
+from app.core import cancellation
+
+
+# Default replay script: list tables, read the schema, run one query, answer.
+# The first entry whose "match" regex hits the question is used.
+DEFAULT_SCRIPT = [
+    {
+        "match": r"compare|vs|versus|तुलना|పోల్చ",
+        "steps": [
+            {"tool": "sql_db_list_tables", "args": {}},
+            {"tool": "sql_db_schema", "args": {"table_names": "district_summary"}},
+            {"tool": "sql_db_query", "args": {"query": (
+                "SELECT state, SUM(total_enrollments) AS enrollments, "
+                "ROUND(AVG(bio_ratio)::numeric, 2) AS avg_ratio "
+                "FROM district_summary GROUP BY state ORDER BY avg_ratio DESC LIMIT 10"
+            )}},
+            {"answer": "Comparison of states by average biometric ratio:\n{observation}"},
+        ],
+    },
+    {
+        "match": r"top|worst|crisis|problem|संकट|समस्या|సమస్య|సంక్షోభ",
+        "steps": [
+            {"tool": "sql_db_list_tables", "args": {}},
+            {"tool": "sql_db_schema", "args": {"table_names": "district_summary"}},
+            {"tool": "sql_db_query", "args": {"query": (
+                "WITH stats AS (SELECT AVG(bio_ratio) AS mean_ratio, STDDEV(bio_ratio) AS stddev_ratio "
+                "FROM district_summary WHERE total_enrollments > 1000) "
+                "SELECT d.state, d.district, d.bio_ratio, "
+                "ROUND((d.bio_ratio - s.mean_ratio) / s.stddev_ratio, 2) AS z_score "
+                "FROM district_summary d CROSS JOIN stats s "
+                "WHERE d.total_enrollments > 1000 AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2 "
+                "ORDER BY z_score DESC LIMIT 20"
+            )}},
+            {"answer": "Based on statistical analysis, the crisis districts (Z-score > 2) are:\n{observation}"},
+        ],
+    },
+    {
+        "match": r".*",
+        "steps": [
+            {"tool": "sql_db_list_tables", "args": {}},
+            {"tool": "sql_db_query", "args": {"query": (
+                "SELECT AVG(bio_ratio) AS mean_ratio, STDDEV(bio_ratio) AS stddev_ratio, "
+                "COUNT(*) AS districts FROM district_summary WHERE total_enrollments > 1000"
+            )}},
+            {"answer": "National statistics:\n{observation}"},
+        ],
+    },
+]
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+class FakeToolCallingChatModel(BaseChatModel):
+    """
+    Deterministic chat model that replays scripted tool calls
+
+    Each call picks the script entry matching the first human message and
+    returns the step indexed by the number of tool results seen so far.
+    Latency is a fixed delay plus output tokens / tokens_per_sec, so agent
+    runs cost real wall time without a network dependency.
+    """
+
+    script: List[dict] = DEFAULT_SCRIPT
+    latency_ms: float = 300.0
+    tokens_per_sec: float = 200.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools, **kwargs):
+        """Accept tools like a real tool-calling model (names are not checked)"""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _pick_entry(self, question: str) -> dict:
+        for entry in self.script:
+            if re.search(entry.get("match", r".*"), question, re.IGNORECASE):
+                return entry
+        return self.script[-1]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        question = next((m.content for m in messages if isinstance(m, HumanMessage)), "")
+        tool_results = [m for m in messages if isinstance(m, ToolMessage)]
+        steps = self._pick_entry(str(question))["steps"]
+        step = steps[min(len(tool_results), len(steps) - 1)]
+
+        if "tool" in step:
+            call = {"name": step["tool"], "args": step["args"], "id": f"call_{uuid.uuid4().hex[:12]}"}
+            message = AIMessage(content="", tool_calls=[call])
+            output_text = json.dumps(step["args"])
+        else:
+            observation = str(tool_results[-1].content) if tool_results else ""
+            message = AIMessage(content=step["answer"].replace("{observation}", observation))
+            output_text = message.content
+
+        input_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = _estimate_tokens(output_text)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+        delay = self.latency_ms / 1000
+        if self.tokens_per_sec > 0:
+            delay += output_tokens / self.tokens_per_sec
+        # Wakes up early (and raises) if the request is cancelled meanwhile
+        cancellation.sleep(delay)
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _load_script(path: str) -> List[dict]:
+    """Load a replay script from JSON (same shape as DEFAULT_SCRIPT)"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def create_llm(tier: str = "large") -> BaseChatModel:
+    """
+    Build the chat model selected by settings.LLM_BACKEND
+
+    Args:
+        tier: 'large' (settings.GROQ_MODEL) or 'fast' (settings.GROQ_FAST_MODEL)
+
+    Returns:
+        BaseChatModel: Tool-calling chat model for the SQL agent
+    """
+    backend = settings.LLM_BACKEND.lower()
+    fast = tier == "fast"
+
+    if backend == "fake":
+        return FakeToolCallingChatModel(
+            script=_load_script(settings.FAKE_LLM_SCRIPT) if settings.FAKE_LLM_SCRIPT else DEFAULT_SCRIPT,
+            latency_ms=settings.FAKE_LLM_FAST_LATENCY_MS if fast else settings.FAKE_LLM_LATENCY_MS,
+            tokens_per_sec=settings.FAKE_LLM_TOKENS_PER_SEC * (4 if fast else 1),
+        )
+
+    if backend == "groq":
+        from langchain_groq import ChatGroq
+
+        if not settings.GROQ_API_KEY:
+            raise ValueError("GROQ_API_KEY is required when LLM_BACKEND=groq")
+        return ChatGroq(
+            api_key=settings.GROQ_API_KEY,
+            model_name=settings.GROQ_FAST_MODEL if fast else settings.GROQ_MODEL,
+            temperature=0,
+            max_tokens=settings.FAST_MAX_TOKENS if fast else settings.GROQ_MAX_TOKENS
+        )
+
+    raise ValueError(f"Unknown LLM_BACKEND '{settings.LLM_BACKEND}' (expected 'groq' or 'fake')")
@@ -0,0 +1,150 @@
+"""
+Per-question LLM budgets and token/cost accounting
+Each agent question gets a RequestBudget: LLM turns, tokens and wall time
+are counted per turn, and the run stops before its next step once a limit
+is reached (the user gets a partial answer instead of a runaway loop)
+"""
+import time
+from typing import List, Optional
+from app.config import settings
+from app.core.telemetry import registry
+
+LLM_TURNS = registry.counter(
+    "uidai_llm_turns_total", "LLM calls made by the agent by model tier",
+    ("tier",)
+)
+LLM_TOKENS = registry.counter(
+    "uidai_llm_tokens_total", "LLM tokens by model tier and kind (prompt or completion)",
+    ("tier", "kind")
+)
+LLM_COST = registry.counter(
+    "uidai_llm_cost_usd_total", "Estimated LLM spend in USD by model tier",
+    ("tier",)
+)
+LLM_TURN_DURATION = registry.histogram(
+    "uidai_llm_turn_duration_seconds", "Latency of one LLM call by model tier",
+    ("tier",)
+)
+REQUEST_TOKENS = registry.histogram(
+    "uidai_llm_request_tokens", "Total LLM tokens used to answer one question",
+    buckets=(500, 1000, 2000, 5000, 10000, 20000, 40000, 80000, 160000)
+)
+BUDGET_EXCEEDED = registry.counter(
+    "uidai_llm_budget_exceeded_total", "Agent runs stopped early by a per-question budget",
+    ("limit",)
+)
+
+# Answer returned when a budget stops the agent ({limit} is turn, token or time)
+STOPPED_ANSWERS = {
+    "en": ("I stopped before finishing because this question reached its {limit} limit. "
+           "Try a narrower question, for example one state or a top 10 list."),
+    "hi": ("यह प्रश्न अपनी सीमा तक पहुँच गया, इसलिए विश्लेषण पूरा होने से पहले रोक दिया गया। "
+           "कृपया छोटा प्रश्न पूछें, जैसे एक राज्य या टॉप 10 सूची।"),
+    "te": ("ఈ ప్రశ్న తన పరిమితిని చేరుకుంది, కాబట్టి విశ్లేషణ పూర్తి కాకముందే ఆపివేయబడింది. "
+           "దయచేసి చిన్న ప్రశ్న అడగండి, ఉదాహరణకు ఒక రాష్ట్రం లేదా టాప్ 10 జాబితా."),
+}
+
+# Rows of the last query shown with a stopped answer
+PARTIAL_ROWS = 10
+
+
+def token_prices(tier: str) -> tuple:
+    """(input, output) USD per million tokens for a model tier"""
+    if tier == "fast":
+        return settings.GROQ_FAST_INPUT_PRICE_PER_MTOK, settings.GROQ_FAST_OUTPUT_PRICE_PER_MTOK
+    return settings.GROQ_INPUT_PRICE_PER_MTOK, settings.GROQ_OUTPUT_PRICE_PER_MTOK
+
+
+class BudgetExceeded(Exception):
+    """Raised from an agent callback once a per-question limit is reached"""
+
+    def __init__(self, limit: str, detail: str):
+        super().__init__(f"LLM {limit} budget exceeded ({detail})")
+        self.limit = limit
+        self.detail = detail
+
+
+class RequestBudget:
+    """
+    Turn, token and wall-time limits for one question, with its usage
+
+    Shared by every agent run for the question (a fast-tier run and its
+    escalation draw from the same budget). Limits are checked before each
+    LLM call and tool call, so a call already in flight always finishes.
+    """
+
+    def __init__(self, max_turns: int = None, max_tokens: int = None, max_seconds: float = None):
+        self.max_turns = max_turns or settings.AGENT_MAX_TURNS
+        self.max_tokens = max_tokens or settings.AGENT_MAX_TOKENS
+        self.max_seconds = max_seconds or settings.AGENT_MAX_SECONDS
+        self.started = time.monotonic()
+        self.turns: List[dict] = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.exceeded: Optional[BudgetExceeded] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def check(self):
+        """Raise BudgetExceeded if the next step would go over a limit"""
+        if self.exceeded is None:
+            if len(self.turns) >= self.max_turns:
+                self.exceeded = BudgetExceeded("turn", f"{len(self.turns)} of {self.max_turns} LLM turns")
+            elif self.total_tokens >= self.max_tokens:
+                self.exceeded = BudgetExceeded("token", f"{self.total_tokens:,} of {self.max_tokens:,} tokens")
+            elif self.elapsed() >= self.max_seconds:
+                self.exceeded = BudgetExceeded("time", f"{self.elapsed():.1f}s of {self.max_seconds:g}s")
+            else:
+                return
+            BUDGET_EXCEEDED.inc(limit=self.exceeded.limit)
+        raise self.exceeded
+
+    def record_turn(self, tier: str, seconds: float, prompt_tokens: int, completion_tokens: int):
+        """Account one finished LLM call"""
+        input_price, output_price = token_prices(tier)
+        cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+        self.turns.append({
+            "tier": tier,
+            "ms": round(seconds * 1000, 1),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        })
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+        LLM_TURNS.inc(tier=tier)
+        LLM_TOKENS.inc(prompt_tokens, tier=tier, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, tier=tier, kind="completion")
+        LLM_COST.inc(cost, tier=tier)
+        LLM_TURN_DURATION.observe(seconds, tier=tier)
+
+    def finish(self) -> dict:
+        """Record the question's total and return its usage summary"""
+        if self.turns:
+            REQUEST_TOKENS.observe(self.total_tokens)
+        return {
+            "turns": len(self.turns),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 6),
+            "llm_ms": round(sum(turn["ms"] for turn in self.turns), 1),
+            "elapsed_ms": round(self.elapsed() * 1000, 1),
+            "budget_exceeded": self.exceeded.limit if self.exceeded else None,
+            "per_turn": self.turns,
+        }
+
+
+def stopped_answer(exceeded: BudgetExceeded, language: str, rows: list = None) -> str:
+    """Graceful answer for a run stopped by its budget (with the last query's rows, if any)"""
+    answer = STOPPED_ANSWERS.get(language, STOPPED_ANSWERS["en"]).format(limit=exceeded.limit)
+    if rows:
+        lines = [", ".join(f"{key}: {value}" for key, value in row.items()) for row in rows[:PARTIAL_ROWS]]
+        more = f"\n… {len(rows) - PARTIAL_ROWS} more rows" if len(rows) > PARTIAL_ROWS else ""
+        answer += "\n\n" + "\n".join(lines) + more
+    return answer
@@ -0,0 +1,81 @@
+"""
+Model tier routing for the SQL agent
+Simple one-hop lookups go to a small fast model; multi-step analyses
+(and anything the fast tier fails at) go to the large model
+"""
+import re
+from app.core.telemetry import registry
+
+FAST = "fast"
+LARGE = "large"
+TIERS = (FAST, LARGE)
+
+# Analysis cues always need the large model
+_ANALYSIS = re.compile(
+    r'\b(problem|problems|issue|issues|why|analy[sz]e|analysis|pattern|patterns|explain|'
+    r'overall|insight|insights|recommend|cause|causes|reason|anomal\w*|outlier\w*|'
+    r'compare|comparison|versus|vs|trend|correlat\w*|cluster\w*|summar\w*)\b'
+    r'|समस्या|क्यों|विश्लेषण|तुलना|సమస్య|ఎందుకు|విశ్లేషణ|పోల్చ',
+    re.IGNORECASE
+)
+
+# One-hop lookups: a single aggregate or a short list
+_LOOKUP = re.compile(
+    r'\b(total|how many|count|number of|what is the|what\'s the|average|sum|list|show|'
+    r'which state|which district|top \d+|highest|lowest|ratio of|enrollments? in)\b'
+    r'|कितने|कुल|ఎన్ని|మొత్తం',
+    re.IGNORECASE
+)
+
+# Longer questions are rarely one-hop
+MAX_FAST_WORDS = 14
+
+# Final answer the agent returns when it runs out of steps or time
+_STOPPED = "Agent stopped due to"
+
+TIER_REQUESTS = registry.counter(
+    "uidai_model_tier_requests_total", "Agent runs by model tier",
+    ("tier",)
+)
+TIER_DURATION = registry.histogram(
+    "uidai_model_tier_duration_seconds", "Agent run latency by model tier",
+    ("tier",)
+)
+TIER_ESCALATIONS = registry.counter(
+    "uidai_model_tier_escalations_total", "Fast-tier runs retried on the large model",
+    ("reason",)
+)
+
+
+def classify_question(question: str) -> str:
+    """
+    Classify question complexity
+
+    Args:
+        question: User's question
+
+    Returns:
+        str: 'fast' for simple lookups, 'large' otherwise
+    """
+    if _ANALYSIS.search(question):
+        return LARGE
+    if len(question.split()) <= MAX_FAST_WORDS and _LOOKUP.search(question):
+        return FAST
+    return LARGE
+
+
+def needs_escalation(result: dict) -> str:
+    """
+    Check whether a fast-tier result should be retried on the large model
+
+    Returns:
+        str: Escalation reason, or '' if the result is usable
+    """
+    if not result.get("success"):
+        return "error"
+    answer = (result.get("answer") or "").strip()
+    if not answer:
+        return "empty"
+    if answer.startswith(_STOPPED):
+        return "iteration_limit"
+    return ""
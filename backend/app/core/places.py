@@ -0,0 +1,77 @@
+"""
+Place names recognised in questions
+States and districts are read from district_summary once per data
+version (the built-in state list is the fallback) and matched as whole
+words, so routing can tell country-wide questions from specific ones
+"""
+import re
+import threading
+from typing import List
+from app.core.cache import cached_query, result_cache
+from app.core.queries import PLACE_NAMES_QUERY
+
+# State names recognised in questions
+ALL_STATES = [
+    'Maharashtra', 'Punjab', 'Andhra Pradesh', 'Chhattisgarh',
+    'Tamil Nadu', 'Kerala', 'Karnataka', 'Gujarat', 'Rajasthan',
+    'Uttar Pradesh', 'Bihar', 'West Bengal', 'Madhya Pradesh',
+    'Odisha', 'Telangana', 'Haryana', 'Delhi', 'Jharkhand',
+    'Assam', 'Jammu and Kashmir', 'Uttarakhand', 'Himachal Pradesh',
+    'Tripura', 'Meghalaya', 'Manipur', 'Nagaland', 'Goa', 'Arunachal Pradesh',
+    'Mizoram', 'Sikkim', 'Chandigarh', 'Puducherry'
+]
+
+# District names that are only compass words ("North", "South West", ...)
+# read as plain English in questions and are not matched
+_DIRECTION_WORDS = {'north', 'south', 'east', 'west', 'central', 'new', 'upper', 'lower'}
+
+
+def _matchable(name: str) -> bool:
+    words = name.lower().split()
+    return len(name) > 2 and not all(word in _DIRECTION_WORDS for word in words)
+
+
+class PlaceCatalog:
+    """State and district names of the current data version"""
+
+    def __init__(self):
+        self._version = None
+        self._pattern = None
+        self._names = {}  # lowercase name -> display name
+        self._lock = threading.Lock()
+
+    def _load(self):
+        version = result_cache.version()
+        if self._pattern is not None and version == self._version:
+            return
+        with self._lock:
+            if self._pattern is not None and version == self._version:
+                return
+            names = {state.lower(): state for state in ALL_STATES}
+            try:
+                for row in cached_query(PLACE_NAMES_QUERY, name="place_names"):
+                    for name in (row['state'], row['district']):
+                        if name and _matchable(name.strip()):
+                            names.setdefault(name.strip().lower(), name.strip())
+            except Exception as e:
+                print(f"✗ Place names query failed, using the state list: {e}")
+            # Longest first so "West Bengal" wins over "Bengal"
+            alternatives = sorted(names, key=len, reverse=True)
+            self._pattern = re.compile(
+                r'\b(?:' + '|'.join(map(re.escape, alternatives)) + r')\b', re.IGNORECASE
+            )
+            self._names, self._version = names, version
+
+    def mentioned(self, question: str) -> List[str]:
+        """Known states and districts named in a question (display names)"""
+        self._load()
+        found = []
+        for match in self._pattern.finditer(question):
+            name = self._names[match.group(0).lower()]
+            if name not in found:
+                found.append(name)
+        return found
+
+
+# Create place catalog instance
+place_catalog = PlaceCatalog()
@@ -0,0 +1,188 @@
+"""
+Cache prewarming after data reloads
+When the data version changes, the new version's cache entries are
+filled in the background (registered first-paint payloads, the hottest
+cached queries, the analysis report and the most asked chat questions)
+and only then is traffic switched to it, so no request hits a cold path
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+from app.config import settings
+from app.core.analysis_report import analysis_reports
+from app.core.cache import query_recipes, result_cache, rewarm_query
+from app.core.data_version import data_version
+from app.core.query_log import query_log
+from app.core.telemetry import registry
+
+PREWARM_RUNS = registry.counter(
+    "uidai_prewarm_runs_total", "Prewarm runs by outcome (complete, timeout or superseded)",
+    ("result",)
+)
+PREWARM_ITEMS = registry.counter(
+    "uidai_prewarm_items_total", "Items warmed by kind (seed, query, question) and result",
+    ("kind", "result")
+)
+PREWARM_DURATION = registry.histogram(
+    "uidai_prewarm_duration_seconds", "Time from a data-version change to the cache switch",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+
+
+class Prewarmer:
+    """
+    Fills a new data version's cache entries, then switches traffic to it
+
+    Runs in one daemon thread. A version that changes again while it is
+    being warmed is abandoned for the newer one. The timeout runs from the
+    first load the serving version fell behind on, across abandoned runs:
+    once PREWARM_TIMEOUT_SECONDS have passed, the newest version is
+    switched to as far as it got, so frequent loads cannot keep a worker
+    on old data.
+    """
+
+    def __init__(self):
+        self.seeds: Dict[str, Callable[[], object]] = {}
+        self.answer_question: Optional[Callable[..., object]] = None
+        self.last_run: dict = {}
+        self._pending: Optional[str] = None
+        # When the serving version fell behind (start of the shared deadline)
+        self._behind_since: Optional[float] = None
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        data_version.subscribe(self._on_version)
+
+    def register(self, name: str, seed: Callable[[], object]):
+        """Warm `seed()` (e.g. the dashboard's default payload) for every new version"""
+        self.seeds[name] = seed
+
+    def start(self, answer_question: Callable[..., object] = None):
+        """
+        Start warming in the background and defer cache switches to it
+
+        Args:
+            answer_question: Chat handler used to re-answer frequent
+                questions (None in dashboard-only mode)
+        """
+        if self._thread is not None:
+            return
+        self.answer_question = answer_question
+        self._stop = False
+        result_cache.defer_switch = True
+        self._thread = threading.Thread(target=self._run, name="cache-prewarm", daemon=True)
+        self._thread.start()
+        # Warm the version this worker starts on as well
+        version = result_cache.version()
+        if version is not None:
+            self._schedule(version)
+
+    def stop(self):
+        result_cache.defer_switch = False
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread = None
+
+    def _on_version(self, version: str, previous: Optional[str]):
+        if self._thread is not None:
+            self._schedule(version)
+
+    def _schedule(self, version: str):
+        with self._cond:
+            self._pending = version
+            if self._behind_since is None:
+                self._behind_since = time.monotonic()
+            self._cond.notify()
+
+    def _superseded(self, version: str) -> bool:
+        return self._stop or (self._pending is not None and self._pending != version)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                version, self._pending = self._pending, None
+            try:
+                self.warm(version)
+            except Exception as e:
+                print(f"✗ Prewarm failed for data version {version}: {e}")
+                self._switch(version)
+
+    def _switch(self, version: str):
+        """Serve `version`; the deadline restarts only if a newer one is already waiting"""
+        with self._cond:
+            self._behind_since = time.monotonic() if self._pending is not None else None
+        result_cache.switch(version)
+
+    def warm(self, version: str) -> dict:
+        """Fill `version`'s entries and switch to it; returns what was warmed"""
+        started = time.monotonic()
+        deadline = (self._behind_since or started) + settings.PREWARM_TIMEOUT_SECONDS
+        counts = {"seed": 0, "query": 0, "question": 0}
+        outcome = "complete"
+
+        def item(kind: str, work: Callable[[], object]) -> bool:
+            """Run one warming step; False once the run should stop"""
+            nonlocal outcome
+            if self._superseded(version):
+                outcome = "superseded"
+                return False
+            if time.monotonic() > deadline:
+                outcome = "timeout"
+                return False
+            try:
+                computed = work()
+                result = "cached" if computed is False else "computed"
+                counts[kind] += 1
+            except Exception as e:
+                print(f"✗ Prewarm {kind} failed: {e}")
+                result = "failed"
+            PREWARM_ITEMS.inc(kind=kind, result=result)
+            return True
+
+        # Country-wide report first (its own atomic swap; also feeds chat answers)
+        if settings.ANALYSIS_REPORT_ENABLED:
+            analysis_reports.refresh()
+
+        with result_cache.pinned(version):
+            steps = [("seed", seed) for seed in self.seeds.values()]
+            steps += [
+                ("query", lambda recipe=recipe: rewarm_query(*recipe))
+                for recipe in query_recipes.hottest(settings.PREWARM_MAX_QUERIES)
+            ]
+            # Chat answers are shared through the cache and cost LLM calls:
+            # only the first worker to claim the version re-answers them
+            if (self.answer_question is not None and settings.PREWARM_CHAT_QUESTIONS > 0
+                    and result_cache.claim("prewarm_questions", version, settings.PREWARM_TIMEOUT_SECONDS)):
+                steps += [
+                    ("question", lambda question=question: self.answer_question(question, source="prewarm"))
+                    for question in query_log.frequent_questions(settings.PREWARM_CHAT_QUESTIONS)
+                ]
+            for kind, work in steps:
+                if not item(kind, work):
+                    break
+
+        elapsed = time.monotonic() - started
+        PREWARM_RUNS.inc(result=outcome)
+        self.last_run = {"version": version, "result": outcome, "seconds": round(elapsed, 2), **counts}
+        if outcome == "superseded":
+            print(f"⚠ Prewarm of data version {version} superseded by a newer load")
+            return self.last_run
+
+        switched = version != result_cache.version()
+        self._switch(version)
+        PREWARM_DURATION.observe(elapsed)
+        status = "✓" if outcome == "complete" else "⚠"
+        print(f"{status} Prewarmed data version {version} in {elapsed:.1f}s "
+              f"({counts['seed']} seeds, {counts['query']} queries, {counts['question']} questions"
+              f"{', timed out' if outcome == 'timeout' else ''})"
+              f"{'; now serving it' if switched else ''}")
+        return self.last_run
+
+
+# Create prewarmer instance
+prewarmer = Prewarmer()
@@ -0,0 +1,281 @@
+"""
+SQL used by the dashboard and chat chart patterns
+Kept free of app imports so benchmarks can load it standalone
+"""
+
+# ============================================
+# DASHBOARD
+# ============================================
+
+METRICS_QUERY = """
+WITH enrollment_total AS (
+    SELECT SUM(age_0_5 + age_5_17 + age_18_greater) as total
+    FROM enrollment
+),
+bio_total AS (
+    SELECT SUM(bio_age_5_17 + bio_age_17_) as total
+    FROM biometric_updates
+),
+demo_total AS (
+    SELECT SUM(demo_age_5_17 + demo_age_17_) as total
+    FROM demographic_updates
+),
+crisis_count AS (
+    SELECT COUNT(DISTINCT district) as count
+    FROM (
+        SELECT 
+            e.state,
+            e.district,
+            SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) as enrollments,
+            COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
+                      FROM biometric_updates b 
+                      WHERE b.state = e.state AND b.district = e.district), 0) as bio_updates,
+            ROUND(COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
+                            FROM biometric_updates b 
+                            WHERE b.state = e.state AND b.district = e.district)::numeric / 
+                  NULLIF(SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater), 0), 0), 2) as bio_ratio
+        FROM enrollment e
+        GROUP BY e.state, e.district
+        HAVING SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) > 1000
+    ) districts
+    WHERE bio_ratio > 36.9  -- Simplified: >2 sigma threshold
+)
+SELECT 
+    (SELECT total FROM enrollment_total) as total_enrollments,
+    (SELECT total FROM bio_total) as total_bio_updates,
+    (SELECT total FROM demo_total) as total_demo_updates,
+    (SELECT count FROM crisis_count) as crisis_districts_count;
+"""
+
+STATE_RANKINGS_QUERY = """
+WITH enrollment_by_state AS (
+    SELECT 
+        state,
+        SUM(age_0_5 + age_5_17 + age_18_greater) as total_enrollments
+    FROM enrollment
+    GROUP BY state
+),
+biometric_by_state AS (
+    SELECT 
+        state,
+        SUM(bio_age_5_17 + bio_age_17_) as total_biometric_updates
+    FROM biometric_updates
+    GROUP BY state
+)
+SELECT 
+    e.state,
+    e.total_enrollments as enrollments,
+    COALESCE(b.total_biometric_updates, 0) as bio_updates,
+    ROUND(COALESCE(b.total_biometric_updates::numeric / 
+          NULLIF(e.total_enrollments, 0), 0), 2) as bio_ratio
+FROM enrollment_by_state e
+LEFT JOIN biometric_by_state b ON e.state = b.state
+WHERE e.total_enrollments > 50000
+ORDER BY bio_ratio DESC
+LIMIT %(limit)s;
+"""
+
+CRISIS_DISTRICTS_QUERY = """
+WITH district_ratios AS (
+    SELECT 
+        e.state,
+        e.district,
+        SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) as enrollments,
+        COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
+                  FROM biometric_updates b 
+                  WHERE b.state = e.state AND b.district = e.district), 0) as bio_updates,
+        ROUND(COALESCE((SELECT SUM(bio_age_5_17 + bio_age_17_) 
+                        FROM biometric_updates b 
+                        WHERE b.state = e.state AND b.district = e.district)::numeric / 
+              NULLIF(SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater), 0), 0), 2) as bio_ratio
+    FROM enrollment e
+    GROUP BY e.state, e.district
+    HAVING SUM(e.age_0_5 + e.age_5_17 + e.age_18_greater) > 1000
+),
+stats AS (
+    SELECT 
+        AVG(bio_ratio) as mean_ratio,
+        STDDEV(bio_ratio) as stddev_ratio
+    FROM district_ratios
+)
+SELECT 
+    d.state,
+    d.district,
+    d.enrollments,
+    d.bio_updates,
+    d.bio_ratio,
+    ROUND((d.bio_ratio - s.mean_ratio) / NULLIF(s.stddev_ratio, 0), 2) as z_score
+FROM district_ratios d
+CROSS JOIN stats s
+WHERE ABS((d.bio_ratio - s.mean_ratio) / NULLIF(s.stddev_ratio, 0)) > 2
+ORDER BY z_score DESC
+LIMIT %(limit)s;
+"""
+
+FILTER_STATES_QUERY = """
+SELECT DISTINCT state 
+FROM enrollment 
+ORDER BY state;
+"""
+
+PLACE_NAMES_QUERY = """
+SELECT DISTINCT state, district
+FROM district_summary;
+"""
+
+
+# ============================================
+# CHAT CHART PATTERNS (district_summary)
+# ============================================
+
+COMPARE_STATES_QUERY = """
+SELECT state, ROUND(AVG(bio_ratio), 2) as avg_bio_ratio
+FROM district_summary
+WHERE state = ANY(%(states)s)
+  AND total_enrollments > 1000
+GROUP BY state
+ORDER BY avg_bio_ratio DESC
+"""
+
+TOP_CRISIS_DISTRICTS_QUERY = """
+WITH stats AS (
+  SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
+  FROM district_summary WHERE total_enrollments > 1000
+)
+SELECT 
+  d.district || ', ' || d.state as location,
+  d.bio_ratio,
+  ROUND((d.bio_ratio - s.mean_ratio) / s.stddev_ratio, 2) as z_score
+FROM district_summary d
+CROSS JOIN stats s
+WHERE d.total_enrollments > 1000
+  AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
+ORDER BY z_score DESC
+LIMIT %(limit)s
+"""
+
+STATE_CRISIS_COUNTS_QUERY = """
+WITH stats AS (
+  SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
+  FROM district_summary WHERE total_enrollments > 1000
+)
+SELECT 
+  d.state,
+  COUNT(*) as crisis_count,
+  ROUND(AVG(d.bio_ratio), 2) as avg_ratio
+FROM district_summary d
+CROSS JOIN stats s
+WHERE d.total_enrollments > 1000
+  AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
+GROUP BY d.state
+HAVING COUNT(*) > 0
+ORDER BY crisis_count DESC
+LIMIT 10
+"""
+
+STATE_CRISIS_DISTRICTS_QUERY = """
+WITH stats AS (
+  SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
+  FROM district_summary WHERE total_enrollments > 1000
+)
+SELECT 
+  d.district,
+  d.bio_ratio,
+  ROUND((d.bio_ratio - s.mean_ratio) / s.stddev_ratio, 2) as z_score
+FROM district_summary d
+CROSS JOIN stats s
+WHERE d.state = %(state)s
+  AND d.total_enrollments > 1000
+  AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
+ORDER BY z_score DESC
+LIMIT 10
+"""
+
+BEST_STATES_QUERY = """
+SELECT state, ROUND(AVG(bio_ratio), 2) as avg_bio_ratio
+FROM district_summary
+WHERE total_enrollments > 1000
+GROUP BY state
+HAVING AVG(bio_ratio) < 15
+ORDER BY avg_bio_ratio ASC
+LIMIT 10
+"""
+
+ALL_STATES_RANKING_QUERY = """
+SELECT state, ROUND(AVG(bio_ratio), 2) as avg_bio_ratio
+FROM district_summary
+WHERE total_enrollments > 1000
+GROUP BY state
+ORDER BY avg_bio_ratio DESC
+LIMIT 20
+"""
+
+
+# ============================================
+# "OVERALL PROBLEMS" ANALYSIS (district_summary)
+# ============================================
+
+NATIONAL_STATS_QUERY = """
+SELECT 
+  COUNT(*) as districts,
+  AVG(bio_ratio) as mean_ratio,
+  STDDEV(bio_ratio) as stddev_ratio,
+  AVG(bio_ratio) + 2 * STDDEV(bio_ratio) as threshold_2sigma,
+  AVG(bio_ratio) + 3 * STDDEV(bio_ratio) as threshold_3sigma
+FROM district_summary
+WHERE total_enrollments > 1000
+"""
+
+CRISIS_OUTLIERS_QUERY = """
+WITH stats AS (
+  SELECT AVG(bio_ratio) as mean_ratio, STDDEV(bio_ratio) as stddev_ratio
+  FROM district_summary WHERE total_enrollments > 1000
+)
+SELECT 
+  d.state,
+  d.district,
+  d.bio_ratio,
+  ROUND((d.bio_ratio - s.mean_ratio) / s.stddev_ratio, 2) as z_score
+FROM district_summary d
+CROSS JOIN stats s
+WHERE d.total_enrollments > 1000
+  AND (d.bio_ratio - s.mean_ratio) / s.stddev_ratio > 2
+ORDER BY z_score DESC
+"""
+
+
+# ============================================
+# DATA VERSION
+# ============================================
+
+# Write counters of every table the API reads; any load, update or
+# delete changes them, and relid changes when a table is rebuilt.
+# n_live_tup is left out: it is an estimate that autovacuum and ANALYZE
+# rewrite without any data change. The WAL position lets replicas prove
+# they have replayed a version before serving reads keyed by it.
+DATA_VERSION_QUERY = """
+SELECT relname, relid, n_tup_ins, n_tup_upd, n_tup_del,
+       pg_current_wal_lsn()::text as lsn
+FROM pg_stat_user_tables
+WHERE relname IN ('enrollment', 'biometric_updates', 'demographic_updates', 'district_summary')
+ORDER BY relname
+"""
+
+
+# ============================================
+# REPLICATION
+# ============================================
+
+# Seconds a replica is behind (0 on the primary or when fully replayed)
+REPLICA_LAG_QUERY = """
+SELECT CASE
+  WHEN NOT pg_is_in_recovery() THEN 0
+  WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+  ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END as lag_seconds
+"""
+
+# WAL position a replica has replayed up to
+REPLICA_REPLAY_LSN_QUERY = """
+SELECT pg_last_wal_replay_lsn()::text as lsn
+"""
@@ -0,0 +1,240 @@
+"""
+Query guard for agent-generated SQL
+Checks every statement the LLM writes before it reaches PostgreSQL:
+read-only validation, EXPLAIN cost ceiling, statement timeout and row cap
+"""
+import re
+import threading
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError, DBAPIError
+from langchain_community.utilities import SQLDatabase
+from app.config import settings
+from app.core.cancellation import cancel_statement
+from app.core.query_log import note_sql
+from app.core.telemetry import span
+
+
+# Raw transaction tables - scanning these is what blows the cost budget
+RAW_TABLES = ('enrollment', 'biometric_updates', 'demographic_updates')
+
+SUMMARY_HINT = (
+    "Use district_summary (state, district, total_enrollments, "
+    "total_bio_updates, bio_ratio) instead of the raw tables."
+)
+
+_READ_ONLY_PATTERN = re.compile(r'^\s*(select|with)\b', re.IGNORECASE)
+# INTO covers SELECT ... INTO new_table as well as INSERT INTO
+_WRITE_PATTERN = re.compile(
+    r'\b(insert|update|delete|drop|alter|truncate|create|grant|revoke|copy|vacuum|into)\b',
+    re.IGNORECASE
+)
+# Functions with side effects a read-only transaction does not stop
+# (session settings, other backends, server files, locks, notifications)
+_UNSAFE_FUNCTION_PATTERN = re.compile(
+    r'\b(set_config|pg_terminate_backend|pg_cancel_backend|pg_reload_conf|pg_rotate_logfile|'
+    r'pg_read_file|pg_read_binary_file|pg_stat_file|pg_ls_\w+|lo_\w+|dblink\w*|'
+    r'pg_sleep\w*|pg_advisory\w*|pg_notify)\s*\(',
+    re.IGNORECASE
+)
+_RAW_TABLE_PATTERN = re.compile(
+    r'\b(' + '|'.join(RAW_TABLES) + r')\b',
+    re.IGNORECASE
+)
+
+
+class QueryRejected(SQLAlchemyError):
+    """
+    Raised when the guard refuses a statement.
+
+    Subclasses SQLAlchemyError so SQLDatabase.run_no_throw hands the
+    message back to the agent as "Error: ..." and it can retry.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+    def __str__(self) -> str:
+        return self.message
+
+
+def check_statement(query: str) -> str:
+    """
+    Validate that a statement is a single read-only query
+
+    A textual first line of defence: guarded statements also run in a
+    READ ONLY transaction, so anything that slips past these patterns
+    still cannot write.
+
+    Args:
+        query: SQL written by the agent
+
+    Returns:
+        str: Normalized statement without trailing semicolon
+    """
+    statement = query.strip().rstrip(';').strip()
+
+    if not statement:
+        raise QueryRejected("Empty query.")
+    if ';' in statement:
+        raise QueryRejected("Only one statement per query is allowed.")
+    if not _READ_ONLY_PATTERN.match(statement) or _WRITE_PATTERN.search(statement):
+        raise QueryRejected("Only read-only SELECT queries are allowed.")
+    if _UNSAFE_FUNCTION_PATTERN.search(statement):
+        raise QueryRejected("Administrative and file functions are not allowed.")
+
+    return statement
+
+
+def uses_raw_tables(query: str) -> bool:
+    """Check if a statement reads from the raw transaction tables"""
+    return _RAW_TABLE_PATTERN.search(query) is not None
+
+
+def _compact_error(error: DBAPIError) -> str:
+    """Reduce a driver error to its first line (no SQL echo, no doc links)"""
+    message = str(error.orig or error).strip()
+    return message.splitlines()[0] if message else "Query failed."
+
+
+class GuardedSQLDatabase(SQLDatabase):
+    """SQLDatabase that runs agent SQL through the query guard"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_cost = settings.AGENT_SQL_MAX_COST
+        self.timeout_ms = settings.AGENT_SQL_TIMEOUT_MS
+        self.max_rows = settings.AGENT_SQL_MAX_ROWS
+        self._local = threading.local()
+
+    @classmethod
+    def for_agent(cls, url: str = None, role: str = None, pool_size: int = None) -> "GuardedSQLDatabase":
+        """
+        Guarded database on the agent's own connection pool
+        
+        Agent SQL gets a separate, small pool (so exploratory queries cannot
+        take the dashboard's connections). Each PostgreSQL connection is
+        read-only by default and throttled explicitly with work_mem and
+        statement_timeout: SET ROLE (AGENT_DB_ROLE) changes privileges
+        only, because a role's ALTER ROLE ... SET defaults and CONNECTION
+        LIMIT apply at login (connect as that user through
+        AGENT_DATABASE_URL to get them).
+        """
+        url = url or settings.agent_database_url
+        role = settings.AGENT_DB_ROLE if role is None else role
+        if not url.startswith("postgresql"):
+            return cls(create_engine(url))
+        
+        engine = create_engine(
+            url,
+            pool_size=pool_size or settings.AGENT_DB_POOL_MAX,
+            max_overflow=0,
+            pool_pre_ping=True,
+        )
+        # Every agent transaction is read-only, guarded or not
+        statements = [("SET default_transaction_read_only = on", None)]
+        if role:
+            statements.append(("SET ROLE " + '"' + role.replace('"', '""') + '"', None))
+        if settings.AGENT_DB_WORK_MEM:
+            statements.append(("SET work_mem = %s", (settings.AGENT_DB_WORK_MEM,)))
+        # Session-wide backstop; guarded statements also SET LOCAL it
+        statements.append(("SET statement_timeout = %s", (int(settings.AGENT_SQL_TIMEOUT_MS),)))
+        
+        @event.listens_for(engine, "connect")
+        def throttle(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for statement, params in statements:
+                cursor.execute(statement, params)
+            cursor.close()
+            dbapi_connection.commit()
+        
+        return cls(engine)
+    
+    def estimate_cost(self, connection, statement: str) -> float:
+        """Run EXPLAIN and return the planner's total cost estimate"""
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+        return float(plan[0]['Plan']['Total Cost'])
+
+    def _execute(self, command, fetch="all", *, parameters=None, execution_options=None):
+        """Execute a guarded statement (read-only transaction + EXPLAIN gate + timeout + row cap)"""
+        if not isinstance(command, str):
+            return super()._execute(
+                command, fetch, parameters=parameters, execution_options=execution_options
+            )
+
+        self._local.truncated = False
+        statement = check_statement(command)
+
+        try:
+            with span("agent.sql") as current, self._engine.begin() as connection:
+                note_sql(statement, current)
+                connection.execute(text("SET TRANSACTION READ ONLY"))
+                connection.execute(text(f"SET LOCAL statement_timeout = {int(self.timeout_ms)}"))
+
+                cost = self.estimate_cost(connection, statement)
+                current.attributes["cost"] = round(cost)
+                if cost > self.max_cost:
+                    hint = SUMMARY_HINT if uses_raw_tables(statement) else (
+                        "Add filters, aggregate with GROUP BY, or add a LIMIT."
+                    )
+                    raise QueryRejected(
+                        f"Query too expensive (estimated cost {cost:,.0f} > "
+                        f"limit {self.max_cost:,.0f}). {hint}"
+                    )
+
+                # A cancelled request sends the server a cancel for this statement
+                with cancel_statement(connection.connection.dbapi_connection, stage="agent_sql"):
+                    cursor = connection.execute(
+                        text(statement), parameters or {}, execution_options=execution_options or {}
+                    )
+                if not cursor.returns_rows:
+                    return []
+
+                if fetch == "one":
+                    row = cursor.fetchone()
+                    return [] if row is None else [row._asdict()]
+
+                rows = cursor.fetchmany(self.max_rows + 1)
+                current.attributes["rows"] = len(rows)
+                if len(rows) > self.max_rows:
+                    rows = rows[:self.max_rows]
+                    self._local.truncated = True
+                result = [row._asdict() for row in rows]
+                self._local.last_result = result
+                return result
+
+        except QueryRejected:
+            raise
+        except DBAPIError as e:
+            if 'statement timeout' in str(e.orig):
+                hint = SUMMARY_HINT if uses_raw_tables(statement) else "Simplify the query."
+                raise QueryRejected(
+                    f"Query cancelled after {self.timeout_ms / 1000:g}s statement timeout. {hint}"
+                )
+            raise QueryRejected(_compact_error(e))
+
+    def reset_last_result(self):
+        """Forget the last result seen by this thread (call before an agent run)"""
+        self._local.last_result = None
+
+    def last_result(self):
+        """Rows of the last successful statement on this thread, if any"""
+        return getattr(self._local, 'last_result', None)
+
+    def run(self, command, fetch="all", include_columns=False, *, parameters=None, execution_options=None):
+        """Run a guarded statement, noting when the row cap truncated the result"""
+        result = super().run(
+            command,
+            fetch,
+            include_columns,
+            parameters=parameters,
+            execution_options=execution_options
+        )
+
+        if isinstance(result, str) and getattr(self._local, 'truncated', False):
+            result += (
+                f"\n(Result truncated to {self.max_rows} rows. "
+                "Aggregate or add a LIMIT for a complete answer.)"
+            )
+
+        return result
@@ -0,0 +1,193 @@
+"""
+Chat query log
+One compact NDJSON line per chat question: the question, the path that
+answered it, the detected intent, agent SQL with row counts, per-stage
+timings and cache outcomes. benchmarks/replay_queries.py re-runs a log
+against the current build.
+"""
+import fcntl
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+import orjson
+from app.config import settings
+from app.core.data_version import data_version
+from app.core.serialization import dumps
+from app.core.telemetry import Span, ensure_trace
+
+
+class QueryRecord:
+    """What one question did, filled in while it is answered"""
+
+    def __init__(self, question: str, session_id: Optional[str], source: str, trace):
+        self.started = time.time()
+        self.fields = {"source": source, "session": session_id, "question": question}
+        self.statements = []  # (statement, agent.sql span)
+        self.cache = {}  # namespace -> {"hit": n, "miss": n}
+        self.trace = trace
+        self.first_span = len(trace.spans)
+
+    def to_dict(self) -> dict:
+        stages = {}
+        for span in self.trace.spans[self.first_span:]:
+            stages[span.name] = stages.get(span.name, 0.0) + span.duration * 1000
+        sql = [
+            {
+                "sql": statement,
+                "rows": span.attributes.get("rows"),
+                "cost": span.attributes.get("cost"),
+                "ms": round(span.duration * 1000, 1),
+                "error": span.error,
+            }
+            for statement, span in self.statements
+        ]
+        return {
+            "ts": round(self.started, 3),
+            "id": self.trace.request_id,
+            "data_version": data_version.current(),
+            **self.fields,
+            "sql": sql,
+            "cache": self.cache,
+            "stages": {name: round(ms, 1) for name, ms in stages.items()},
+            "total_ms": round((time.time() - self.started) * 1000, 1),
+        }
+
+
+_current_record: ContextVar[Optional[QueryRecord]] = ContextVar("uidai_query_record", default=None)
+
+
+def note(**fields):
+    """Attach fields (path, intent, tier, rows, ...) to the question being answered"""
+    record = _current_record.get()
+    if record is not None:
+        record.fields.update(fields)
+
+
+def note_sql(statement: str, span: Span):
+    """Log an agent statement; rows, cost and errors are read from its span at write time"""
+    record = _current_record.get()
+    if record is not None:
+        record.statements.append((statement, span))
+
+
+def note_cache(namespace: str, hit: bool):
+    record = _current_record.get()
+    if record is not None:
+        counts = record.cache.setdefault(namespace, {"hit": 0, "miss": 0})
+        counts["hit" if hit else "miss"] += 1
+
+
+class QueryLog:
+    """
+    Append-only NDJSON file shared by every worker process
+
+    Each entry is one O_APPEND write, so lines from concurrent workers
+    never interleave. Past max_bytes the file is renamed to <path>.1 and
+    every worker reopens the new file on its next write. Writes hold an
+    exclusive flock on the current file and re-check its inode after
+    taking it, so only one worker rotates a given file.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = path or settings.QUERY_LOG_PATH
+        self.max_bytes = max_bytes or settings.QUERY_LOG_MAX_BYTES
+        self._fd = None
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        self._inode = os.fstat(self._fd).st_ino
+
+    def _lock_current(self) -> os.stat_result:
+        """Open the file at self.path and flock it (caller holds self._lock)"""
+        while True:
+            if self._fd is None:
+                self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and stat.st_ino == self._inode:
+                return stat
+            # Rotated (or removed) by another worker while we waited
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._open()
+
+    def write(self, entry: dict):
+        line = dumps(entry) + b"\n"
+        with self._lock:
+            try:
+                stat = self._lock_current()
+                try:
+                    if stat.st_size and stat.st_size + len(line) > self.max_bytes:
+                        os.replace(self.path, self.path + ".1")
+                        fcntl.flock(self._fd, fcntl.LOCK_UN)
+                        self._open()
+                        self._lock_current()
+                    os.write(self._fd, line)
+                finally:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+            except OSError as e:
+                print(f"✗ Query log write failed: {e}")
+
+    @contextmanager
+    def record(self, question: str, session_id: str = None, source: str = "chat"):
+        """Collect one question's record while it is answered, then append it"""
+        if not settings.QUERY_LOG_ENABLED:
+            yield None
+            return
+        with ensure_trace(f"{source} question") as trace:
+            record = QueryRecord(question, session_id, source, trace)
+            token = _current_record.set(record)
+            try:
+                yield record
+            finally:
+                _current_record.reset(token)
+                self.write(record.to_dict())
+
+    def frequent_questions(self, limit: int, min_count: int = 2, tail_bytes: int = 5_000_000) -> List[str]:
+        """
+        Most asked user questions in the recent part of the log
+
+        Only successful chat/job questions answered by the agent (or its
+        cached answers) count; case and spacing are ignored.
+        """
+        counts, first_seen = Counter(), {}
+        try:
+            with open(self.path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - tail_bytes))
+                if size > tail_bytes:
+                    f.readline()  # skip the partial first line
+                for line in f:
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue
+                    if (entry.get("source") not in ("chat", "job") or not entry.get("success")
+                            or entry.get("path") not in ("agent", "cached")):
+                        continue
+                    key = " ".join(entry["question"].lower().split())
+                    counts[key] += 1
+                    first_seen.setdefault(key, entry["question"])
+        except FileNotFoundError:
+            return []
+        return [first_seen[key] for key, count in counts.most_common(limit) if count >= min_count]
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+# Create query log instance
+query_log = QueryLog()
@@ -0,0 +1,231 @@
+"""
+Per-client token-bucket admission control
+Chat and dashboard routes draw from separate buckets per client; the
+bucket state lives in memory (one process) or in a shared SQLite file
+(several workers on one host)
+"""
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.config import settings
+from app.core.serialization import dumps
+from app.core.telemetry import registry
+
+RATE_LIMITED = registry.counter(
+    "uidai_rate_limited_total", "Requests rejected with 429 by bucket",
+    ("bucket",)
+)
+
+
+class BucketPolicy:
+    """Refill rate and burst size of one bucket"""
+
+    __slots__ = ("name", "rate", "capacity")
+
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = float(max(1, burst))
+
+
+def _refill(tokens: float, updated: float, now: float, policy: BucketPolicy) -> float:
+    return min(policy.capacity, tokens + (now - updated) * policy.rate)
+
+
+def _decide(tokens: float, policy: BucketPolicy, cost: float) -> Tuple[bool, float, float]:
+    """Return (allowed, tokens left, seconds until `cost` tokens are available)"""
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / policy.rate if policy.rate > 0 else math.inf
+
+
+class MemoryBucketBackend:
+    """Token buckets in a bounded in-process LRU (single worker deployments)"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, policy: BucketPolicy, cost: float = 1.0) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (policy.capacity, now))
+            allowed, tokens, retry_after = _decide(_refill(tokens, updated, now, policy), policy, cost)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens, retry_after
+
+
+class SQLiteBucketBackend:
+    """
+    Token buckets in a SQLite file shared by every worker process on a host
+
+    Each take() is one short IMMEDIATE transaction, so concurrent workers
+    serialize on the bucket update instead of double-spending tokens.
+    Buckets idle for IDLE_SECONDS have refilled and are purged on a
+    fraction of takes (a new bucket starts full, so nothing changes).
+    """
+
+    # Purge idle buckets on roughly one take in this many
+    PURGE_EVERY = 500
+    IDLE_SECONDS = 3600.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, policy: BucketPolicy, cost: float = 1.0) -> Tuple[bool, float, float]:
+        # Wall clock: monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (policy.capacity, now)
+            allowed, tokens, retry_after = _decide(_refill(tokens, updated, now, policy), policy, cost)
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._takes += 1
+        if self._takes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.IDLE_SECONDS,))
+        return allowed, tokens, retry_after
+
+
+def create_backend(name: str = None):
+    """Build the bucket backend selected by settings.RATE_LIMIT_BACKEND"""
+    name = (name or settings.RATE_LIMIT_BACKEND).lower()
+    if name == "memory":
+        return MemoryBucketBackend()
+    if name == "sqlite":
+        return SQLiteBucketBackend(settings.RATE_LIMIT_SQLITE_PATH)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{name}' (expected 'memory' or 'sqlite')")
+
+
+def default_policies() -> dict:
+    return {
+        "chat": BucketPolicy("chat", settings.RATE_LIMIT_CHAT_PER_MINUTE, settings.RATE_LIMIT_CHAT_BURST),
+        "dashboard": BucketPolicy(
+            "dashboard", settings.RATE_LIMIT_DASHBOARD_PER_MINUTE, settings.RATE_LIMIT_DASHBOARD_BURST
+        ),
+    }
+
+
+# (method or None for any, path prefix, bucket); first match wins
+ROUTE_BUCKETS = (
+    ("POST", "/api/chat", "chat"),
+    ("POST", "/api/jobs", "chat"),
+    (None, "/api/jobs", "dashboard"),
+    (None, "/api/dashboard", "dashboard"),
+    (None, "/api/export", "dashboard"),
+)
+
+
+def bucket_for(method: str, path: str) -> Optional[str]:
+    """Bucket a request draws from (None = not limited)"""
+    for route_method, prefix, bucket in ROUTE_BUCKETS:
+        if (route_method is None or route_method == method) and path.startswith(prefix):
+            return bucket
+    return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 (with Retry-After) once a client's bucket is empty"""
+
+    def __init__(self, app, backend=None, policies: dict = None, trust_proxy: bool = None,
+                 proxy_hops: int = None):
+        self.app = app
+        self.backend = backend or create_backend()
+        self.policies = policies or default_policies()
+        self.trust_proxy = settings.RATE_LIMIT_TRUST_PROXY if trust_proxy is None else trust_proxy
+        self.proxy_hops = max(1, settings.RATE_LIMIT_PROXY_HOPS if proxy_hops is None else proxy_hops)
+
+    def client_id(self, scope) -> str:
+        """
+        Client address
+
+        Behind trusted proxies this is the X-Forwarded-For entry appended by
+        the outermost one (proxy_hops from the right); entries left of it
+        are written by the client and never used.
+        """
+        if self.trust_proxy:
+            forwarded = dict(scope.get("headers") or []).get(b"x-forwarded-for")
+            if forwarded:
+                hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",")]
+                if len(hops) >= self.proxy_hops and hops[-self.proxy_hops]:
+                    return hops[-self.proxy_hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        bucket = bucket_for(scope["method"], scope["path"])
+        policy = self.policies.get(bucket) if bucket else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            allowed, remaining, retry_after = self.backend.take(f"{bucket}:{self.client_id(scope)}", policy)
+        except Exception as e:
+            # Fail open: a broken limiter must not take the API down
+            print(f"✗ Rate limiter error: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        limit_headers = [
+            (b"x-ratelimit-limit", str(int(policy.capacity)).encode()),
+            (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+        ]
+
+        if not allowed:
+            RATE_LIMITED.inc(bucket=bucket)
+            retry = str(max(1, math.ceil(retry_after)) if math.isfinite(retry_after) else 3600).encode()
+            body = dumps({"detail": f"Rate limit exceeded for {bucket} requests. Retry in {retry.decode()}s."})
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", retry),
+                    *limit_headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + limit_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
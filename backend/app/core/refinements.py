@@ -0,0 +1,314 @@
+"""
+Follow-up question refinements
+Recognizes follow-ups such as "only Maharashtra", "show top 5 instead",
+"sort by z score" or "switch to a pie chart" and applies them to the
+previous result set in memory instead of re-running the agent. Anything
+that names a place, metric or grouping the previous result does not
+have goes to the agent.
+"""
+import re
+from typing import Iterable, Optional
+import numpy as np
+from app.core.chart_generator import numeric_column, pick_columns, row_count
+
+
+# A follow-up must refer back to the previous answer (explicitly, or by
+# filtering on values the previous result contains)
+_FOLLOW_UP = re.compile(
+    r'\b(instead|those|these|them|sort|sorted|order|reverse|'
+    r'except|excluding|without|as a|switch|change to)\b'
+)
+# A new question rather than an instruction ("what about ..." is a follow-up)
+_NEW_QUESTION = re.compile(
+    r'^\s*(?!what about|how about)(what|which|who|why|how|when|where|is|are|does|do|did|can|could)\b'
+    r'|\b(is it true|are there)\b'
+)
+# Metrics a question can ask for -> column name fragment that holds them
+_METRICS = [
+    (re.compile(r'\benrol(?:l?ments?|led)?\b'), 'enrol'),
+    (re.compile(r'\bbiometric\b'), 'bio'),
+    (re.compile(r'\bdemographic\b'), 'demo'),
+    (re.compile(r'\bz[ -]?scores?\b'), 'z_score'),
+    (re.compile(r'\bratios?\b'), 'ratio'),
+    (re.compile(r'\bupdates?\b'), 'update'),
+    (re.compile(r'\bage\b|\bage groups?\b'), 'age'),
+    (re.compile(r'\bpopulation\b'), 'population'),
+]
+# "... by <metric>" outside a sort phrase ("top 3 states by enrollment")
+_BY = re.compile(r'\bby\s+([a-z_ ]+)')
+_DISTRICTS = re.compile(r'\bdistricts?\b')
+_STATES = re.compile(r'\bstates\b')
+_LIMIT = re.compile(r'\b(top|first|bottom|last)\s+(\d+)\b')
+_SORT = re.compile(r'\b(?:sort|sorted|order|ordered|rank|ranked)(?:\s+(?:them|those|these|it))?\s+by\s+([a-z_ ]+)')
+_ASCENDING = re.compile(r'\b(ascending|lowest first|smallest first|increasing|low to high)\b')
+_DESCENDING = re.compile(r'\b(descending|highest first|largest first|decreasing|high to low)\b')
+_REVERSE = re.compile(r'\breverse\b')
+_EXCLUDE = re.compile(r'\b(except|excluding|without|exclude|remove)\b')
+_FILTER = re.compile(r'\b(only|just|filter|except|excluding|without|exclude|remove)\b')
+_CHART_TYPES = [
+    (re.compile(r'\bhorizontal bar\b'), 'horizontalBar'),
+    (re.compile(r'\bpie\b'), 'pie'),
+    (re.compile(r'\b(doughnut|donut)\b'), 'doughnut'),
+    (re.compile(r'\b(line chart|line graph|as a line)\b'), 'line'),
+    (re.compile(r'\bbar\b'), 'bar'),
+    (re.compile(r'\b(table|as rows|raw data)\b'), 'table'),
+]
+
+# Listed rows in a refined answer
+MAX_ANSWER_ROWS = 20
+
+# Answer wording per response language
+PHRASES = {
+    "en": {
+        "filtered": "filtered to {}", "excluding": "excluding {}", "sorted": "sorted by {} ({})",
+        "ascending": "ascending", "descending": "descending", "reversed": "reversed",
+        "top": "top {}", "bottom": "bottom {}", "shown": "shown as {}", "table": "a table",
+        "header": 'Refined the previous result ("{question}"): {changes}.',
+        "empty": "No rows match.", "more": "... and {count} more",
+    },
+    "hi": {
+        "filtered": "केवल {}", "excluding": "{} को छोड़कर", "sorted": "{} के अनुसार क्रमबद्ध ({})",
+        "ascending": "आरोही", "descending": "अवरोही", "reversed": "उल्टे क्रम में",
+        "top": "शीर्ष {}", "bottom": "निचले {}", "shown": "{} के रूप में", "table": "तालिका",
+        "header": 'पिछले परिणाम ("{question}") को बदला गया: {changes}।',
+        "empty": "कोई पंक्ति मेल नहीं खाती।", "more": "... और {count} अन्य",
+    },
+    "te": {
+        "filtered": "{} మాత్రమే", "excluding": "{} మినహా", "sorted": "{} ప్రకారం క్రమం ({})",
+        "ascending": "ఆరోహణ", "descending": "అవరోహణ", "reversed": "తిరగబడిన క్రమం",
+        "top": "టాప్ {}", "bottom": "చివరి {}", "shown": "{}గా చూపబడింది", "table": "పట్టిక",
+        "header": 'మునుపటి ఫలితం ("{question}") మార్చబడింది: {changes}.',
+        "empty": "సరిపోలే వరుసలు లేవు.", "more": "... మరియు మరో {count}",
+    },
+}
+
+
+class Refinement:
+    """Operations to apply to a stored result, in order: filter, sort, limit"""
+
+    __slots__ = ("values", "exclude", "sort_column", "descending", "reverse",
+                 "limit", "from_end", "chart_type")
+
+    def __init__(self):
+        self.values = []
+        self.exclude = False
+        self.sort_column = None
+        self.descending = None
+        self.reverse = False
+        self.limit = None
+        self.from_end = False
+        self.chart_type = None
+
+    def describe(self, language: str = "en") -> str:
+        phrases = PHRASES.get(language, PHRASES["en"])
+        parts = []
+        if self.values:
+            parts.append(phrases["excluding" if self.exclude else "filtered"].format(", ".join(self.values)))
+        if self.sort_column:
+            direction = phrases["ascending" if self.descending is False else "descending"]
+            parts.append(phrases["sorted"].format(self.sort_column.replace('_', ' '), direction))
+        elif self.descending is not None:
+            parts.append(phrases["ascending" if not self.descending else "descending"])
+        if self.reverse:
+            parts.append(phrases["reversed"])
+        if self.limit:
+            parts.append(phrases["bottom" if self.from_end else "top"].format(self.limit))
+        if self.chart_type:
+            shown = phrases["table"] if self.chart_type == 'table' else self.chart_type
+            parts.append(phrases["shown"].format(shown))
+        return ", ".join(parts)
+
+
+def _text_columns(columns: dict) -> list:
+    return [name for name, values in columns.items() if values and isinstance(values[0], str)]
+
+
+def _match_values(question_lower: str, columns: dict) -> list:
+    """Distinct text values (or ", "-separated parts) named in the question"""
+    found = []
+    for name in _text_columns(columns):
+        candidates = set()
+        for value in set(columns[name]):
+            candidates.add(value)
+            candidates.update(part.strip() for part in value.split(','))
+        for candidate in candidates:
+            if len(candidate) > 2 and re.search(r'\b' + re.escape(candidate.lower()) + r'\b', question_lower):
+                found.append(candidate)
+    # Longest first so "West Bengal" wins over "Bengal"
+    return sorted(set(found), key=len, reverse=True)
+
+
+def _match_column(text: str, names) -> Optional[str]:
+    text = text.strip()
+    for name in names:
+        spaced = name.replace('_', ' ').lower()
+        if spaced in text or name.lower() in text:
+            return name
+    return None
+
+
+def _column_text(columns: dict) -> str:
+    return " ".join(name.lower() for name in columns)
+
+
+def _needs_new_data(question_lower: str, columns: dict, places: Iterable[str], values: list) -> bool:
+    """
+    Whether a question asks for something the previous result cannot answer
+
+    Named places must be among the values being filtered on, named metrics
+    must be columns of the result, and "districts"/"states" must match its
+    grouping.
+    """
+    if _NEW_QUESTION.search(question_lower):
+        return True
+
+    filtered = [value.lower() for value in values]
+    for place in places:
+        place = place.lower()
+        if not any(place in value or value in place for value in filtered):
+            return True
+
+    column_text = _column_text(columns)
+    for pattern, fragment in _METRICS:
+        if pattern.search(question_lower) and fragment not in column_text:
+            return True
+
+    grouped_by_district = 'district' in column_text or 'location' in column_text
+    if _DISTRICTS.search(question_lower) and not grouped_by_district:
+        return True
+    if _STATES.search(question_lower) and grouped_by_district:
+        return True
+    return False
+
+
+def parse_refinement(question: str, columns: dict, places: Iterable[str] = ()) -> Optional[Refinement]:
+    """
+    Parse a follow-up question against the previous result
+
+    Args:
+        question: Follow-up question
+        columns: Previous result (columnar)
+        places: Known states/districts named in the question
+
+    Returns:
+        Refinement, or None when the question needs new data
+    """
+    question_lower = question.lower()
+    if not row_count(columns):
+        return None
+
+    values = _match_values(question_lower, columns) if _FILTER.search(question_lower) else []
+    if not (_FOLLOW_UP.search(question_lower) or values):
+        return None
+    if _needs_new_data(question_lower, columns, places, values):
+        return None
+
+    refinement = Refinement()
+    recognized = False
+
+    limit = _LIMIT.search(question_lower)
+    if limit:
+        refinement.limit = int(limit.group(2))
+        refinement.from_end = limit.group(1) in ('bottom', 'last')
+        recognized = True
+
+    sort = _SORT.search(question_lower)
+    if sort:
+        refinement.sort_column = _match_column(sort.group(1), columns.keys())
+        if refinement.sort_column is None:
+            return None  # Sorting by something the result doesn't have
+        recognized = True
+    else:
+        by = _BY.search(question_lower)
+        if by and _match_column(by.group(1), columns.keys()) is None:
+            return None  # Ranking by something the result doesn't have
+    if _ASCENDING.search(question_lower):
+        refinement.descending = False
+        recognized = True
+    elif _DESCENDING.search(question_lower):
+        refinement.descending = True
+        recognized = True
+    if _REVERSE.search(question_lower):
+        refinement.reverse = True
+        recognized = True
+
+    for pattern, chart_type in _CHART_TYPES:
+        if pattern.search(question_lower):
+            refinement.chart_type = chart_type
+            recognized = True
+            break
+
+    if _FILTER.search(question_lower):
+        refinement.values = values
+        refinement.exclude = _EXCLUDE.search(question_lower) is not None
+        if refinement.values:
+            recognized = True
+        elif not (refinement.limit or refinement.chart_type):
+            return None  # Filter on a value outside the result: needs new data
+
+    return refinement if recognized else None
+
+
+def apply_refinement(columns: dict, refinement: Refinement) -> dict:
+    """
+    Apply a refinement to a columnar result
+
+    Returns:
+        dict: New columnar result (the stored result is not modified)
+    """
+    indices = np.arange(row_count(columns))
+
+    if refinement.values:
+        needles = [value.lower() for value in refinement.values]
+        mask = np.zeros(len(indices), dtype=bool)
+        for name in _text_columns(columns):
+            lowered = [str(value).lower() for value in columns[name]]
+            mask |= np.fromiter(
+                (any(needle in value for needle in needles) for value in lowered),
+                dtype=bool, count=len(lowered)
+            )
+        indices = indices[~mask] if refinement.exclude else indices[mask]
+
+    if refinement.sort_column or refinement.descending is not None:
+        sort_column = refinement.sort_column or (pick_columns(columns)[1] or [None])[0]
+        keys = numeric_column(columns[sort_column]) if sort_column else None
+        if keys is not None:
+            order = np.argsort(keys[indices], kind='stable')
+            if refinement.descending is not False:
+                order = order[::-1]
+            indices = indices[order]
+
+    if refinement.reverse:
+        indices = indices[::-1]
+
+    if refinement.limit:
+        indices = indices[-refinement.limit:] if refinement.from_end else indices[:refinement.limit]
+
+    return {name: [values[i] for i in indices] for name, values in columns.items()}
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return f"{value:,}" if isinstance(value, int) and not isinstance(value, bool) else str(value)
+
+
+def describe_result(previous_question: str, refinement: Refinement, columns: dict,
+                    language: str = "en") -> str:
+    """Plain-text answer listing the refined rows, worded in the question's language"""
+    phrases = PHRASES.get(language, PHRASES["en"])
+    count = row_count(columns)
+    header = phrases["header"].format(question=previous_question, changes=refinement.describe(language))
+    if not count:
+        return header + "\n\n" + phrases["empty"]
+
+    label_column, value_columns = pick_columns(columns)
+    lines = [header, ""]
+    for i in range(min(count, MAX_ANSWER_ROWS)):
+        values = ", ".join(
+            f"{name.replace('_', ' ')} {_format_value(columns[name][i])}" for name in value_columns
+        )
+        lines.append(f"{i + 1}. {columns[label_column][i]} — {values}")
+    if count > MAX_ANSWER_ROWS:
+        lines.append(phrases["more"].format(count=count - MAX_ANSWER_ROWS))
+    return "\n".join(lines)
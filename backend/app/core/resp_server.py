@@ -0,0 +1,157 @@
+"""
+Local Redis-protocol stand-in for the shared cache
+Serves the handful of commands RedisCache uses (PING, GET, SET [EX|PX] [NX],
+DEL, EXISTS, SCAN [MATCH] [COUNT], FLUSHDB, SELECT, AUTH) from one process, so several uvicorn
+workers can share a cache without installing Redis
+
+Usage (from backend/):
+    python -m app.core.resp_server --port 6379
+    CACHE_BACKEND=redis CACHE_URL=redis://localhost:6379/0 python run.py
+"""
+import argparse
+import asyncio
+import fnmatch
+import time
+
+
+class RESPStore:
+    """Key -> (value, expires) with lazy expiry"""
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key: bytes):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: bytes, value: bytes, ttl: float = None):
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def keys(self, pattern: bytes = b"*") -> list:
+        """Live keys matching a glob pattern"""
+        return [key for key in list(self._data)
+                if fnmatch.fnmatchcase(key, pattern) and self.get(key) is not None]
+
+    def delete(self, keys) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def clear(self):
+        self._data.clear()
+
+    def purge(self):
+        """Drop expired keys (run periodically)"""
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in self._data.items() if expires is not None and expires < now]:
+            del self._data[key]
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, Exception):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+def execute(store: RESPStore, args: list):
+    """Run one command and return its reply"""
+    command = args[0].upper()
+    if command == b"PING":
+        return "PONG"
+    if command in (b"SELECT", b"AUTH"):
+        return "OK"
+    if command == b"GET" and len(args) == 2:
+        return store.get(args[1])
+    if command == b"SET" and len(args) >= 3:
+        ttl = None
+        options = [arg.upper() for arg in args[3:]]
+        if b"EX" in options:
+            ttl = float(args[3 + options.index(b"EX") + 1])
+        elif b"PX" in options:
+            ttl = float(args[3 + options.index(b"PX") + 1]) / 1000
+        if b"NX" in options and store.get(args[1]) is not None:
+            return None
+        store.set(args[1], args[2], ttl)
+        return "OK"
+    if command == b"DEL" and len(args) >= 2:
+        return store.delete(args[1:])
+    if command == b"EXISTS" and len(args) >= 2:
+        return sum(1 for key in args[1:] if store.get(key) is not None)
+    if command == b"SCAN" and len(args) >= 2:
+        # One pass over every key (cursor 0 = done); COUNT is accepted and ignored
+        options = [arg.upper() for arg in args[2:]]
+        pattern = args[2 + options.index(b"MATCH") + 1] if b"MATCH" in options else b"*"
+        return [b"0", store.keys(pattern)]
+    if command == b"FLUSHDB":
+        store.clear()
+        return "OK"
+    return Exception(f"unknown or malformed command '{command.decode(errors='replace')}'")
+
+
+async def _read_command(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command (e.g. typed into telnet)
+        return line.split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readline()
+        length = int(header[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def serve(host: str, port: int):
+    store = RESPStore()
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                writer.write(_encode(execute(store, args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def purge_loop():
+        while True:
+            await asyncio.sleep(10)
+            store.purge()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"✓ RESP cache stand-in listening on {host}:{port}")
+    asyncio.get_running_loop().create_task(purge_loop())
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Redis-protocol cache server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
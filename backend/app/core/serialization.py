@@ -0,0 +1,40 @@
+"""
+Fast JSON serialization
+orjson-backed encoding for API responses and row payloads
+"""
+from decimal import Decimal
+from typing import Any
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+def _default(value: Any):
+    """Handle types orjson doesn't serialize natively"""
+    if isinstance(value, Decimal):
+        # SUM() over integer columns comes back as an integral Decimal
+        if value.as_tuple().exponent >= 0:
+            return int(value)
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+
+    Routes can return one of these with plain row dicts to skip
+    per-row Pydantic model construction entirely.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,111 @@
+"""
+Chat conversation sessions
+Keeps the last result sets of each conversation in a bounded LRU + TTL
+store so follow-up questions can be answered in memory
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Optional
+from app.config import settings
+from app.core.chart_generator import row_count
+
+
+class StoredResult:
+    """One result set shown to the user (columnar, chart-ready)"""
+
+    __slots__ = ("question", "columns", "chart_type", "source", "truncated", "created")
+
+    def __init__(self, question: str, columns: dict, chart_type: str = None,
+                 source: "StoredResult" = None, truncated: bool = False):
+        self.question = question
+        self.columns = columns
+        self.chart_type = chart_type
+        # Unrefined result this one was derived from (None for fresh results)
+        self.source = source
+        self.truncated = truncated
+        self.created = time.time()
+
+
+class SessionStore:
+    """
+    Bounded, evictable store of per-session result sets
+
+    Least recently used sessions are evicted past max_sessions, idle
+    sessions expire after ttl_seconds, each session keeps its last
+    max_results results and each result is capped at max_rows rows.
+    """
+
+    def __init__(self, max_sessions: int = None, ttl_seconds: float = None,
+                 max_results: int = None, max_rows: int = None):
+        self.max_sessions = max_sessions or settings.SESSION_MAX_SESSIONS
+        self.ttl_seconds = ttl_seconds or settings.SESSION_TTL_SECONDS
+        self.max_results = max_results or settings.SESSION_MAX_RESULTS
+        self.max_rows = max_rows or settings.SESSION_MAX_ROWS
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (last_used, deque)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def _expire(self, now: float):
+        """Drop idle sessions (oldest first, so stop at the first live one)"""
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def remember(self, session_id: str, question: str, columns: dict, chart_type: str = None,
+                 source: StoredResult = None) -> StoredResult:
+        """
+        Store a result set as the latest result of a session
+
+        Args:
+            session_id: Conversation id (None: build the entry without storing it)
+            question: Question that produced the result
+            columns: Columnar result (column name -> sequence)
+            chart_type: Chart type shown for it, if any
+            source: Result it was refined from, if any
+
+        Returns:
+            StoredResult: The stored entry
+        """
+        count = row_count(columns)
+        truncated = count > self.max_rows
+        if truncated:
+            columns = {name: list(values[:self.max_rows]) for name, values in columns.items()}
+        result = StoredResult(question, columns, chart_type, source, truncated)
+        if session_id is None:
+            return result
+
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.pop(session_id, None)
+            results = entry[1] if entry else deque(maxlen=self.max_results)
+            results.append(result)
+            self._sessions[session_id] = (now, results)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return result
+
+    def latest(self, session_id: str) -> Optional[StoredResult]:
+        """Most recent result of a session (None if unknown or expired)"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            return entry[1][-1] if entry[1] else None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# Create session store instance
+session_store = SessionStore()
@@ -0,0 +1,340 @@
+"""
+Request tracing and Prometheus-style metrics
+Per-request spans for the route, SQL, agent steps and chart formatting,
+plus counters and histograms rendered at /metrics
+"""
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+
+
+# Verbose request-path dumps only happen in debug mode
+DEBUG = settings.DEBUG
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def debug(message: str, *args):
+    """
+    Print a debug message when settings.DEBUG is on
+
+    Formatting is deferred (printf-style args) so disabled calls cost
+    almost nothing. Guard expensive arguments with `if telemetry.DEBUG:`.
+    """
+    if DEBUG:
+        print(message % args if args else message)
+
+
+# ============================================
+# METRICS
+# ============================================
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render a Prometheus label set"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value:g}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self, **labels) -> Optional[dict]:
+        """Return count/sum for one label set (None if never observed)"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._values.get(key)
+        if series is None:
+            return None
+        return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+
+        lines = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative:g}")
+            cumulative += series[len(self.buckets)]
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative:g}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, tuple(labelnames), **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "uidai_http_requests_total", "HTTP requests by route and status",
+    ("method", "route", "status")
+)
+HTTP_DURATION = registry.histogram(
+    "uidai_http_request_duration_seconds", "HTTP request latency",
+    ("method", "route")
+)
+STAGE_DURATION = registry.histogram(
+    "uidai_stage_duration_seconds", "Duration of traced stages (db, agent, chart)",
+    ("stage",)
+)
+STAGE_ERRORS = registry.counter(
+    "uidai_stage_errors_total", "Traced stages that raised",
+    ("stage",)
+)
+
+
+# ============================================
+# TRACING
+# ============================================
+
+class Span:
+    """One timed stage inside a request"""
+
+    __slots__ = ("name", "start", "duration", "attributes", "error")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.attributes = attributes
+        self.error = None
+
+
+class Trace:
+    """All spans recorded for one request"""
+
+    def __init__(self, request_id: str, name: str):
+        self.request_id = request_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def server_timing(self) -> str:
+        """Aggregate spans by name into a Server-Timing header value"""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            key = span.name.replace(" ", "_")
+            totals[key] = totals.get(key, 0.0) + span.duration
+        total = (time.perf_counter() - self.start) * 1000
+        parts = [f"{name};dur={duration * 1000:.1f}" for name, duration in totals.items()]
+        parts.append(f"total;dur={total:.1f}")
+        return ", ".join(parts)
+
+    def summary(self) -> str:
+        lines = [f"⏱  {self.name} [{self.request_id}] {(time.perf_counter() - self.start) * 1000:.1f}ms"]
+        for span in self.spans:
+            status = f" ✗ {span.error}" if span.error else ""
+            attrs = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+            lines.append(f"   {span.name:<24} {span.duration * 1000:8.1f}ms {attrs}{status}")
+        return "\n".join(lines)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("uidai_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def ensure_trace(name: str):
+    """The current request trace, or a new one for work outside a request (jobs, replay)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = Trace(uuid.uuid4().hex[:16], name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a stage, attach it to the current request trace and record it
+    in the stage histogram
+
+    Usage:
+        with span("db.query", query="metrics"):
+            ...
+    """
+    current = Span(name, attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        STAGE_DURATION.observe(current.duration, stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(current)
+
+
+def record_span(name: str, duration: float, error: str = None, **attributes):
+    """Record an already-timed stage (e.g. from a LangChain callback)"""
+    current = Span(name, attributes)
+    current.start -= duration
+    current.duration = duration
+    current.error = error
+    STAGE_DURATION.observe(duration, stage=name)
+    if error:
+        STAGE_ERRORS.inc(stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(current)
+
+
+class TelemetryMiddleware:
+    """ASGI middleware that opens a trace per HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")
+        trace = Trace(request_id or uuid.uuid4().hex[:16], f"{scope['method']} {scope['path']}")
+        token = _current_trace.set(trace)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", trace.request_id.encode()))
+                headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            elapsed = time.perf_counter() - trace.start
+            HTTP_REQUESTS.inc(method=scope["method"], route=route_path, status=status["code"])
+            HTTP_DURATION.observe(elapsed, method=scope["method"], route=route_path)
+            if DEBUG and trace.spans:
+                print(trace.summary())
@@ -2,19 +2,40 @@
 Main FastAPI application
 """
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.core.database import db
-from app.core.langchain_agent import langchain_agent
-from app.api.routes import dashboard, chat
+from app.core.compression import CompressionMiddleware
+from app.core.etag import DataVersionETagMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.serialization import FastJSONResponse
+from app.core.telemetry import TelemetryMiddleware, registry
+from app.core.database import PoolTimeoutError, db
+from app.core.analysis_report import analysis_reports
+from app.core.prewarm import prewarmer
+from app.core.jobs import job_queue
+from app.core.health import health_monitor
+from app.core.agent_loader import agent_ready, get_agent
+from app.api.routes import dashboard, export
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     debug=settings.DEBUG,
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Add data-version validators to dashboard GETs (304 without running the route).
+# Innermost, so revalidations still draw from the client's rate-limit bucket
+if settings.ETAG_ENABLED:
+    app.add_middleware(DataVersionETagMiddleware)
+
+# Add per-client admission control (chat and dashboard budgets; 429 + Retry-After).
+# Added first so it sits inside CORS and 429s still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -22,11 +43,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining", "ETag", "X-Data-Version"],
+)
+
+# Add response compression (zstd/gzip, negotiated per request)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
 )
 
+# Add per-request tracing (outermost, so it times everything)
+app.add_middleware(TelemetryMiddleware)
+
 # Include routers
 app.include_router(dashboard.router)
-app.include_router(chat.router)
+app.include_router(export.router)
+
+# Chat and job routes (the LangChain stack itself is imported lazily by
+# app.core.agent_loader; dashboard-only workers skip these routes)
+if settings.chat_enabled:
+    from app.api.routes import chat, jobs
+    
+    app.include_router(chat.router)
+    app.include_router(jobs.router)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request, exc: PoolTimeoutError):
+    """Saturated connection pool: ask the client to retry instead of queueing"""
+    return FastJSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "5"})
 
 
 @app.on_event("startup")
@@ -36,17 +83,50 @@ async def startup_event():
     print(f"🚀 Starting {settings.APP_NAME}")
     print("=" * 60)
     
-    # Test database connection
-    if db.test_connection():
-        print("✓ Database connection successful")
+    # Load the chat stack up front so the first question doesn't pay for it
+    if settings.chat_enabled:
+        try:
+            get_agent()
+        except Exception as e:
+            print(f"✗ LangChain SQL Agent failed to load: {e}")
+        health_monitor.register("agent", lambda: {
+            "ok": agent_ready(),
+            "backend": settings.LLM_BACKEND,
+        })
+    else:
+        print("✓ Dashboard-only mode (chat stack not loaded)")
+    
+    # First health check round (database, agent, cache), then every
+    # HEALTH_CHECK_SECONDS in the background
+    health_monitor.start()
+    if health_monitor.is_ok("database"):
+        print(f"✓ Database connection successful "
+              f"({health_monitor.results['database']['latency_ms']:.1f}ms)")
     else:
         print("✗ Database connection failed")
+    if db.replicas:
+        print(f"✓ Read replicas: {len(db.replicas)} (max lag {settings.REPLICA_MAX_LAG_SECONDS:g}s)")
     
     # Test LangChain agent
-    if langchain_agent.agent:
-        print("✓ LangChain SQL Agent ready")
-    else:
-        print("✗ LangChain SQL Agent failed to initialize")
+    if settings.chat_enabled:
+        if agent_ready():
+            print("✓ LangChain SQL Agent ready")
+        else:
+            print("✗ LangChain SQL Agent failed to initialize")
+    
+    # Precompute the overall-problems analysis in the background
+    if settings.ANALYSIS_REPORT_ENABLED:
+        analysis_reports.start()
+        print("✓ Analysis report refresher started")
+    
+    # Background workers for /api/jobs
+    if settings.chat_enabled:
+        job_queue.start(jobs.run_chat_job)
+    
+    # Warm each new data version's caches before serving it
+    if settings.PREWARM_ENABLED:
+        prewarmer.start(answer_question=chat.answer_question if settings.chat_enabled else None)
+        print("✓ Cache prewarmer started")
     
     print("=" * 60)
 
@@ -55,6 +135,11 @@ async def startup_event():
 async def shutdown_event():
     """Run on application shutdown"""
     print("🛑 Shutting down application...")
+    analysis_reports.stop()
+    prewarmer.stop()
+    health_monitor.stop()
+    job_queue.stop()
+    db.close()
 
 
 @app.get("/")
@@ -70,9 +155,31 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (last background check, no I/O)"""
     return {
-        "status": "healthy",
-        "database": db.test_connection(),
-        "langchain": langchain_agent.agent is not None
-    }
\ No newline at end of file
+        "status": "healthy" if health_monitor.ready() else "unhealthy",
+        "database": health_monitor.is_ok("database"),
+        "langchain": health_monitor.is_ok("agent")
+    }
+
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: the last background check passed and is recent (503 otherwise)"""
+    snapshot = health_monitor.snapshot()
+    return FastJSONResponse(snapshot, status_code=200 if snapshot["status"] == "ready" else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -2,12 +2,13 @@
 Pydantic models for request/response validation
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 
 class ChatRequest(BaseModel):
     """Chat request model"""
     question: str = Field(..., min_length=1, description="User's question")
+    session_id: Optional[str] = Field(None, max_length=64, description="Conversation id for follow-ups")
 
 
 class ChatResponse(BaseModel):
@@ -17,6 +18,28 @@ class ChatResponse(BaseModel):
     question: str
     chart_data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    session_id: Optional[str] = None
+    refined: bool = False
+
+
+class JobRequest(BaseModel):
+    """Background chat job submission"""
+    question: str = Field(..., min_length=1, description="User's question")
+    session_id: Optional[str] = Field(None, max_length=64, description="Conversation id for follow-ups")
+    priority: Literal["high", "normal", "low"] = "normal"
+
+
+class JobResponse(BaseModel):
+    """Background chat job status"""
+    job_id: str
+    status: str
+    priority: str
+    question: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
 
 
 class MetricsResponse(BaseModel):
@@ -51,4 +74,14 @@ class HealthResponse(BaseModel):
     """API health check response"""
     status: str
     database: bool
-    langchain: bool
\ No newline at end of file
+    langchain: bool
+
+
+class BootstrapResponse(BaseModel):
+    """Combined dashboard payload for first paint"""
+    health: HealthResponse
+    metrics: Optional[MetricsResponse] = None
+    states: List[StateData] = []
+    crisis_districts: List[DistrictData] = []
+    filters: Optional[Dict[str, List[str]]] = None
+    errors: Dict[str, str] = {}
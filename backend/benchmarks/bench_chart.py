@@ -0,0 +1,86 @@
+"""
+Micro-benchmark for chart_generator
+
+Times format_for_chart on row input (list of dicts) and columnar input
+(dict of column -> sequence) from 10 to 10k rows, the downsampled
+payloads (top-K, LTTB, min-max, histogram) and the keyword checks in
+determine_chart_type / should_generate_chart.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chart
+    python -m benchmarks.bench_chart --sizes 10 100 1000 10000 --repeat 50
+"""
+import argparse
+import timeit
+from datetime import date, timedelta
+from app.core.chart_generator import (
+    determine_chart_type, format_for_chart, should_generate_chart, to_columns
+)
+from app.core.serialization import dumps
+from benchmarks.bench_serialization import make_rows
+
+
+# Comparison keyword forces a chart at every size
+QUESTION = "Compare district biometric ratio vs z score"
+
+
+def per_call_us(func, repeat: int) -> float:
+    """Best-of-5 microseconds per call"""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=5, number=repeat)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'rows µs':>12} {'columns µs':>12} {'µs/row':>8} "
+          f"{'to_columns µs':>14} {'bytes':>7}")
+    for size in args.sizes:
+        rows = make_rows(size)
+        columns = to_columns(rows)
+        assert format_for_chart(QUESTION, rows) == format_for_chart(QUESTION, columns)
+
+        rows_us = per_call_us(lambda: format_for_chart(QUESTION, rows), args.repeat)
+        columns_us = per_call_us(lambda: format_for_chart(QUESTION, columns), args.repeat)
+        convert_us = per_call_us(lambda: to_columns(rows), args.repeat)
+        payload = len(dumps(format_for_chart(QUESTION, columns)))
+        print(f"{size:>6} {rows_us:>12.1f} {columns_us:>12.1f} "
+              f"{rows_us / size:>8.2f} {convert_us:>14.1f} {payload:>7}")
+
+    print(f"\n{'rows':>6} {'reduction':<10} {'µs':>10} {'points':>7} {'bytes':>7}")
+    for size in args.sizes:
+        columns = to_columns(make_rows(size))
+        series = {
+            "date": [date(2020, 1, 1) + timedelta(days=i) for i in range(size)],
+            "enrollments": columns["enrollments"],
+        }
+        cases = [
+            ("top-k", QUESTION, columns, {}),
+            ("lttb", "Enrollment trend", series, {}),
+            ("minmax", "Enrollment trend", series, {"series_method": "minmax"}),
+            ("histogram", "Distribution of bio ratio", columns, {}),
+        ]
+        for name, question, data, kwargs in cases:
+            elapsed = per_call_us(lambda: format_for_chart(question, data, **kwargs), args.repeat)
+            chart = format_for_chart(question, data, **kwargs)
+            print(f"{size:>6} {name:<10} {elapsed:>10.1f} {len(chart['data']['labels']):>7} "
+                  f"{len(dumps(chart)):>7}")
+
+    questions = [
+        "What are the overall problems?",
+        "Show top 10 crisis districts",
+        "Breakdown of enrollments by state",
+        "How many districts are in crisis?",
+    ]
+    keyword_us = per_call_us(
+        lambda: [(determine_chart_type(q, rows, 3), should_generate_chart(q, 25)) for q in questions],
+        args.repeat * 100
+    ) / len(questions)
+    print(f"\nkeyword checks: {keyword_us:.2f} µs per question")
+
+
+if __name__ == "__main__":
+    main()
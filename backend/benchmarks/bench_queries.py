@@ -0,0 +1,145 @@
+"""
+Scale benchmark for the dashboard and chat SQL paths
+
+Loads synthetic data (benchmarks.generate_data) at several scales into a
+local PostgreSQL, then runs every dashboard query and chat chart pattern
+against each scale, recording latency percentiles and the executed plan
+(EXPLAIN ANALYZE). Results are written as JSON so runs can be compared.
+
+Usage (from backend/):
+    python -m benchmarks.bench_queries --dsn postgresql://localhost/uidai_bench --scales 0.1 1 10
+    python -m benchmarks.bench_queries --dsn ... --skip-load --compare results/queries_prev.json
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from app.core import queries
+from benchmarks.generate_data import load_postgres, schema_for_scale
+
+
+# (name, SQL, parameters) for every SQL path the API runs
+QUERY_PATHS = [
+    ("dashboard.metrics", queries.METRICS_QUERY, None),
+    ("dashboard.state_rankings", queries.STATE_RANKINGS_QUERY, {"limit": 20}),
+    ("dashboard.crisis_districts", queries.CRISIS_DISTRICTS_QUERY, {"limit": 30}),
+    ("dashboard.filter_states", queries.FILTER_STATES_QUERY, None),
+    ("chat.compare_states", queries.COMPARE_STATES_QUERY, {"states": ["Maharashtra", "Punjab"]}),
+    ("chat.top_crisis_districts", queries.TOP_CRISIS_DISTRICTS_QUERY, {"limit": 10}),
+    ("chat.state_crisis_counts", queries.STATE_CRISIS_COUNTS_QUERY, None),
+    ("chat.state_crisis_districts", queries.STATE_CRISIS_DISTRICTS_QUERY, {"state": "Maharashtra"}),
+    ("chat.best_states", queries.BEST_STATES_QUERY, None),
+    ("chat.all_states_ranking", queries.ALL_STATES_RANKING_QUERY, None),
+]
+
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_query(cursor, sql: str, params, repeat: int) -> dict:
+    """Time one query (after a warm-up run) and capture its plan"""
+    cursor.execute(sql, params)
+    rows = len(cursor.fetchall())
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql.strip().rstrip(";"), params)
+    plan = cursor.fetchone()[0][0]
+
+    return {
+        "rows": rows,
+        "min_ms": round(min(samples), 2),
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(_percentile(samples, 95), 2),
+        "max_ms": round(max(samples), 2),
+        "planned_cost": plan["Plan"]["Total Cost"],
+        "plan": plan,
+    }
+
+
+def run_scale(dsn: str, schema: str, repeat: int) -> dict:
+    """Run every query path against one loaded schema"""
+    import psycopg2
+
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    results = {}
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f'SET search_path TO "{schema}"')
+            cursor.execute("SELECT COUNT(*) FROM enrollment")
+            results["_enrollment_rows"] = cursor.fetchone()[0]
+            for name, sql, params in QUERY_PATHS:
+                results[name] = bench_query(cursor, sql, params, repeat)
+                print(f"  {name:<32} p50 {results[name]['p50_ms']:>9.1f}ms  "
+                      f"p95 {results[name]['p95_ms']:>9.1f}ms  rows {results[name]['rows']}")
+    finally:
+        conn.close()
+    return results
+
+
+def print_comparison(current: dict, previous: dict):
+    """Print p50 deltas against a previous results file"""
+    print("\nComparison with previous run (p50):")
+    for scale, paths in current["scales"].items():
+        before = previous.get("scales", {}).get(scale)
+        if not before:
+            continue
+        print(f"scale {scale}:")
+        for name, result in paths.items():
+            if name.startswith("_") or name not in before:
+                continue
+            old, new = before[name]["p50_ms"], result["p50_ms"]
+            delta = (new - old) / old * 100 if old else 0.0
+            flag = "  ⚠ regression" if delta > 20 else ""
+            print(f"  {name:<32} {old:>9.1f}ms -> {new:>9.1f}ms ({delta:+.0f}%){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard and chat SQL paths")
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL"))
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.1, 1.0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse existing bench_s* schemas")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        parser.error("--dsn (or BENCH_DATABASE_URL) is required")
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "scales": {}, "loads": {}}
+
+    for scale in args.scales:
+        schema = schema_for_scale(scale)
+        if not args.skip_load:
+            print(f"\n📦 Loading scale {scale:g} into {schema}...")
+            report["loads"][f"{scale:g}"] = load_postgres(args.dsn, schema, scale, args.seed)
+        print(f"\n⏱  Benchmarking scale {scale:g} ({schema})")
+        report["scales"][f"{scale:g}"] = run_scale(args.dsn, schema, args.repeat)
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"queries_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n✓ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Serialization benchmark for district payloads
+
+Compares the default FastAPI path (Pydantic model per row +
+jsonable_encoder + json.dumps) against raw rows serialized with orjson,
+and measures gzip/zstd compression cost and ratio.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 30 100 1000 --repeat 200
+"""
+import argparse
+import json
+import random
+import timeit
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from app.models.schemas import DistrictData
+from app.core.serialization import dumps
+from app.core.compression import compress, zstandard
+
+
+def make_rows(count: int, seed: int = 42) -> list:
+    """Build district rows shaped like psycopg2 results (Decimal values)"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        enrollments = rng.randint(1000, 200000)
+        bio_updates = int(enrollments * rng.uniform(2, 60))
+        rows.append({
+            "state": f"State {i % 36}",
+            "district": f"District {i}",
+            "enrollments": Decimal(enrollments),
+            "bio_updates": Decimal(bio_updates),
+            "bio_ratio": Decimal(bio_updates / enrollments).quantize(Decimal("0.01")),
+            "z_score": Decimal(rng.uniform(2, 6)).quantize(Decimal("0.01")),
+        })
+    return rows
+
+
+def default_path(rows: list) -> bytes:
+    """What FastAPI does with response_model=List[DistrictData]"""
+    models = [DistrictData(**row) for row in rows]
+    return json.dumps(jsonable_encoder(models)).encode("utf-8")
+
+
+def fast_path(rows: list) -> bytes:
+    """Raw rows straight through orjson"""
+    return dumps(rows)
+
+
+def per_call_us(func, arg, repeat: int) -> float:
+    """Best-of-5 microseconds per call"""
+    timer = timeit.Timer(lambda: func(arg))
+    return min(timer.repeat(repeat=5, number=repeat)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    encodings = ["gzip"] + (["zstd"] if zstandard is not None else [])
+
+    print(f"{'rows':>6} {'default µs':>12} {'orjson µs':>12} {'speedup':>8} {'bytes':>9}"
+          + "".join(f" {enc + ' µs':>10} {enc + ' bytes':>11}" for enc in encodings))
+
+    for size in args.sizes:
+        rows = make_rows(size)
+        default_us = per_call_us(default_path, rows, args.repeat)
+        fast_us = per_call_us(fast_path, rows, args.repeat)
+        body = fast_path(rows)
+
+        line = (f"{size:>6} {default_us:>12.1f} {fast_us:>12.1f} "
+                f"{default_us / fast_us:>7.1f}x {len(body):>9}")
+        for encoding in encodings:
+            compress_us = per_call_us(lambda b: compress(b, encoding), body, args.repeat)
+            line += f" {compress_us:>10.1f} {len(compress(body, encoding)):>11}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Startup benchmark for APP_MODE=dashboard vs APP_MODE=full
+
+Imports app.main (and, in full mode, loads the agent as startup does) in
+a fresh interpreter per mode under -X importtime and reports total import
+time, the slowest top-level packages, how many LangChain/LangGraph/
+SQLAlchemy modules were loaded and the process RSS.
+With --serve it also boots uvicorn per mode and reports time until
+/health/live answers and the RSS of the serving process.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 --serve
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+MODES = ("dashboard", "full")
+CHAT_STACK = ("langchain", "langchain_core", "langchain_community", "langchain_openai",
+              "langchain_groq", "langgraph", "sqlalchemy", "openai", "groq")
+
+# Runs inside the child interpreter after importing app.main
+PROBE = """
+import json, sys
+import app.main
+from app.config import settings
+from app.core.agent_loader import get_agent
+if settings.chat_enabled:
+    get_agent()  # what startup does in full mode
+rss = 0
+try:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+except OSError:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+stack = %r
+loaded = [m for m in sys.modules if m.split(".")[0] in stack]
+print(json.dumps({"rss_kb": rss, "chat_stack_modules": len(loaded)}))
+""" % (CHAT_STACK,)
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """Total microseconds and self time summed per top-level package"""
+    packages = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: self [us] | cumulative | imported package"
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        self_us = int(self_us)
+        total += self_us
+        packages[name.strip().split(".")[0]] += self_us
+    return total, packages
+
+
+def import_run(mode: str) -> dict:
+    env = {**os.environ, "APP_MODE": mode}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import app.main failed in {mode} mode:\n{proc.stderr[-2000:]}")
+    total_us, packages = parse_importtime(proc.stderr)
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"import_ms": total_us / 1000, "packages": packages, **probe}
+
+
+def process_rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def serve_run(mode: str, port: int, timeout: float = 120.0) -> dict:
+    """Boot uvicorn and time it until /health/live answers"""
+    env = {**os.environ, "APP_MODE": mode}
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {proc.returncode} in {mode} mode")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/live", timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                time.sleep(0.05)
+        else:
+            raise RuntimeError(f"/health/live did not answer within {timeout}s in {mode} mode")
+        return {"ready_s": time.perf_counter() - start, "worker_rss_kb": process_rss_kb(proc.pid)}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per mode (best run kept)")
+    parser.add_argument("--top", type=int, default=8, help="Slowest packages to list per mode")
+    parser.add_argument("--serve", action="store_true", help="Also boot uvicorn per mode")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in MODES:
+        runs = [import_run(mode) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["import_ms"])
+        result = {
+            "import_ms": round(best["import_ms"], 1),
+            "rss_mb": round(best["rss_kb"] / 1024, 1),
+            "chat_stack_modules": best["chat_stack_modules"],
+            "slowest_packages": {
+                name: round(us / 1000, 1)
+                for name, us in sorted(best["packages"].items(), key=lambda item: -item[1])[:args.top]
+            },
+        }
+        if args.serve:
+            served = serve_run(mode, args.port)
+            result["ready_s"] = round(served["ready_s"], 2)
+            result["worker_rss_mb"] = round(served["worker_rss_kb"] / 1024, 1)
+        results[mode] = result
+
+    print(f"\n{'mode':<10}{'import ms':>12}{'RSS MB':>10}{'chat mods':>11}", end="")
+    print(f"{'ready s':>10}{'worker MB':>11}" if args.serve else "")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['import_ms']:>12}{result['rss_mb']:>10}{result['chat_stack_modules']:>11}", end="")
+        print(f"{result['ready_s']:>10}{result['worker_rss_mb']:>11}" if args.serve else "")
+    for mode, result in results.items():
+        print(f"\nSlowest imports ({mode}):")
+        for name, ms in result["slowest_packages"].items():
+            print(f"  {name:<30}{ms:>10} ms")
+
+    out_dir = Path(__file__).parent / "results"
+    out_dir.mkdir(exist_ok=True)
+    out_file = out_dir / "startup.json"
+    out_file.write_text(json.dumps(results, indent=2))
+    print(f"\n✓ Results written to {out_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Synthetic UIDAI dataset generator
+
+Produces enrollment, biometric_updates and demographic_updates with the
+same columns as the real extract, plus the district_summary table the
+chat agent uses. Volume, state/district/pincode skew and date pattern
+are modelled on the March-December 2025 extract, and the output is
+reproducible for a given seed.
+
+Scale 1 is about the size of today's extract (~1.0M / 1.9M / 2.1M rows).
+Fractional scales are useful for quick runs.
+
+Usage (from backend/):
+    python -m benchmarks.generate_data --scale 1 --dsn postgresql://localhost/uidai_bench
+    python -m benchmarks.generate_data --scale 0.1 --schema bench_s0_1 --dsn ...
+    python -m benchmarks.generate_data --scale 0.01 --out /tmp/uidai_csv
+"""
+import argparse
+import io
+import os
+import time
+from datetime import date, timedelta
+import numpy as np
+
+
+# Rows per table at scale 1 (size of the real extract)
+BASE_ROWS = {
+    "enrollment": 1_006_029,
+    "biometric_updates": 1_861_108,
+    "demographic_updates": 2_071_700,
+}
+
+# (state, relative transaction volume, district count)
+STATES = [
+    ("Uttar Pradesh", 16.5, 75), ("Maharashtra", 9.3, 36), ("Bihar", 8.6, 38),
+    ("West Bengal", 7.5, 23), ("Madhya Pradesh", 6.0, 55), ("Tamil Nadu", 6.0, 38),
+    ("Rajasthan", 5.7, 50), ("Karnataka", 5.1, 31), ("Gujarat", 5.0, 33),
+    ("Andhra Pradesh", 4.1, 26), ("Odisha", 3.5, 30), ("Telangana", 2.9, 33),
+    ("Kerala", 2.8, 14), ("Jharkhand", 2.7, 24), ("Assam", 2.6, 35),
+    ("Punjab", 2.3, 23), ("Chhattisgarh", 2.1, 33), ("Haryana", 2.1, 22),
+    ("Delhi", 1.4, 11), ("Jammu and Kashmir", 1.0, 20), ("Uttarakhand", 0.8, 13),
+    ("Himachal Pradesh", 0.6, 12), ("Tripura", 0.3, 8), ("Meghalaya", 0.3, 12),
+    ("Manipur", 0.25, 16), ("Nagaland", 0.2, 16), ("Goa", 0.15, 2),
+    ("Arunachal Pradesh", 0.12, 26), ("Puducherry", 0.1, 4), ("Mizoram", 0.1, 11),
+    ("Chandigarh", 0.09, 1), ("Sikkim", 0.05, 6),
+]
+
+START_DATE = date(2025, 3, 1)
+END_DATE = date(2025, 12, 31)
+
+SCHEMA_SQL = """
+CREATE TABLE enrollment (
+    date DATE, state TEXT, district TEXT, pincode INTEGER,
+    age_0_5 INTEGER, age_5_17 INTEGER, age_18_greater INTEGER
+);
+CREATE TABLE biometric_updates (
+    date DATE, state TEXT, district TEXT, pincode INTEGER,
+    bio_age_5_17 INTEGER, bio_age_17_ INTEGER
+);
+CREATE TABLE demographic_updates (
+    date DATE, state TEXT, district TEXT, pincode INTEGER,
+    demo_age_5_17 INTEGER, demo_age_17_ INTEGER
+);
+"""
+
+INDEX_SQL = """
+CREATE INDEX idx_enrollment_state_district ON enrollment (state, district);
+CREATE INDEX idx_biometric_state_district ON biometric_updates (state, district);
+CREATE INDEX idx_demographic_state_district ON demographic_updates (state, district);
+"""
+
+DISTRICT_SUMMARY_SQL = """
+CREATE TABLE district_summary AS
+WITH e AS (
+    SELECT state, district, SUM(age_0_5 + age_5_17 + age_18_greater) as total_enrollments
+    FROM enrollment GROUP BY state, district
+),
+b AS (
+    SELECT state, district, SUM(bio_age_5_17 + bio_age_17_) as total_bio_updates
+    FROM biometric_updates GROUP BY state, district
+)
+SELECT
+    e.state,
+    e.district,
+    e.total_enrollments,
+    COALESCE(b.total_bio_updates, 0) as total_bio_updates,
+    ROUND(COALESCE(b.total_bio_updates::numeric / NULLIF(e.total_enrollments, 0), 0), 2) as bio_ratio
+FROM e LEFT JOIN b USING (state, district);
+CREATE INDEX idx_district_summary_state ON district_summary (state);
+"""
+
+
+class Geography:
+    """States, districts and pincodes with Zipf-skewed sampling weights"""
+
+    def __init__(self, rng: np.random.Generator):
+        states, districts, pincodes = [], [], []
+        district_weights, pincode_weights = [], []
+        district_of_pincode = []
+
+        state_volume = np.array([volume for _, volume, _ in STATES])
+        state_volume = state_volume / state_volume.sum()
+
+        for state_index, (state, _, district_count) in enumerate(STATES):
+            states.append(state)
+            # Zipf-like skew: a few big urban districts, a long rural tail
+            ranks = np.arange(1, district_count + 1)
+            weights = 1.0 / ranks ** 0.8
+            weights = weights / weights.sum() * state_volume[state_index]
+
+            for rank in range(district_count):
+                district_index = len(districts)
+                districts.append((state_index, f"{state} District {rank + 1}"))
+                district_weights.append(weights[rank])
+
+                pincode_count = int(rng.integers(5, 40))
+                base = 110000 + state_index * 20000 + rank * 50
+                pin_weights = 1.0 / np.arange(1, pincode_count + 1) ** 1.1
+                pin_weights = pin_weights / pin_weights.sum() * weights[rank]
+                for offset in range(pincode_count):
+                    pincodes.append(base + offset)
+                    pincode_weights.append(pin_weights[offset])
+                    district_of_pincode.append(district_index)
+
+        self.states = states
+        self.districts = districts
+        self.pincodes = np.array(pincodes)
+        self.pincode_weights = np.array(pincode_weights) / np.sum(pincode_weights)
+        self.district_of_pincode = np.array(district_of_pincode)
+
+        # Per-district biometric update intensity: lognormal with a heavy
+        # tail so a few percent of districts become statistical outliers
+        self.bio_intensity = rng.lognormal(mean=0.0, sigma=0.35, size=len(districts))
+        crisis = rng.random(len(districts)) < 0.03
+        self.bio_intensity[crisis] *= rng.uniform(2.5, 4.0, size=crisis.sum())
+        self.demo_intensity = rng.lognormal(mean=0.0, sigma=0.5, size=len(districts))
+
+
+def _date_weights() -> np.ndarray:
+    """Daily weights: volume ramps up over the year, Sundays are quiet"""
+    days = (END_DATE - START_DATE).days + 1
+    ramp = np.linspace(0.6, 1.4, days)
+    weekday = np.array([(START_DATE + timedelta(d)).weekday() for d in range(days)])
+    ramp[weekday == 6] *= 0.25
+    ramp[weekday == 5] *= 0.8
+    return ramp / ramp.sum()
+
+
+_DATE_WEIGHTS = _date_weights()
+
+
+def generate_table(table: str, rows: int, geography: Geography, rng: np.random.Generator):
+    """
+    Generate one table as column arrays
+
+    Returns:
+        dict: column name -> numpy array (state/district are index arrays)
+    """
+    pincode_index = rng.choice(len(geography.pincodes), size=rows, p=geography.pincode_weights)
+    district_index = geography.district_of_pincode[pincode_index]
+    day_offset = rng.choice(len(_DATE_WEIGHTS), size=rows, p=_DATE_WEIGHTS)
+
+    columns = {
+        "day": day_offset,
+        "district": district_index,
+        "pincode": geography.pincodes[pincode_index],
+    }
+
+    if table == "enrollment":
+        columns["age_0_5"] = rng.poisson(3.2, rows)
+        columns["age_5_17"] = rng.poisson(1.6, rows)
+        columns["age_18_greater"] = rng.poisson(0.5, rows)
+    elif table == "biometric_updates":
+        scale = geography.bio_intensity[district_index]
+        columns["bio_age_5_17"] = rng.poisson(17.0 * scale)
+        columns["bio_age_17_"] = rng.poisson(20.5 * scale)
+    else:
+        scale = geography.demo_intensity[district_index]
+        columns["demo_age_5_17"] = rng.poisson(2.3 * scale)
+        columns["demo_age_17_"] = rng.poisson(21.5 * scale)
+
+    return columns
+
+
+def iter_csv_chunks(table: str, rows: int, geography: Geography, rng: np.random.Generator,
+                    chunk_rows: int = 200_000):
+    """Yield the table as CSV text chunks (columns in table order)"""
+    dates = [(START_DATE + timedelta(int(d))).isoformat() for d in range(len(_DATE_WEIGHTS))]
+    district_labels = [
+        f'"{geography.states[state_index]}","{name}"'
+        for state_index, name in geography.districts
+    ]
+
+    remaining = rows
+    while remaining > 0:
+        count = min(chunk_rows, remaining)
+        remaining -= count
+        columns = generate_table(table, count, geography, rng)
+        value_columns = [key for key in columns if key not in ("day", "district", "pincode")]
+
+        buffer = io.StringIO()
+        values = np.column_stack([columns[key] for key in value_columns])
+        for day, district, pincode, counts in zip(
+            columns["day"], columns["district"], columns["pincode"], values
+        ):
+            buffer.write(f"{dates[day]},{district_labels[district]},{pincode},"
+                         f"{','.join(map(str, counts))}\n")
+        yield buffer.getvalue()
+
+
+class _ChunkReader(io.TextIOBase):
+    """File-like adapter so COPY can consume a chunk generator"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, ""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def load_postgres(dsn: str, schema: str, scale: float, seed: int = 42, verbose: bool = True) -> dict:
+    """
+    Generate a dataset and COPY it into a fresh schema
+
+    Args:
+        dsn: PostgreSQL connection string
+        schema: Schema to (re)create, e.g. bench_s1
+        scale: Multiple of today's extract size
+        seed: RNG seed (same seed + scale -> same data)
+
+    Returns:
+        dict: Row counts and load timings per table
+    """
+    import psycopg2
+
+    rng = np.random.default_rng(seed)
+    geography = Geography(rng)
+    stats = {"schema": schema, "scale": scale, "tables": {}}
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+            cursor.execute(f'CREATE SCHEMA "{schema}"')
+            cursor.execute(f'SET search_path TO "{schema}"')
+            cursor.execute(SCHEMA_SQL)
+
+            for table, base_rows in BASE_ROWS.items():
+                rows = max(1, int(base_rows * scale))
+                start = time.perf_counter()
+                reader = _ChunkReader(iter_csv_chunks(table, rows, geography, rng))
+                cursor.copy_expert(f"COPY {table} FROM STDIN WITH (FORMAT csv)", reader)
+                elapsed = time.perf_counter() - start
+                stats["tables"][table] = {"rows": rows, "load_seconds": round(elapsed, 2)}
+                if verbose:
+                    print(f"✓ {schema}.{table}: {rows:,} rows in {elapsed:.1f}s")
+
+            start = time.perf_counter()
+            cursor.execute(INDEX_SQL)
+            cursor.execute(DISTRICT_SUMMARY_SQL)
+            cursor.execute("ANALYZE")
+            stats["index_seconds"] = round(time.perf_counter() - start, 2)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return stats
+
+
+def write_csv(out_dir: str, scale: float, seed: int = 42):
+    """Generate a dataset as CSV files (one per table)"""
+    rng = np.random.default_rng(seed)
+    geography = Geography(rng)
+    os.makedirs(out_dir, exist_ok=True)
+
+    headers = {
+        "enrollment": "date,state,district,pincode,age_0_5,age_5_17,age_18_greater",
+        "biometric_updates": "date,state,district,pincode,bio_age_5_17,bio_age_17_",
+        "demographic_updates": "date,state,district,pincode,demo_age_5_17,demo_age_17_",
+    }
+    for table, base_rows in BASE_ROWS.items():
+        rows = max(1, int(base_rows * scale))
+        path = os.path.join(out_dir, f"{table}.csv")
+        with open(path, "w") as f:
+            f.write(headers[table] + "\n")
+            for chunk in iter_csv_chunks(table, rows, geography, rng):
+                f.write(chunk)
+        print(f"✓ {path}: {rows:,} rows")
+
+
+def schema_for_scale(scale: float) -> str:
+    """Default schema name for a scale (bench_s1, bench_s0_1, ...)"""
+    return "bench_s" + f"{scale:g}".replace(".", "_")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic UIDAI data")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL"))
+    parser.add_argument("--schema", default=None)
+    parser.add_argument("--out", default=None, help="Write CSV files here instead of loading")
+    args = parser.parse_args()
+
+    if args.out:
+        write_csv(args.out, args.scale, args.seed)
+        return
+
+    if not args.dsn:
+        parser.error("--dsn (or BENCH_DATABASE_URL) is required unless --out is given")
+
+    load_postgres(args.dsn, args.schema or schema_for_scale(args.scale), args.scale, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+End-to-end load test for /api/chat/
+
+Drives concurrent chat requests against a running server and reports
+latency percentiles, queueing delay (client latency minus the server's
+own Server-Timing total) and DB load (stage metrics scraped from
+/metrics, plus pg_stat_database deltas when --dsn is given).
+
+Start the server with the scripted local model so no Groq key is needed:
+    LLM_BACKEND=fake FAKE_LLM_LATENCY_MS=300 uvicorn app.main:app
+
+Usage (from backend/):
+    python -m benchmarks.load_chat --concurrency 1 8 32 --requests 200
+    python -m benchmarks.load_chat --url http://localhost:8000 --dsn postgresql://localhost/uidai
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import httpx
+from benchmarks.bench_queries import _percentile
+
+
+QUESTIONS = [
+    "What are the overall problems?",
+    "Show top 10 crisis districts",
+    "Compare Maharashtra vs Punjab",
+    "Which states have the most crisis districts?",
+    "Show all states ranking",
+    "देश में क्या समस्याएं हैं?",
+    "దేశంలో సమస్యలు ఏమిటి?",
+]
+
+# Stages that hit PostgreSQL (dashboard/chart SQL and agent SQL)
+DB_STAGES = ("db.query", "agent.sql")
+
+_STAGE_PATTERN = re.compile(
+    r'^uidai_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$', re.MULTILINE
+)
+_TIER_PATTERN = re.compile(
+    r'^uidai_model_tier_(requests|escalations)_total\{\w+="([^"]+)"\} (\S+)$', re.MULTILINE
+)
+_TOTAL_PATTERN = re.compile(r'total;dur=([\d.]+)')
+
+
+async def scrape_stages(client: httpx.AsyncClient) -> dict:
+    """Read per-stage count/sum and model tier counters from the Prometheus endpoint"""
+    response = await client.get("/metrics")
+    stages = {}
+    for kind, stage, value in _STAGE_PATTERN.findall(response.text):
+        stages.setdefault(stage, {"count": 0.0, "sum": 0.0})[kind] = float(value)
+    for kind, label, value in _TIER_PATTERN.findall(response.text):
+        stages.setdefault(f"tier.{kind}", {})[label] = float(value)
+    return stages
+
+
+def tier_mix(before: dict, after: dict) -> dict:
+    """Agent runs per model tier and escalations between two scrapes"""
+    mix = {}
+    for kind in ("requests", "escalations"):
+        start, end = before.get(f"tier.{kind}", {}), after.get(f"tier.{kind}", {})
+        mix[kind] = {label: int(value - start.get(label, 0.0)) for label, value in end.items()}
+    return mix
+
+
+def pg_counters(dsn: str) -> dict:
+    """Snapshot pg_stat_database counters for the current database"""
+    import psycopg2
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT xact_commit, tup_returned, tup_fetched, blks_read, blks_hit
+                FROM pg_stat_database WHERE datname = current_database()
+            """)
+            names = [col.name for col in cursor.description]
+            return dict(zip(names, cursor.fetchone()))
+    finally:
+        conn.close()
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total: int) -> dict:
+    """Send `total` chat requests with `concurrency` in flight"""
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(QUESTIONS[i % len(QUESTIONS)])
+
+    latencies, queueing, errors = [], [], 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            question = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post("/api/chat/", json={"question": question})
+                elapsed = (time.perf_counter() - start) * 1000
+                if response.status_code != 200 or not response.json().get("success"):
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            server = _TOTAL_PATTERN.search(response.headers.get("server-timing", ""))
+            if server:
+                queueing.append(max(0.0, elapsed - float(server.group(1))))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    result = {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+    }
+    if latencies:
+        result.update({
+            "p50_ms": round(_percentile(latencies, 50), 1),
+            "p95_ms": round(_percentile(latencies, 95), 1),
+            "p99_ms": round(_percentile(latencies, 99), 1),
+        })
+    if queueing:
+        result.update({
+            "queue_p50_ms": round(_percentile(queueing, 50), 1),
+            "queue_p95_ms": round(_percentile(queueing, 95), 1),
+        })
+    return result
+
+
+def db_load(before: dict, after: dict, wall: float) -> dict:
+    """Per-stage DB query counts, time and rate between two scrapes"""
+    load = {}
+    for stage in DB_STAGES:
+        start = before.get(stage, {"count": 0.0, "sum": 0.0})
+        end = after.get(stage, {"count": 0.0, "sum": 0.0})
+        count = end["count"] - start["count"]
+        load[stage] = {
+            "queries": int(count),
+            "db_seconds": round(end["sum"] - start["sum"], 3),
+            "qps": round(count / wall, 2) if wall else 0.0,
+        }
+    return load
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "url": args.url, "levels": []}
+
+        for concurrency in args.concurrency:
+            stages_before = await scrape_stages(client)
+            pg_before = pg_counters(args.dsn) if args.dsn else None
+            started = time.perf_counter()
+
+            result = await run_level(client, concurrency, args.requests)
+
+            wall = time.perf_counter() - started
+            stages_after = await scrape_stages(client)
+            result["db"] = db_load(stages_before, stages_after, wall)
+            result["tiers"] = tier_mix(stages_before, stages_after)
+            if pg_before is not None:
+                pg_after = pg_counters(args.dsn)
+                result["pg"] = {key: pg_after[key] - pg_before[key] for key in pg_after}
+            report["levels"].append(result)
+
+            print(f"  c={concurrency:<4} {result['throughput_rps']:>7.2f} req/s  "
+                  f"p50 {result.get('p50_ms', 0):>8.1f}ms  p95 {result.get('p95_ms', 0):>8.1f}ms  "
+                  f"p99 {result.get('p99_ms', 0):>8.1f}ms  queue p95 {result.get('queue_p95_ms', 0):>8.1f}ms  "
+                  f"db {sum(s['queries'] for s in result['db'].values())} queries  "
+                  f"tiers {result['tiers']['requests']}  errors {result['errors']}")
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat endpoint")
+    parser.add_argument("--url", default=os.environ.get("BENCH_API_URL", "http://localhost:8000"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=50, help="Requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--dsn", default=None, help="Also report pg_stat_database deltas")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    args = parser.parse_args()
+
+    print(f"🔥 Load testing {args.url}/api/chat/")
+    report = asyncio.run(main_async(args))
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"chat_load_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Replay a chat query log against the current build
+
+Re-asks every logged question in order, in-process (sessions are mapped
+so follow-up refinements still refer to the right previous answer), logs
+the replay to a separate NDJSON file and compares it with the original:
+latency percentiles, per-stage time, answer paths and cache hit rates.
+
+The scripted local model is used unless --live is given, so agent stage
+timings reflect the fake LLM; SQL, cache and fast-path timings are real.
+
+Usage (from backend/):
+    python -m benchmarks.replay_queries /tmp/uidai_query_log.ndjson
+    python -m benchmarks.replay_queries query_log.ndjson --limit 500 --cold
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from benchmarks.bench_queries import _percentile
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def read_log(path: str, sources=None, limit: int = None) -> list:
+    """Logged entries in order (skipping unreadable lines)"""
+    entries = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if sources and entry.get("source") not in sources:
+                continue
+            entries.append(entry)
+            if limit and len(entries) >= limit:
+                break
+    return entries
+
+
+def summarize(entries: list) -> dict:
+    """Latency, per-stage time, path mix and cache hit rates of a set of entries"""
+    latencies = sorted(entry["total_ms"] for entry in entries)
+    stages, paths, cache = {}, {}, {}
+    for entry in entries:
+        for name, ms in entry.get("stages", {}).items():
+            stages[name] = stages.get(name, 0.0) + ms
+        path = entry.get("path") or "error"
+        paths[path] = paths.get(path, 0) + 1
+        for namespace, counts in entry.get("cache", {}).items():
+            totals = cache.setdefault(namespace, {"hit": 0, "miss": 0})
+            totals["hit"] += counts["hit"]
+            totals["miss"] += counts["miss"]
+    count = len(entries) or 1
+    return {
+        "questions": len(entries),
+        "success_rate": sum(1 for entry in entries if entry.get("success")) / count,
+        "p50_ms": _percentile(latencies, 50) if latencies else 0.0,
+        "p95_ms": _percentile(latencies, 95) if latencies else 0.0,
+        "mean_ms": sum(latencies) / count,
+        "stage_mean_ms": {name: ms / count for name, ms in sorted(stages.items())},
+        "paths": paths,
+        "cache_hit_rate": {
+            namespace: counts["hit"] / (counts["hit"] + counts["miss"])
+            for namespace, counts in sorted(cache.items()) if counts["hit"] + counts["miss"]
+        },
+        "agent_sql_statements": sum(len(entry.get("sql", [])) for entry in entries),
+    }
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "   n/a"
+    return f"{(after - before) / before * 100:+6.1f}%"
+
+
+def print_comparison(original: dict, replay: dict):
+    print(f"\n{'':<28}{'original':>12}{'replay':>12}{'delta':>12}")
+    for key in ("p50_ms", "p95_ms", "mean_ms"):
+        print(f"{key:<28}{original[key]:>12.1f}{replay[key]:>12.1f}{_delta(original[key], replay[key]):>12}")
+    print(f"{'success rate':<28}{original['success_rate']:>12.1%}{replay['success_rate']:>12.1%}")
+    print(f"{'agent SQL statements':<28}{original['agent_sql_statements']:>12}{replay['agent_sql_statements']:>12}")
+
+    print("\nStage mean ms per question:")
+    for name in sorted(set(original["stage_mean_ms"]) | set(replay["stage_mean_ms"])):
+        before, after = original["stage_mean_ms"].get(name, 0.0), replay["stage_mean_ms"].get(name, 0.0)
+        print(f"  {name:<26}{before:>12.1f}{after:>12.1f}{_delta(before, after):>12}")
+
+    print("\nAnswer paths:")
+    for name in sorted(set(original["paths"]) | set(replay["paths"])):
+        print(f"  {name:<26}{original['paths'].get(name, 0):>12}{replay['paths'].get(name, 0):>12}")
+
+    print("\nCache hit rate:")
+    for name in sorted(set(original["cache_hit_rate"]) | set(replay["cache_hit_rate"])):
+        before, after = original["cache_hit_rate"].get(name), replay["cache_hit_rate"].get(name)
+        print(f"  {name:<26}{'-' if before is None else f'{before:.1%}':>12}{'-' if after is None else f'{after:.1%}':>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("log", help="Query log to replay (NDJSON)")
+    parser.add_argument("--out", default=str(RESULTS_DIR / "replay.ndjson"), help="Query log written by the replay")
+    parser.add_argument("--source", nargs="*", default=["chat", "job"], help="Logged sources to replay")
+    parser.add_argument("--limit", type=int, help="Replay only the first N questions")
+    parser.add_argument("--cold", action="store_true", help="Clear the result cache (only its uidai:* keys) before replaying")
+    parser.add_argument("--live", action="store_true", help="Use the configured LLM instead of the scripted one")
+    args = parser.parse_args()
+
+    entries = read_log(args.log, args.source, args.limit)
+    if not entries:
+        raise SystemExit(f"No entries to replay in {args.log}")
+
+    # Settings are read at import, so configure the build before importing it
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).unlink(missing_ok=True)
+    os.environ["QUERY_LOG_ENABLED"] = "true"
+    os.environ["QUERY_LOG_PATH"] = args.out
+    if not args.live:
+        os.environ["LLM_BACKEND"] = "fake"
+
+    from app.api.routes.chat import answer_question
+    from app.config import settings
+    from app.core.analysis_report import analysis_reports
+    from app.core.cache import result_cache
+    from app.core.query_log import query_log
+
+    if args.cold:
+        result_cache.clear()
+    if settings.ANALYSIS_REPORT_ENABLED:
+        analysis_reports.refresh()
+
+    # Logged session id -> session id of the replay
+    sessions = {}
+    start = time.perf_counter()
+    for index, entry in enumerate(entries, 1):
+        logged = entry.get("session")
+        response = answer_question(entry["question"], sessions.get(logged), source="replay")
+        if logged:
+            sessions[logged] = response.session_id
+        if index % 50 == 0:
+            print(f"  replayed {index}/{len(entries)}")
+    query_log.close()
+    print(f"✓ Replayed {len(entries)} questions in {time.perf_counter() - start:.1f}s")
+
+    original, replay = summarize(entries), summarize(read_log(args.out))
+    print_comparison(original, replay)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out_file = RESULTS_DIR / "replay_summary.json"
+    out_file.write_text(json.dumps({"log": args.log, "original": original, "replay": replay}, indent=2))
+    print(f"\n✓ Replay log: {args.out}")
+    print(f"✓ Summary written to {out_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,13 @@
 import uvicorn
+from app.config import settings
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Several workers share caches through CACHE_BACKEND=sqlite or redis;
+    # auto-reload only works with a single worker
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=settings.WORKERS == 1,
+        workers=settings.WORKERS
+    )
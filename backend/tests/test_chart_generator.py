@@ -0,0 +1,88 @@
+"""
+Chart formatting: row and columnar input agree, value columns keep their
+types, and formatting stays vectorized from 10 to 10k rows
+"""
+import random
+import time
+from decimal import Decimal
+import numpy as np
+import pytest
+from app.core.chart_generator import _format_values, format_for_chart, pick_columns, to_columns
+
+QUESTION = "Compare district biometric ratio vs z score"
+
+
+def make_rows(count: int, seed: int = 42) -> list:
+    """District rows shaped like psycopg2 results (Decimal values)"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        enrollments = rng.randint(1000, 200000)
+        rows.append({
+            "district": f"District {i}",
+            "enrollments": enrollments,
+            "bio_ratio": Decimal(rng.uniform(2, 60)).quantize(Decimal("0.01")),
+            "z_score": Decimal(rng.uniform(2, 6)).quantize(Decimal("0.01")),
+        })
+    return rows
+
+
+@pytest.mark.parametrize("values, expected", [
+    ([Decimal("1.234"), Decimal("2"), Decimal("3.5")], [1.23, 2.0, 3.5]),
+    ([Decimal("1.5"), None], [1.5, 0.0]),
+    ([3, None, 7], [3, 0, 7]),
+    ([1, 2.5, None], [1.0, 2.5, 0.0]),
+    ([10, 20], [10, 20]),
+    ([True, False, None], [1.0, 0.0, 0.0]),
+    (["a", None], ["a", 0]),
+])
+def test_format_values(values, expected):
+    formatted = _format_values(values)
+    assert formatted == expected
+    assert [type(value) for value in formatted] == [type(value) for value in expected]
+
+
+def test_integer_columns_stay_integers():
+    assert all(type(value) is int for value in _format_values([1, None, 3]))
+    assert all(type(value) is int for value in _format_values(np.arange(5)))
+    assert all(type(value) is float for value in _format_values([1, 2.5]))
+
+
+def test_pick_columns():
+    columns = to_columns(make_rows(3))
+    assert pick_columns(columns) == ("district", ["enrollments", "bio_ratio", "z_score"])
+    assert pick_columns({"name": ["a"], "flag": [True]}) == ("name", ["flag"])
+    assert pick_columns({"code": ["x"], "label": ["y"], "note": ["z"]}) == ("label", ["code", "note"])
+
+
+@pytest.mark.parametrize("size", [3, 25, 1000])
+def test_row_and_columnar_input_agree(size):
+    rows = make_rows(size)
+    expected = format_for_chart(QUESTION, rows)
+    columns = to_columns(rows)
+    assert format_for_chart(QUESTION, columns) == expected
+    as_lists = {name: list(values) for name, values in columns.items()}
+    assert format_for_chart(QUESTION, as_lists) == expected
+    as_arrays = {name: np.asarray(values) for name, values in columns.items()}
+    assert format_for_chart(QUESTION, as_arrays) == expected
+
+
+@pytest.mark.parametrize("size", [10, 1000, 10000])
+def test_format_timing(size):
+    """Best-of-3 time per call; generous ceilings catch a per-row Python loop creeping back"""
+    rows = make_rows(size)
+    columns = to_columns(rows)
+
+    def best(func) -> float:
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    rows_seconds = best(lambda: format_for_chart(QUESTION, rows))
+    columns_seconds = best(lambda: format_for_chart(QUESTION, columns))
+    print(f"{size:>6} rows: rows {rows_seconds * 1e3:.2f} ms, columns {columns_seconds * 1e3:.2f} ms")
+    assert columns_seconds < 0.005 + size * 20e-6
+    assert rows_seconds < 0.005 + size * 40e-6
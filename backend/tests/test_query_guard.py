@@ -0,0 +1,48 @@
+"""
+Query guard for agent SQL: which statements are refused before they
+reach the database, and the read-only transaction the rest run in
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from app.core.query_guard import GuardedSQLDatabase, QueryRejected, check_statement
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT state, SUM(total_enrollments) FROM district_summary GROUP BY state;",
+    "WITH t AS (SELECT * FROM district_summary) SELECT district FROM t LIMIT 5",
+    "SELECT update_count, created_at FROM district_summary",
+])
+def test_accepts_read_only_queries(query):
+    assert check_statement(query) == query.strip().rstrip(';')
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "SELECT 1; DROP TABLE district_summary",
+    "DELETE FROM district_summary",
+    "SELECT * INTO stolen FROM district_summary",
+    "SELECT set_config('statement_timeout','0',false)",
+    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity",
+    "SELECT pg_read_file('/etc/passwd')",
+    "SELECT PG_CANCEL_BACKEND (42)",
+    "SELECT lo_import('/etc/passwd')",
+    "SELECT pg_sleep(60)",
+])
+def test_rejects_writes_and_side_effects(query):
+    with pytest.raises(QueryRejected):
+        check_statement(query)
+
+
+def test_guarded_statement_runs_in_read_only_transaction():
+    engine = create_engine("sqlite://")
+    guarded = GuardedSQLDatabase(engine)
+    executed = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    # SQLite has no SET TRANSACTION, so the statement fails right after it
+    with pytest.raises(QueryRejected):
+        guarded._execute("SELECT 1")
+    assert executed == ["SET TRANSACTION READ ONLY"]
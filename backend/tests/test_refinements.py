@@ -0,0 +1,70 @@
+"""
+Follow-up refinement parser: which questions are answered from the
+previous result and which go back to the agent
+"""
+import pytest
+from app.core.refinements import apply_refinement, describe_result, parse_refinement
+
+STATES = {
+    "state": ["Maharashtra", "Punjab", "Kerala", "Bihar", "Tamil Nadu"],
+    "avg_bio_ratio": [31.2, 24.5, 12.0, 18.3, 9.7],
+}
+DISTRICTS = {
+    "location": ["Pune, Maharashtra", "Thane, Maharashtra", "Patna, Bihar", "Chennai, Tamil Nadu"],
+    "bio_ratio": [40.1, 35.0, 33.3, 30.2],
+    "z_score": [3.1, 2.6, 2.4, 2.1],
+}
+
+
+@pytest.mark.parametrize("question, columns, places, check", [
+    ("Show top 3 instead", STATES, [], lambda r: r.limit == 3),
+    ("only Maharashtra and Punjab", STATES, ["Maharashtra", "Punjab"],
+     lambda r: set(r.values) == {"Maharashtra", "Punjab"} and not r.exclude),
+    ("what about only Kerala", STATES, ["Kerala"], lambda r: r.values == ["Kerala"]),
+    ("everything except Bihar", STATES, ["Bihar"], lambda r: r.values == ["Bihar"] and r.exclude),
+    ("sort them by z score ascending", DISTRICTS, [],
+     lambda r: r.sort_column == "z_score" and r.descending is False),
+    ("switch to a pie chart", STATES, [], lambda r: r.chart_type == "pie"),
+    ("bottom 2 of those", DISTRICTS, [], lambda r: r.limit == 2 and r.from_end),
+    ("only the Maharashtra districts", DISTRICTS, ["Maharashtra"], lambda r: r.values == ["Maharashtra"]),
+])
+def test_accepts_follow_ups(question, columns, places, check):
+    refinement = parse_refinement(question, columns, places)
+    assert refinement is not None
+    assert check(refinement)
+
+
+@pytest.mark.parametrize("question, columns, places", [
+    # New place, metric or grouping
+    ("What are the top 5 districts in Tamil Nadu now?", STATES, ["Tamil Nadu"]),
+    ("Show the top 3 states by enrollment instead", STATES, []),
+    ("Is it true that Kerala has the lowest ratio? Show top 5", STATES, ["Kerala"]),
+    ("What is the distribution of enrollments? show it as a bar chart", STATES, []),
+    ("show those for Karnataka instead", STATES, ["Karnataka"]),
+    ("only Pune district instead", STATES, ["Pune"]),
+    ("show the states instead", DISTRICTS, []),
+    ("sort by demographic updates", STATES, []),
+    # No reference back to the previous result
+    ("show top 5", STATES, []),
+    ("just the numbers now", STATES, []),
+    ("give me the same for it", STATES, []),
+    ("only Goa", STATES, ["Goa"]),
+])
+def test_rejects_questions_needing_new_data(question, columns, places):
+    assert parse_refinement(question, columns, places) is None
+
+
+def test_rejects_empty_result():
+    assert parse_refinement("top 3 instead", {"state": [], "avg_bio_ratio": []}) is None
+
+
+def test_apply_and_describe_in_question_language():
+    refinement = parse_refinement("sort them ascending, top 2", STATES)
+    columns = apply_refinement(STATES, refinement)
+    assert columns["state"] == ["Tamil Nadu", "Kerala"]
+    assert STATES["state"][0] == "Maharashtra"  # stored result untouched
+
+    english = describe_result("Rank states", refinement, columns)
+    hindi = describe_result("Rank states", refinement, columns, "hi")
+    assert english.startswith('Refined the previous result ("Rank states")')
+    assert "शीर्ष 2" in hindi and "Refined" not in hindi
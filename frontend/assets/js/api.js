@@ -1,9 +1,128 @@
+/**
+ * Response cache - Dashboard payloads persisted in localStorage
+ *
+ * Entries are keyed by endpoint (path + query string) and hold the
+ * server's ETag and data version. When any response reports a new data
+ * version, every stored entry is dropped.
+ */
+class ResponseCache {
+    constructor(prefix = CONFIG.CACHE.PREFIX, maxAge = CONFIG.CACHE.MAX_AGE_MS, freshFor = CONFIG.CACHE.FRESH_MS) {
+        this.prefix = prefix;
+        this.maxAge = maxAge;
+        this.freshFor = freshFor;
+        this.enabled = CONFIG.CACHE.ENABLED && this.storageAvailable();
+    }
+
+    storageAvailable() {
+        try {
+            const probe = `${this.prefix}probe`;
+            localStorage.setItem(probe, '1');
+            localStorage.removeItem(probe);
+            return true;
+        } catch (error) {
+            return false;
+        }
+    }
+
+    /**
+     * Stored entry for an endpoint, or null (missing, corrupt or too old)
+     */
+    read(endpoint) {
+        if (!this.enabled) return null;
+        try {
+            const entry = JSON.parse(localStorage.getItem(this.prefix + endpoint));
+            if (!entry || Date.now() - entry.storedAt > this.maxAge) return null;
+            return entry;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    write(endpoint, etag, version, data) {
+        if (!this.enabled) return;
+        try {
+            localStorage.setItem(
+                this.prefix + endpoint,
+                JSON.stringify({ etag, version, data, storedAt: Date.now() })
+            );
+        } catch (error) {
+            // Quota exceeded: start over rather than keep a half-full cache
+            console.warn('Client cache full, clearing:', error);
+            this.clear();
+        }
+    }
+
+    /**
+     * Whether an entry was validated recently enough to skip the network
+     */
+    isFresh(entry) {
+        return Date.now() - entry.storedAt < this.freshFor;
+    }
+
+    /**
+     * Refresh an entry's age after a 304
+     */
+    touch(endpoint, entry) {
+        this.write(endpoint, entry.etag, entry.version, entry.data);
+    }
+
+    /**
+     * Drop every entry once the server reports a different data version
+     */
+    syncVersion(version) {
+        if (!this.enabled || !version) return;
+        const versionKey = `${this.prefix}version`;
+        const known = localStorage.getItem(versionKey);
+        if (known && known !== version) {
+            console.log(`♻ Data version changed (${known} → ${version}), clearing client cache`);
+            this.clear();
+        }
+        try {
+            localStorage.setItem(versionKey, version);
+        } catch (error) {
+            // Storage full; the next write clears it
+        }
+    }
+
+    clear() {
+        Object.keys(localStorage)
+            .filter(key => key.startsWith(this.prefix))
+            .forEach(key => localStorage.removeItem(key));
+    }
+}
+
 /**
  * API Service - Handles all backend communication
  */
 class APIService {
     constructor() {
         this.baseURL = CONFIG.API_BASE_URL;
+        this.cache = new ResponseCache();
+    }
+
+    /**
+     * Fetch wrapper returning the raw response (errors for 429 and non-2xx/304)
+     */
+    async request(endpoint, options = {}) {
+        const url = `${this.baseURL}${endpoint}`;
+        const response = await fetch(url, {
+            ...options,
+            headers: {
+                'Content-Type': 'application/json',
+                ...options.headers
+            }
+        });
+
+        if (response.status === 429) {
+            const retryAfter = response.headers.get('Retry-After') || '1';
+            throw new Error(`Too many requests, please retry in ${retryAfter}s`);
+        }
+
+        if (!response.ok && response.status !== 304) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        return response;
     }
 
     /**
@@ -11,20 +130,62 @@ class APIService {
      */
     async fetch(endpoint, options = {}) {
         try {
-            const url = `${this.baseURL}${endpoint}`;
-            const response = await fetch(url, {
-                headers: {
-                    'Content-Type': 'application/json',
-                    ...options.headers
-                },
-                ...options
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+            const response = await this.request(endpoint, options);
+            return await response.json();
+        } catch (error) {
+            console.error('API Error:', error);
+            throw error;
+        }
+    }
+
+    /**
+     * GET through the client cache (stale-while-revalidate)
+     *
+     * A stored copy is returned at once and, unless it was validated in
+     * the last CONFIG.CACHE.FRESH_MS, revalidated in the background with
+     * If-None-Match; onUpdate(data) is called only if the server sent
+     * something newer. Without a stored copy, or with force, this waits
+     * for the network (still a cheap 304 when nothing changed).
+     */
+    async cachedFetch(endpoint, onUpdate = null, force = false) {
+        const entry = this.cache.read(endpoint);
+        if (!entry || force) {
+            return await this.revalidate(endpoint, entry);
+        }
+        if (this.cache.isFresh(entry)) {
+            return entry.data;
+        }
+
+        this.revalidate(endpoint, entry)
+            .then(data => {
+                if (data !== entry.data && onUpdate) onUpdate(data);
+            })
+            .catch(error => console.warn(`Background revalidation failed for ${endpoint}:`, error));
+        return entry.data;
+    }
+
+    /**
+     * Conditional GET; returns the stored data on 304, else the new payload
+     */
+    async revalidate(endpoint, entry) {
+        try {
+            const headers = entry && entry.etag ? { 'If-None-Match': entry.etag } : {};
+            const response = await this.request(endpoint, { headers });
+            const version = response.headers.get('X-Data-Version');
+            this.cache.syncVersion(version);
+
+            if (response.status === 304 && entry) {
+                this.cache.touch(endpoint, entry);
+                return entry.data;
             }
 
-            return await response.json();
+            const data = await response.json();
+            // Only responses the server marked as validatable are kept
+            const etag = response.headers.get('ETag');
+            if (etag) {
+                this.cache.write(endpoint, etag, version, data);
+            }
+            return data;
         } catch (error) {
             console.error('API Error:', error);
             throw error;
@@ -41,41 +202,57 @@ class APIService {
     /**
      * Get dashboard metrics
      */
-    async getMetrics() {
-        return await this.fetch(CONFIG.ENDPOINTS.METRICS);
+    async getMetrics(onUpdate = null) {
+        return await this.cachedFetch(CONFIG.ENDPOINTS.METRICS, onUpdate);
     }
 
     /**
      * Get state rankings
      */
-    async getStates(limit = 20) {
-        return await this.fetch(`${CONFIG.ENDPOINTS.STATES}?limit=${limit}`);
+    async getStates(limit = 20, onUpdate = null) {
+        return await this.cachedFetch(`${CONFIG.ENDPOINTS.STATES}?limit=${limit}`, onUpdate);
     }
 
     /**
      * Get crisis districts
      */
-    async getCrisisDistricts(limit = 30) {
-        return await this.fetch(`${CONFIG.ENDPOINTS.CRISIS_DISTRICTS}?limit=${limit}`);
+    async getCrisisDistricts(limit = 30, onUpdate = null) {
+        return await this.cachedFetch(`${CONFIG.ENDPOINTS.CRISIS_DISTRICTS}?limit=${limit}`, onUpdate);
     }
 
     /**
      * Get filter options
      */
-    async getFilters() {
-        return await this.fetch(CONFIG.ENDPOINTS.FILTERS);
+    async getFilters(onUpdate = null) {
+        return await this.cachedFetch(CONFIG.ENDPOINTS.FILTERS, onUpdate);
+    }
+
+    /**
+     * Get metrics, states, crisis districts and filters in a single
+     * round-trip (served from the client cache when possible; onUpdate
+     * receives the revalidated payload if it changed, and force skips the
+     * cache's fresh window). Its health field may be cached: use
+     * checkHealth() for the live status.
+     */
+    async getBootstrap(statesLimit = 20, crisisLimit = 30, onUpdate = null, force = false) {
+        return await this.cachedFetch(
+            `${CONFIG.ENDPOINTS.BOOTSTRAP}?states_limit=${statesLimit}&crisis_limit=${crisisLimit}`,
+            onUpdate,
+            force
+        );
     }
 
     /**
-     * Send chat message
+     * Send chat message (sessionId lets the server answer follow-ups
+     * from the previous result)
      */
-    async sendChatMessage(question) {
+    async sendChatMessage(question, sessionId = null) {
         return await this.fetch(CONFIG.ENDPOINTS.CHAT, {
             method: 'POST',
-            body: JSON.stringify({ question })
+            body: JSON.stringify({ question, session_id: sessionId })
         });
     }
 }
 
 // Create global API instance
-const api = new APIService();
\ No newline at end of file
+const api = new APIService();
@@ -6,6 +6,7 @@ class ChatInterface {
         this.isOpen = false;
         this.messages = [];
         this.isLoading = false;
+        this.sessionId = null;
     }
 
     /**
@@ -186,7 +187,10 @@ async sendMessage() {
 
     try {
         // Send to API with language-appended question
-        const response = await api.sendChatMessage(question);
+        const response = await api.sendChatMessage(question, this.sessionId);
+        if (response.session_id) {
+            this.sessionId = response.session_id;
+        }
 
         // Remove typing indicator
         this.removeTypingIndicator();
@@ -12,9 +12,18 @@ const CONFIG = {
         STATES: '/api/dashboard/states',
         CRISIS_DISTRICTS: '/api/dashboard/crisis-districts',
         FILTERS: '/api/dashboard/filters',
+        BOOTSTRAP: '/api/dashboard/bootstrap',
         CHAT: '/api/chat/'
     },
     
+    // Client cache for dashboard GETs (stale-while-revalidate in localStorage)
+    CACHE: {
+        ENABLED: true,
+        PREFIX: 'uidai:api:',
+        FRESH_MS: 30 * 1000,                   // younger copies are used without revalidating
+        MAX_AGE_MS: 7 * 24 * 60 * 60 * 1000  // older copies are refetched, not painted
+    },
+    
     // Chart Colors
     COLORS: {
         PRIMARY: 'rgba(59, 130, 246, 0.8)',      // Blue
@@ -8,20 +8,20 @@ class Dashboard {
         this.crisisData = null;
         this.filters = null;
         this.selectedState = null;
+        this.listenersBound = false;
     }
 
     /**
      * Initialize dashboard
+     * @param {Object} bootstrap - Pre-fetched bootstrap payload (optional)
      */
-    async init() {
+    async init(bootstrap = null) {
         console.log('📊 Initializing dashboard...');
         
         try {
-            // Load all data
-            await this.loadMetrics();
-            await this.loadStates();
-            await this.loadCrisisDistricts();
-            await this.loadFilters();
+            // Load all data in one round-trip (cached copy first, refreshed in the background)
+            const data = bootstrap || await api.getBootstrap(20, 30, fresh => this.update(fresh));
+            this.applyBootstrap(data);
             
             // Setup event listeners
             this.setupEventListeners();
@@ -33,6 +33,52 @@ class Dashboard {
         }
     }
 
+    /**
+     * Render every section from a bootstrap payload
+     */
+    applyBootstrap(data) {
+        const errors = data.errors || {};
+        Object.entries(errors).forEach(([section, message]) => {
+            console.error(`Failed to load ${section}:`, message);
+        });
+
+        if (data.metrics) {
+            this.metrics = data.metrics;
+            this.renderMetrics();
+        } else {
+            showError('metrics-container', 'Failed to load metrics');
+        }
+
+        if (!errors.states) {
+            this.statesData = data.states;
+            this.renderStatesChart();
+        }
+
+        if (!errors.crisis_districts) {
+            this.crisisData = data.crisis_districts;
+            this.renderCrisisChart();
+            this.renderCrisisTable();
+        }
+
+        if (data.filters) {
+            this.filters = data.filters;
+            this.renderFilters();
+        }
+    }
+
+    /**
+     * Re-render with a revalidated bootstrap payload (newer data version)
+     */
+    update(data) {
+        console.log('♻ Dashboard data changed, re-rendering');
+        this.applyBootstrap(data);
+        if (this.selectedState) {
+            const stateFilter = document.getElementById('state-filter');
+            if (stateFilter) stateFilter.value = this.selectedState;
+            this.applyFilters();
+        }
+    }
+
     /**
      * Load metrics
      */
@@ -40,7 +86,10 @@ class Dashboard {
         try {
             showLoading('metrics-container');
             
-            this.metrics = await api.getMetrics();
+            this.metrics = await api.getMetrics(fresh => {
+                this.metrics = fresh;
+                this.renderMetrics();
+            });
             this.renderMetrics();
             
         } catch (error) {
@@ -56,7 +105,10 @@ class Dashboard {
     try {
         // showLoading('states-chart'); // ← REMOVE THIS LINE
         
-        this.statesData = await api.getStates(limit);
+        this.statesData = await api.getStates(limit, fresh => {
+            this.statesData = fresh;
+            this.renderStatesChart();
+        });
         this.renderStatesChart();
         
     } catch (error) {
@@ -69,7 +121,11 @@ async loadCrisisDistricts(limit = 30) {
     try {
         // showLoading('crisis-chart'); // ← REMOVE THIS LINE
         
-        this.crisisData = await api.getCrisisDistricts(limit);
+        this.crisisData = await api.getCrisisDistricts(limit, fresh => {
+            this.crisisData = fresh;
+            this.renderCrisisChart();
+            this.renderCrisisTable();
+        });
         this.renderCrisisChart();
         this.renderCrisisTable();
         
@@ -84,7 +140,10 @@ async loadCrisisDistricts(limit = 30) {
      */
     async loadFilters() {
         try {
-            this.filters = await api.getFilters();
+            this.filters = await api.getFilters(fresh => {
+                this.filters = fresh;
+                this.renderFilters();
+            });
             this.renderFilters();
         } catch (error) {
             console.error('Failed to load filters:', error);
@@ -371,14 +430,19 @@ renderMetrics() {
      * Setup event listeners
      */
     setupEventListeners() {
+        // Registered once on the static container: renderFilters() replaces
+        // the select, and re-renders must not stack more listeners
+        if (this.listenersBound) return;
+        const filtersContainer = document.getElementById('filters-container');
+        if (!filtersContainer) return;
+
         // State filter
-        const stateFilter = document.getElementById('state-filter');
-        if (stateFilter) {
-            stateFilter.addEventListener('change', (e) => {
-                this.selectedState = e.target.value;
-                this.applyFilters();
-            });
-        }
+        filtersContainer.addEventListener('change', (e) => {
+            if (e.target.id !== 'state-filter') return;
+            this.selectedState = e.target.value;
+            this.applyFilters();
+        });
+        this.listenersBound = true;
     }
 
     /**
@@ -410,7 +474,14 @@ renderMetrics() {
      */
     async refresh() {
         console.log('🔄 Refreshing dashboard...');
-        await this.init();
+        try {
+            // Always revalidate with the server (skips the client cache's fresh window)
+            const data = await api.getBootstrap(20, 30, null, true);
+            this.update(data);
+        } catch (error) {
+            console.error('✗ Dashboard refresh failed:', error);
+            showError('metrics-container', 'Failed to refresh dashboard data');
+        }
     }
 
     /**
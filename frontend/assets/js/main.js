@@ -19,9 +19,21 @@ async function initApp() {
         // Show loading screen
         showAppLoading();
 
-        // Step 1: Health check
+        // Step 1: Live health check + dashboard data in parallel (a cached
+        // dashboard copy paints at once and is revalidated in the background,
+        // but health always comes from the server). Only a failed health
+        // check stops the app; dashboard load errors are handled by the dashboard
         console.log('📡 Checking backend connection...');
-        const health = await api.checkHealth();
+        const [healthResult, bootstrapResult] = await Promise.allSettled([
+            api.checkHealth(),
+            api.getBootstrap(20, 30, fresh => dashboard.update(fresh))
+        ]);
+        
+        if (healthResult.status === 'rejected') {
+            throw healthResult.reason;
+        }
+        const health = healthResult.value;
+        const bootstrap = bootstrapResult.status === 'fulfilled' ? bootstrapResult.value : null;
         
         if (health.status === 'healthy') {
             console.log('✓ Backend connection successful');
@@ -32,9 +44,10 @@ async function initApp() {
             throw new Error('Backend health check failed');
         }
 
-        // Step 2: Initialize dashboard
+        // Step 2: Initialize dashboard (fetches again and reports the error
+        // itself if the parallel bootstrap request failed)
         console.log('📊 Initializing dashboard...');
-        await dashboard.init();
+        await dashboard.init(bootstrap);
 
         // Step 3: Initialize chat
         console.log('💬 Initializing chat interface...');
@@ -218,6 +231,7 @@ window.APP = {
         getStates: () => dashboard.statesData,
         getCrisis: () => dashboard.crisisData,
         clearChat: () => chat.clearHistory(),
+        clearCache: () => api.cache.clear(),
         testAPI: async () => {
             console.log('Testing API...');
             const health = await api.checkHealth();